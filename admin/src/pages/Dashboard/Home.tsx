@@ -76,6 +76,25 @@ export default function Home() {
     return interval;
   };
 
+  // Bot servisi işi hemen kuyruğa alır; iş bitene kadar durumunu sorgula
+  const waitForJob = async (jobId: string, token?: string) => {
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, 3000));
+
+      const response = await fetch(`${API_BASE_URL}/api/bot-jobs/${jobId}`, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+      });
+      const job = await response.json();
+
+      if (!response.ok) {
+        throw new Error(job?.error || "İş durumu alınamadı");
+      }
+      if (job.status !== "queued" && job.status !== "running") {
+        return job;
+      }
+    }
+  };
+
   const runBot = async (botName: string): Promise<boolean> => {
     const raw = localStorage.getItem("authToken");
     const token = raw?.replace(/^Bearer\s+/, "");
@@ -101,10 +120,15 @@ export default function Home() {
       console.log("TOKEN:", token);
       const data = await response.json();
 
-      if (!response.ok || !data || data.status !== "success") {
+      if (!response.ok || !data?.job_id) {
         throw new Error(data?.message || "Bot başlatılamadı");
       }
 
+      const job = await waitForJob(data.job_id, token);
+      if (job.status !== "success") {
+        throw new Error(job.error || job.result?.message || "Bot hata ile tamamlandı");
+      }
+
       // İşlem başarılı, progress'i tamamla
       clearInterval(progressInterval);
       updateBotState(botName, false, 100);
@@ -169,10 +193,15 @@ export default function Home() {
 
     const data = await response.json();
 
-    if (!response.ok || !data || data.status !== "success") {
+    if (!response.ok || !data?.job_id) {
       throw new Error(data?.message || "Detay bot başlatılamadı");
     }
 
+    const job = await waitForJob(data.job_id, token);
+    if (job.status !== "success") {
+      throw new Error(job.error || job.result?.message || "Detay bot hata ile tamamlandı");
+    }
+
     clearInterval(progressInterval);
     updateBotState(botName, false, 100);
 
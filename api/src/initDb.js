@@ -67,6 +67,12 @@ async function createTables() {
       );
     `);
 
+    // Botlar her ürünün son fiyat logunu bu index'ten okur (bkz. bot/bots/price_cache.py)
+    await db.query(`
+      CREATE INDEX IF NOT EXISTS product_price_logs_product_created_idx
+        ON product_price_logs (product_id, created_at DESC);
+    `);
+
     // === PRODUCT DETAILS ===
     await db.query(`
       CREATE TABLE IF NOT EXISTS product_details (
@@ -180,7 +180,7 @@ router.get("/bot-logs", authenticateToken, async (req, res) => {
  *             $ref: '#/components/schemas/BotRequest'
  *     responses:
  *       200:
- *         description: Bot başlatıldı
+ *         description: Bot kuyruğa eklendi, job_id ile durum takip edilir
  *         content:
  *           application/json:
  *             schema:
@@ -420,6 +420,79 @@ botEndpoints.forEach(({ path, backend, logMsg }) => {
   });
 });
 
+/**
+ * @swagger
+ * /api/bot-jobs:
+ *   get:
+ *     summary: Bot işlerini listele
+ *     tags: [Bot Operations]
+ *     security:
+ *       - bearerAuth: []
+ *     parameters:
+ *       - in: query
+ *         name: status
+ *         schema:
+ *           type: string
+ *         description: queued, running, success veya error
+ *     responses:
+ *       200:
+ *         description: İş listesi
+ *       500:
+ *         description: Sunucu hatası
+ */
+router.get("/bot-jobs", authenticateToken, async (req, res) => {
+  try {
+    const response = await axios.get(`${BOT_SERVICE_URL}/jobs`, {
+      params: req.query,
+    });
+    res.json(response.data);
+  } catch (err) {
+    res.status(500).json({
+      success: false,
+      error: "İşler alınamadı",
+      detail: err.message,
+    });
+  }
+});
+
+/**
+ * @swagger
+ * /api/bot-jobs/{jobId}:
+ *   get:
+ *     summary: Bot işinin durumunu, ilerlemesini ve sürelerini getir
+ *     tags: [Bot Operations]
+ *     security:
+ *       - bearerAuth: []
+ *     parameters:
+ *       - in: path
+ *         name: jobId
+ *         required: true
+ *         schema:
+ *           type: string
+ *     responses:
+ *       200:
+ *         description: İş durumu
+ *       404:
+ *         description: İş bulunamadı
+ *       500:
+ *         description: Sunucu hatası
+ */
+router.get("/bot-jobs/:jobId", authenticateToken, async (req, res) => {
+  try {
+    const response = await axios.get(
+      `${BOT_SERVICE_URL}/jobs/${encodeURIComponent(req.params.jobId)}`
+    );
+    res.json(response.data);
+  } catch (err) {
+    const status = err.response?.status === 404 ? 404 : 500;
+    res.status(status).json({
+      success: false,
+      error: status === 404 ? "İş bulunamadı" : "İş durumu alınamadı",
+      detail: err.message,
+    });
+  }
+});
+
 /**
  * @swagger
  * /api/health:
@@ -0,0 +1,472 @@
+# bots/base_bot.py
+
+import os
+import traceback
+from collections import deque
+from datetime import datetime
+from urllib.parse import quote_plus
+
+from log_handler import setup_logger
+from depth_policy import DepthPolicy
+from product_writer import save_products, get_price_log_writer, load_known_ids
+from write_behind import get_db_writer
+from price_cache import get_price_cache
+
+TERMS_PATHS = ["/app/search_terms/terms.txt", "search_terms/terms.txt"]
+
+# Bir terim için aynı anda istenen sayfa sayısı (1 = sayfalar sırayla istenir)
+PAGE_WINDOW = int(os.getenv("LISTING_PAGE_WINDOW", "1"))
+
+
+class BaseBot:
+    """
+    Tüm platform botlarının ortak tabanı.
+    Alt sınıflar name/platform tanımlar ve run(terms, options) uygular.
+    """
+
+    name = None          # Registry anahtarı ve log dosyası adı (ör. "trendyol-detail")
+    platform = None      # products.platform değeri
+    display_name = None  # Loglarda görünen ad
+
+    def __init__(self, progress=None):
+        # progress(counter, amount) → iş kuyruğundaki sayaçları günceller
+        self.progress = progress
+        self.logger = setup_logger(self.name)
+        self.processed = 0
+        self.errors = 0
+        self.error_products = []
+        self.started_at = None
+        self.network = None
+        self.fetch = None
+
+    def run(self, terms=None, options=None):
+        raise NotImplementedError
+
+    # === Yardımcılar ===
+    def load_terms(self, terms=None):
+        """Verilen terimleri veya terms.txt içeriğini döner"""
+        if terms:
+            return [term.strip() for term in terms if term and term.strip()]
+
+        terms_file = next((path for path in TERMS_PATHS if os.path.exists(path)), None)
+        if not terms_file:
+            self.logger.error("❌ terms.txt dosyası bulunamadı!")
+            return []
+
+        try:
+            with open(terms_file, "r", encoding="utf-8") as f:
+                search_terms = [line.strip() for line in f if line.strip()]
+            self.logger.info(f"📋 {len(search_terms)} arama terimi yüklendi")
+            return search_terms
+        except Exception as e:
+            self.logger.error(f"❌ Arama terimleri yüklenemedi: {e}")
+            return []
+
+    def mark_processed(self):
+        self.processed += 1
+        if self.progress:
+            self.progress("processed", 1)
+
+    def mark_error(self, **info):
+        self.errors += 1
+        if info:
+            self.error_products.append(info)
+        if self.progress:
+            self.progress("errors", 1)
+
+    def start(self):
+        self.started_at = datetime.now()
+        self.logger.info(f"🚀 {self.display_name} başlatıldı...")
+        self.logger.info(f"📅 Tarih: {self.started_at.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    def log_summary(self):
+        total = self.processed + self.errors
+        self.logger.info(f"\n{'='*60}")
+        self.logger.info("📊 ÖZET RAPOR")
+        self.logger.info(f"✅ Toplam işlenen: {self.processed}")
+        self.logger.info(f"❌ Toplam hata: {self.errors}")
+        self.logger.info(f"📈 Başarı oranı: {(self.processed / total * 100 if total > 0 else 0):.1f}%")
+
+        if self.error_products:
+            self.logger.info("\n❌ HATA DETAYLARI (İlk 10):")
+            for error in self.error_products[:10]:
+                details = ", ".join(f"{key}: {value}" for key, value in error.items() if key != "error")
+                self.logger.info(f"- {details}")
+                self.logger.info(f"  Hata: {error.get('error')}")
+
+    def report_network(self, source):
+        """
+        Engellenen istek sayısını ve tahmini byte tasarrufunu loglar, sonuca ekler.
+        source: network_summary() sunan driver, Fetcher veya FetchEngine
+        """
+        if not hasattr(source, "network_summary"):
+            return
+        try:
+            self.network = source.network_summary()
+        except Exception as e:
+            self.logger.warning(f"⚠️ Ağ özeti alınamadı: {e}")
+            return
+        if not self.network:
+            return
+
+        saved_mb = self.network["estimated_saved_bytes"] / (1024 * 1024)
+        transferred_mb = self.network["transferred_bytes"] / (1024 * 1024)
+        self.logger.info(
+            f"🚫 {self.network['blocked_requests']} istek engellendi "
+            f"(~{saved_mb:.1f} MB tasarruf, {transferred_mb:.1f} MB indirildi)"
+        )
+
+    def report_fetcher(self, fetcher):
+        """Sayfaların HTTP / tarayıcı dağılımını loglar, tarayıcı kullanıldıysa ağ özetini ekler"""
+        self.fetch = fetcher.stats()
+        self.logger.info(
+            f"🌐 Getirme modu: {self.fetch['mode']} → {self.fetch['http']} HTTP, "
+            f"{self.fetch['browser']} tarayıcı ({self.fetch['escalated']} tarayıcıya yükseltildi)"
+        )
+        if self.fetch.get("subtree"):
+            self.logger.info(f"✂️ {self.fetch['subtree']} sayfada tüm DOM yerine sadece ürün kartları alındı")
+        if self.fetch.get("harvested"):
+            self.logger.info(f"🧺 {self.fetch['harvested']} sayfa ayrı navigasyon yerine kaydırılarak toplandı")
+        if self.fetch.get("captured"):
+            self.logger.info(f"📡 {self.fetch['captured']} sayfanın ürünleri DOM yerine API yanıtından okundu")
+        if self.fetch.get("lean"):
+            self.logger.info(f"🪶 {self.fetch['lean']} sayfa script/stil olmadan (yalın) alındı")
+        if self.fetch.get("pooled"):
+            self.logger.info(f"🧵 {self.fetch['pooled']} sayfa {self.fetch['parse_workers']} süreçlik çıkarım havuzunda işlendi")
+        self.report_network(fetcher)
+
+    def result(self, status="success"):
+        duration = (datetime.now() - self.started_at).total_seconds() if self.started_at else None
+        return {
+            "status": status,
+            "bot": self.name,
+            "processed": self.processed,
+            "errors": self.errors,
+            "duration_seconds": round(duration, 2) if duration is not None else None,
+            "network": self.network,
+            "fetch": self.fetch,
+        }
+
+
+class ListingBot(BaseBot):
+    """
+    Arama botlarının ortak tabanı. Her terimin sayfaları sırayla işlenir,
+    farklı terimlerin (ve page_window ile aynı terimin) sayfaları FetchEngine
+    ile eşzamanlı çekilir. Kaydırmalı toplamada (bkz. scroll_harvest) terimin tüm
+    sayfaları tek navigasyonda parti parti gelir; her parti bir sayfa gibi işlenir.
+    Alt sınıflar page_url, process_page, card_prices ve save_term_count uygular;
+    process_page kartları save_cards ile sayfa sayfa toplu yazar.
+    """
+
+    # Fiyat loglarının toplu yazıcısı (bkz. product_writer.PriceLogWriter); scrape_terms boyunca açık
+    price_logs = None
+    # Arka plan yazıcısı (bkz. write_behind) ve yeni ürünü anlamak için kayıtlı ürün kimlikleri
+    writer = None
+    known_ids = None
+    # Yazıcının bildirdiği (satırlar, yazıldı_mı) sonuçları; bot thread'inde settle_writes ile sayılır
+    write_outcomes = None
+    # Son fiyat önbelleği (bkz. price_cache); None ise her gözlem loglanır
+    last_prices = None
+    # options["price_log_copy"]: fiyat logları COPY ile mi yazılsın (None → PRICE_LOG_COPY)
+    price_log_copy = None
+
+    def page_url(self, encoded_term, page):
+        raise NotImplementedError
+
+    def process_page(self, conn, cur, state, result):
+        """Getirilen sayfayı işler; sonraki sayfaya geçilecekse True döner"""
+        raise NotImplementedError
+
+    def card_prices(self, fields):
+        """Kart alanlarından (price, campaign_price, ödenen_fiyat); kaydedilmeyecek kartta None"""
+        raise NotImplementedError
+
+    def save_term_count(self, cur, term, new_product_count):
+        raise NotImplementedError
+
+    def scrape_terms(self, engine, conn, cur, search_terms, max_pages, options=None):
+        """
+        page_window > 1 ise bir terimin sonraki sayfaları önceden (paralel oturumlarda)
+        istenir; sonuçlar yine sayfa sırasıyla işlenir. Bir sayfa boş/tekrar dönünce
+        veya derinlik politikası durdurunca terimin bekleyen sayfaları iptal edilir.
+        """
+        options = options or {}
+        page_window = max(1, int(options.get("page_window") or PAGE_WINDOW))
+        policy = DepthPolicy(self.platform, max_pages, options)
+        harvesting = engine.harvesting
+        if harvesting:
+            engine.set_harvest_batches(max_pages)
+
+        def requests_for(state):
+            """Pencereyi doldurur: işlenecek sayfadan itibaren en fazla page_window sayfa açık"""
+            requests = []
+            # Kaydırmalı toplamada sadece ilk sayfa açılır, gerisi aynı oturumda kaydırılarak gelir
+            last = 1 if harvesting else min(state["max_depth"], state["next"] + page_window - 1)
+            while state["requested"] < last:
+                state["requested"] += 1
+                page = state["requested"]
+                url = self.page_url(state["encoded"], page)
+                self.logger.info(f"📄 '{state['term']}' sayfa {page} URL: {url}")
+                requests.append((url, (state, page)))
+            return requests
+
+        def handle(url, context, result, error):
+            state, page = context
+            if state["stopped"]:
+                return None
+            state["buffer"][page] = (result, error)
+
+            # Sayfa sırasını koru: sıradaki sayfa gelmediyse bekle
+            while state["next"] in state["buffer"] and not state["stopped"]:
+                result, error = state["buffer"].pop(state["next"])
+                if harvesting:
+                    self.check_harvest(state, result, error)
+                if not self.handle_result(conn, cur, state, result, error, policy) or harvesting:
+                    state["stopped"] = True
+                    state["buffer"].clear()
+                    self.finish_term(conn, cur, state)
+                    return None
+                state["next"] += 1
+
+            return requests_for(state)
+
+        states = []
+        for term_index, term in enumerate(search_terms, 1):
+            self.logger.info(f"🔍 [{term_index}/{len(search_terms)}] '{term}' için ürünler kuyruğa alındı")
+            state = {
+                "term": term, "encoded": quote_plus(term), "page": 1, "products": 0, "new": 0,
+                "next": 1, "requested": 0, "buffer": {}, "stopped": False,
+            }
+            policy.prepare(cur, state)
+            states.append(state)
+
+        requests = [request for state in states for request in requests_for(state)]
+        self.open_writers(conn, cur, options)
+        try:
+            # Durmuş terimlerin kuyruktaki sayfaları hiç getirilmez
+            engine.run(requests, handle, skip=lambda url, context: context[0]["stopped"])
+        finally:
+            self.close_writers()
+
+    def check_harvest(self, state, result, error):
+        """
+        Kaydırmalı toplamada terim için tek istek açılır; sayfa hazır olmadığı için toplama
+        yapılamadıysa sadece ilk ekranın kartları kaydedilir, terim hata sayılır
+        """
+        if error is None and result is not None and result.batches is not None:
+            return
+        reason = str(error) if error else "Sayfa hazır olmadı, kaydırmalı toplama yapılamadı"
+        self.logger.warning(f"⚠️ '{state['term']}' kaydırılarak toplanamadı, sadece ilk sayfa işlenecek: {reason}")
+        self.mark_error(term=state["term"], page=state["next"], error=reason)
+
+    def open_writers(self, conn, cur, options):
+        """
+        Son fiyatları yükler; arka plan yazıcısı açıksa kayıtlı kimlikleri yükler,
+        değilse fiyat logu tamponunu açar
+        """
+        self.last_prices = get_price_cache(cur, self.platform, options.get("price_log_changes"), logger=self.logger)
+        self.price_log_copy = options.get("price_log_copy")
+        self.writer = get_db_writer(options.get("write_behind"))
+        if self.writer is not None:
+            try:
+                self.known_ids = load_known_ids(cur, self.platform)
+                self.write_outcomes = deque()
+                self.logger.info(f"🗄️ Kayıtlar arka planda yazılacak ({len(self.known_ids)} kayıtlı ürün)")
+                return
+            except Exception as e:
+                self.logger.warning(f"⚠️ Kayıtlı ürünler okunamadı, sayfalar doğrudan yazılacak: {e}")
+                self.writer = None
+        self.price_logs = get_price_log_writer(conn, self.price_log_copy, on_done=self.settle_prices,
+                                               logger=self.logger)
+
+    def close_writers(self):
+        """Bu çalışmanın kayıtları yazılana kadar bekler (iş bitince veriler veritabanında olsun)"""
+        if self.writer is not None:
+            if not self.writer.flush():
+                self.logger.warning("⚠️ Arka plan yazıcısı zamanında boşalmadı, kalan kayıtlar yazılmaya devam ediyor")
+            self.settle_writes()
+            stats = self.writer.stats()
+            self.logger.info(
+                f"🗄️ Yazıcı: {stats['rows']} kayıt, {stats['flushes']} işlem "
+                f"(ort. {stats['avg_flush_ms']} ms, {stats['dropped']} düşen)"
+            )
+            self.writer = None
+            self.known_ids = None
+        if self.price_logs is not None:
+            self.price_logs.close()
+            self.price_logs = None
+        if self.last_prices is not None:
+            self.logger.info(
+                f"💰 {self.last_prices.logged} fiyat loglandı, {self.last_prices.skipped} değişmeyen fiyat atlandı"
+            )
+            self.last_prices = None
+
+    def handle_result(self, conn, cur, state, result, error, policy):
+        """
+        Getirilen sonucu sayfa sayfa işler (kaydırmalı toplamada her parti bir sayfa);
+        sonraki sayfaya geçilecekse True döner, state["next"] son işlenen sayfaya gelir.
+        """
+        pages = result.batches if result is not None and result.batches else [result]
+        for offset, page_result in enumerate(pages):
+            if offset:
+                state["next"] += 1
+            state["page"] = state["next"]
+            if not self.handle_page(conn, cur, state, page_result, error, policy) or state["page"] >= state["max_depth"]:
+                return False
+        return True
+
+    def handle_page(self, conn, cur, state, result, error, policy):
+        """Tek sayfayı işler; sonraki sayfaya geçilecekse True döner"""
+        page = state["page"]
+        if error:
+            self.logger.error(f"❌ '{state['term']}' sayfa {page} yükleme hatası: {error}")
+            return True
+
+        state.update(page_saved=0, page_new=0, page_min_price=None)
+        try:
+            if not self.process_page(conn, cur, state, result):
+                return False
+        except Exception as e:
+            self.logger.error(f"❌ '{state['term']}' sayfa {page} işleme hatası: {e}")
+            self.logger.debug(f"Stack trace:\n{traceback.format_exc()}")
+            return True
+
+        reason = policy.stop_reason(state)
+        if reason:
+            self.logger.info(f"🛑 '{state['term']}' sayfa {page} sonrası durduruldu: {reason}")
+            return False
+        return True
+
+    def save_cards(self, conn, cur, state, cards):
+        """
+        Sayfanın kartlarını (bkz. extraction_specs.page_records) kaydeder. Arka plan yazıcısı
+        açıksa kartlar kuyruğa bırakılır, yeni ürün kayıtlı kimliklerden anlaşılır (bkz. write_behind);
+        ürün ancak yazıcı yazdığını bildirince işlenmiş sayılır, düşülen ürün hata sayılır.
+        Değilse tek işlemde yazılır: ürünler tek upsert, sayfa başına bir commit; fiyat logları
+        COPY tamponuna ya da kapalıysa aynı işlemde tek INSERT ile (bkz. product_writer).
+        Yazım başarısız olursa sayfanın hiçbir kartı kaydedilmez, hepsi hata sayılır.
+        """
+        term, page = state["term"], state["page"]
+        total = len(cards)
+        if self.writer is not None:
+            self.settle_writes()
+        rows, products = [], []
+        for index, fields in enumerate(cards, 1):
+            prices = self.card_prices(fields) if fields else None
+            if prices is None:
+                continue
+            price, campaign_price, paid = prices
+            self.logger.debug(f"📝 Ürün: {fields['title'][:30]}... - Fiyat: {price} TL")
+            rows.append((index, fields, paid))
+            product_id, stock_status = fields["platform_product_id"], fields["stock_status"]
+            # Fiyat ve stok son logla (yazımı bekleyen dahil) aynıysa ürün güncellenir ama log yazılmaz
+            # (heartbeat hariç); loglanacak gözlem yazım sonucu gelene kadar bekleyen sayılır
+            log = self.last_prices is None or self.last_prices.should_log(product_id, price, campaign_price, stock_status)
+            if log and self.last_prices is not None:
+                self.last_prices.queue(product_id, price, campaign_price, stock_status)
+            products.append((product_id, fields["product_link"], fields["title"], fields["brand"],
+                             price, campaign_price, stock_status, log))
+        if not products:
+            return
+
+        try:
+            if self.writer is not None:
+                saved = self.queue_products(products)
+            else:
+                saved = save_products(conn, cur, self.platform, products, self.price_logs)
+                # Loglar sayfanın işleminde yazıldı; tampondaysa sonuç flush'ta bildirilir
+                if self.price_logs is None:
+                    self.settle_prices(products, True)
+        except Exception as e:
+            self.settle_prices(products, False)
+            self.logger.error(f"❌ '{term}' sayfa {page} kayıt hatası ({len(products)} ürün geri alındı): {e}")
+            self.logger.debug(f"Stack trace:\n{traceback.format_exc()}")
+            self.mark_error(term=term, page=page, error=str(e))
+            for _ in products[1:]:
+                self.mark_error()
+            return
+
+        for (index, fields, paid), (product_db_id, is_new) in zip(rows, saved):
+            title = fields["title"]
+            if not product_db_id:
+                self.logger.error(f"❌ DB ID alınamadı: {fields['platform_product_id']}")
+                self.mark_error()
+                continue
+            if self.writer is None:
+                self.mark_processed()
+            if is_new:
+                self.logger.info(f"🆕 [{index}/{total}] YENİ ÜRÜN: {title[:50]}... - {paid} TL")
+            else:
+                self.logger.info(f"✅ [{index}/{total}] {title[:50]}... - {paid} TL")
+            self.count_product(state, True, is_new, paid)
+
+    def queue_products(self, products):
+        """Ürünleri yazıcı kuyruğuna bırakır; (kimlik, yeni_mi) listesi döner"""
+        saved = []
+        for product in products:
+            product_id = product[0]
+            saved.append((product_id, product_id not in self.known_ids))
+            self.known_ids.add(product_id)
+        self.writer.put_products(self.platform, products, on_done=self.write_done, copy_logs=self.price_log_copy)
+        return saved
+
+    def write_done(self, rows, written):
+        """Yazıcı thread'inden çağrılır; sayaçlar bot thread'inde settle_writes ile güncellenir"""
+        self.write_outcomes.append((rows, written))
+
+    def settle_writes(self):
+        """Yazıcının bildirdiği sonuçları sayaçlara işler: yazılan ürün işlenmiş, düşülen ürün hata sayılır"""
+        outcomes = self.write_outcomes
+        while outcomes:
+            rows, written = outcomes.popleft()
+            self.settle_prices(rows, written)
+            for row in rows:
+                if written:
+                    self.mark_processed()
+                else:
+                    self.mark_error(product_id=row[0], error="Arka plan yazıcısı ürünü yazamadı")
+
+    def settle_prices(self, products, written):
+        """
+        Loglanan ürünlerin yazım sonucunu son fiyat önbelleğine işler: yazılan gözlem son log olur,
+        yazılamayan ürün önbellekten silinir (sonraki gözlemi yeniden loglanır)
+        """
+        if self.last_prices is None:
+            return
+        for product_id, _, _, _, price, campaign_price, stock_status, log in products:
+            if not log:
+                continue
+            if written:
+                self.last_prices.remember(product_id, price, campaign_price, stock_status)
+            else:
+                self.last_prices.forget(product_id, price, campaign_price, stock_status)
+
+    def count_product(self, state, saved, is_new, price):
+        """Kaydedilen ürünü terim ve sayfa sayaçlarına işler"""
+        if not saved:
+            return
+        state["products"] += 1
+        state["page_saved"] += 1
+        if is_new:
+            state["new"] += 1
+            state["page_new"] += 1
+        if price:
+            current = state["page_min_price"]
+            state["page_min_price"] = price if current is None else min(current, price)
+
+    def finish_term(self, conn, cur, state):
+        term = state["term"]
+        # Bu terim için özet
+        self.logger.info(
+            f"🎯 '{term}' için toplam {state['products']} ürün işlendi ({state['new']} yeni, {state['page']} sayfa)"
+        )
+
+        # Eğer bu terim için en az 1 yeni ürün eklendiyse, search_terms tablosunu güncelle
+        if state["new"] > 0:
+            if self.writer is not None:
+                self.writer.put_term_count(self.platform, term, state["new"])
+                self.logger.info(f"📈 '{term}' için search_terms sayacı kuyruğa alındı (+{state['new']} yeni ürün)")
+                return
+            self.save_term_count(cur, term, state["new"])
+            conn.commit()
+            self.logger.info(f"📈 '{term}' için search_terms sayacı güncellendi (+{state['new']} yeni ürün)")
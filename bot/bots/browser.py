@@ -0,0 +1,116 @@
+# bots/browser.py
+
+import os
+import logging
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+
+from request_blocking import BLOCKING_ENABLED
+from network_capture import CAPTURE_ENABLED
+
+logger = logging.getLogger("browser")
+
+CHROME_BIN = os.getenv("CHROME_BIN", "/usr/bin/chromium")
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver")
+PAGE_LOAD_TIMEOUT = int(os.getenv("BROWSER_PAGE_LOAD_TIMEOUT", "60"))
+
+USER_AGENTS = {
+    "selenium": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/115.0.0.0 Safari/537.36"
+    ),
+    # n11 bot tespitine karşı undetected_chromedriver kullanıyor
+    "uc": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+}
+
+
+def build_driver(flavor="selenium"):
+    """
+    Headless Chrome başlatır.
+    flavor="selenium" düz selenium (trendyol, hepsiburada, avansas),
+    flavor="uc" undetected_chromedriver (n11).
+    """
+    if flavor == "uc":
+        import undetected_chromedriver as uc
+
+        options = uc.ChromeOptions()
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        options.add_argument(f"--user-agent={USER_AGENTS['uc']}")
+        _enable_performance_log(options)
+
+        driver = uc.Chrome(
+            options=options,
+            browser_executable_path=CHROME_BIN,
+            driver_executable_path=CHROMEDRIVER_PATH
+        )
+    else:
+        options = Options()
+        options.add_argument("--headless")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument(f"user-agent={USER_AGENTS['selenium']}")
+        _enable_performance_log(options)
+
+        driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=options)
+
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    return driver
+
+
+def _enable_performance_log(options):
+    """Engellenen istek / byte raporu ve API yanıtı yakalama için Network olaylarını performance loguna yazdırır"""
+    if BLOCKING_ENABLED or CAPTURE_ENABLED:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def browser_memory_mb(driver):
+    """
+    chromedriver ve altındaki tüm Chrome süreçlerinin toplam RSS değeri (MB).
+    /proc okunamazsa (Linux dışı) None döner.
+    """
+    roots = []
+    try:
+        roots.append(driver.service.process.pid)
+    except Exception:
+        pass
+    # undetected_chromedriver Chrome'u chromedriver'dan bağımsız başlatır
+    if getattr(driver, "browser_pid", None):
+        roots.append(driver.browser_pid)
+    if not roots:
+        return None
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total_pages = 0
+    pending = list(roots)
+    seen = set()
+    while pending:
+        pid = pending.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        # Süreç bu arada kapanmış olabilir, sadece onu atla
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total_pages += int(f.read().split()[1])
+            task_dir = f"/proc/{pid}/task"
+            for tid in os.listdir(task_dir):
+                with open(f"{task_dir}/{tid}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+
+    if total_pages == 0:
+        return None
+    return total_pages * page_size / (1024 * 1024)
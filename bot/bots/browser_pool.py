@@ -0,0 +1,338 @@
+# bots/browser_pool.py
+
+import os
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+
+from browser import build_driver, browser_memory_mb
+from request_blocking import BlockingStats, apply_blocking, read_network_log
+from network_capture import NetworkCapture
+
+logger = logging.getLogger("browser_pool")
+
+# Havuz ayarları (ortam değişkenleri). Sayfa çıkarımı süreç havuzu PARSE_WORKERS ile ayarlanır
+# (varsayılan kullanılabilir çekirdek - 1, en fazla 4; 0 → süreç açılmaz, bkz. parse_pool)
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+MAX_PAGES_PER_BROWSER = int(os.getenv("BROWSER_MAX_PAGES", "200"))
+MAX_MEMORY_MB = int(os.getenv("BROWSER_MAX_MEMORY_MB", "1500"))
+LEASE_TIMEOUT = int(os.getenv("BROWSER_LEASE_TIMEOUT", "300"))
+
+
+class PooledDriver:
+    """
+    WebDriver'ı saran ince proxy. get() çağrılarını sayar, diğer her şeyi
+    gerçek driver'a iletir (WebDriverWait, execute_script vb. aynen çalışır).
+    """
+
+    def __init__(self, driver, flavor):
+        self._driver = driver
+        self.flavor = flavor
+        self.pages = 0
+        self.created_at = time.time()
+        self.leased = False
+        self.platform = None
+        self.blocking = BlockingStats()
+        self.capture = None
+
+    def start_lease(self, platform=None):
+        """Kiralayan platformun engelleme profilini uygular, ağ sayaçlarını sıfırlar"""
+        self.platform = platform
+        if platform:
+            apply_blocking(self._driver, platform)
+        # Önceki kiralamadan kalan performance logunu boşalt
+        BlockingStats().collect(self._driver)
+        self.blocking = BlockingStats()
+        self.capture = None
+
+    def get(self, url):
+        self.pages += 1
+        # Önceki sayfanın ağ olaylarını tampon şişmeden topla
+        self.drain_network()
+        return self._driver.get(url)
+
+    def drain_network(self):
+        """Performance logunu bir kez okur; engelleme sayaçlarına ve açıksa yakalamaya dağıtır"""
+        messages = read_network_log(self._driver)
+        self.blocking.update(messages)
+        if self.capture is not None:
+            self.capture.feed(self._driver, messages)
+
+    # === API yanıtı yakalama (bkz. network_capture) ===
+    def start_capture(self, rule, url=None):
+        """Sonraki get(url) ile başlayan yüklemede kurala (ve url'nin sayfasına) uyan JSON yanıtlarını toplar"""
+        self.drain_network()
+        self.capture = NetworkCapture(rule, url)
+
+    def poll_capture(self):
+        """Yeni ağ olaylarını işler; en az bir yanıt yakalandıysa True"""
+        if self.capture is None:
+            return False
+        self.drain_network()
+        return bool(self.capture.payloads)
+
+    def finish_capture(self):
+        """Toplamayı bitirir, (birleştirilmiş yanıt ya da None, gövdesi alınamayan yanıt sayısı) döner"""
+        if self.capture is None:
+            return None, 0
+        self.drain_network()
+        capture, self.capture = self.capture, None
+        return capture.result(), capture.failed
+
+    def network_summary(self):
+        self.drain_network()
+        return self.blocking.summary()
+
+    @property
+    def raw(self):
+        return self._driver
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class BrowserPool:
+    """
+    Aynı tipte (selenium / uc) N adet sıcak headless Chrome tutar.
+    acquire() ile kiralanır, release() ile iade edilir; iade sırasında sağlık
+    kontrolü yapılır, sayfa veya bellek bütçesini aşan tarayıcı yenilenir.
+    """
+
+    def __init__(self, flavor="selenium", size=POOL_SIZE,
+                 max_pages=MAX_PAGES_PER_BROWSER, max_memory_mb=MAX_MEMORY_MB):
+        self.flavor = flavor
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self._idle = []
+        self._total = 0          # Boşta + kirada + başlatılmakta olanlar
+        self._cond = threading.Condition()
+        self._closed = False
+        self.recycled = 0
+        self.launched = 0
+
+    # === Yaşam döngüsü ===
+    def warm(self):
+        """Havuzu arka planda size kadar doldurur"""
+        with self._cond:
+            missing = self.size - self._total
+            self._total += max(missing, 0)
+        for _ in range(max(missing, 0)):
+            threading.Thread(target=self._launch_idle, daemon=True).start()
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+
+    # === Kiralama ===
+    def acquire(self, timeout=LEASE_TIMEOUT, platform=None):
+        """Sağlıklı bir tarayıcı döner; havuz doluysa iade bekler"""
+        deadline = time.time() + timeout
+        while True:
+            launch = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Tarayıcı havuzu kapatıldı")
+                if self._idle:
+                    pooled = self._idle.pop()
+                elif self._total < self.size:
+                    self._total += 1
+                    launch = True
+                    pooled = None
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError(f"{self.flavor} havuzundan tarayıcı alınamadı")
+                    self._cond.wait(remaining)
+                    continue
+
+            if launch:
+                pooled = self._launch()
+                if not pooled:
+                    raise RuntimeError("Chrome başlatılamadı")
+            elif not self._is_healthy(pooled):
+                logger.warning("⚠️ Sağlıksız tarayıcı havuzdan çıkarıldı")
+                self._discard(pooled)
+                continue
+
+            pooled.leased = True
+            pooled.start_lease(platform)
+            return pooled
+
+    def release(self, pooled, broken=False):
+        """Tarayıcıyı havuza iade eder veya bütçe aşıldıysa yeniler"""
+        if pooled is None:
+            return
+        pooled.leased = False
+
+        reason = None
+        if broken:
+            reason = "hata"
+        elif pooled.pages >= self.max_pages:
+            reason = f"{pooled.pages} sayfa"
+        else:
+            memory = browser_memory_mb(pooled)
+            if memory is not None and memory > self.max_memory_mb:
+                reason = f"{memory:.0f} MB bellek"
+
+        if reason or not self._reset(pooled):
+            logger.info(f"♻️ Tarayıcı yenileniyor ({reason or 'sıfırlanamadı'})")
+            self.recycled += 1
+            self._discard(pooled)
+            if not self._closed:
+                self.warm()
+            return
+
+        with self._cond:
+            if self._closed:
+                self._total -= 1
+                closed = True
+            else:
+                self._idle.append(pooled)
+                self._cond.notify()
+                closed = False
+        if closed:
+            self._quit(pooled)
+
+    @contextmanager
+    def lease(self, timeout=LEASE_TIMEOUT, platform=None):
+        pooled = self.acquire(timeout, platform=platform)
+        broken = False
+        try:
+            yield pooled
+        except Exception:
+            broken = not self._is_healthy(pooled)
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            total = self._total
+        return {
+            "flavor": self.flavor,
+            "size": self.size,
+            "idle": idle,
+            "leased": total - idle,
+            "launched": self.launched,
+            "recycled": self.recycled,
+        }
+
+    # === Yardımcılar ===
+    def _launch(self):
+        try:
+            started = time.time()
+            pooled = PooledDriver(build_driver(self.flavor), self.flavor)
+            self.launched += 1
+            logger.info(f"✅ Chrome başlatıldı ({self.flavor}, {time.time() - started:.1f} sn)")
+            return pooled
+        except Exception as e:
+            logger.error(f"❌ Chrome driver başlatma hatası: {e}")
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            return None
+
+    def _launch_idle(self):
+        pooled = self._launch()
+        if not pooled:
+            return
+        with self._cond:
+            if not self._closed:
+                self._idle.append(pooled)
+                self._cond.notify()
+                return
+            self._total -= 1
+        self._quit(pooled)
+
+    def _is_healthy(self, pooled):
+        try:
+            return pooled.raw.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _reset(self, pooled):
+        """Fazla sekmeleri kapatır ve boş sayfaya döner"""
+        try:
+            handles = pooled.raw.window_handles
+            for handle in handles[1:]:
+                pooled.raw.switch_to.window(handle)
+                pooled.raw.close()
+            pooled.raw.switch_to.window(handles[0])
+            pooled.raw.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, pooled):
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+        self._quit(pooled)
+
+    def _quit(self, pooled):
+        try:
+            pooled.raw.quit()
+        except Exception:
+            pass
+
+
+# === Süreç geneli havuzlar ===
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(flavor="selenium"):
+    with _pools_lock:
+        if flavor not in _pools:
+            _pools[flavor] = BrowserPool(flavor)
+        return _pools[flavor]
+
+
+def acquire_driver(flavor="selenium", logger=logger, platform=None, timeout=None):
+    """
+    Bot'lar için: havuzdan tarayıcı kirala, başarısızsa None döner.
+    timeout=0 iade beklemez: tüm tarayıcılar kiradaysa sessizce None (ek işçiler için, bkz. fetch_engine)
+    """
+    try:
+        driver = get_pool(flavor).acquire(LEASE_TIMEOUT if timeout is None else timeout, platform=platform)
+        logger.info("✅ Chrome oturumu havuzdan alındı")
+        return driver
+    except TimeoutError as e:
+        if timeout != 0:
+            logger.error(f"❌ Chrome driver başlatma hatası: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"❌ Chrome driver başlatma hatası: {e}")
+        return None
+
+
+def release_driver(driver, broken=False):
+    if isinstance(driver, PooledDriver):
+        get_pool(driver.flavor).release(driver, broken=broken)
+
+
+def warm_pools(flavors=("selenium", "uc")):
+    for flavor in flavors:
+        get_pool(flavor).warm()
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
+
+
+@atexit.register
+def shutdown_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.shutdown()
@@ -1,22 +1,43 @@
 from dotenv import load_dotenv
 import os
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 
 # .env dosyasını yükle
 load_dotenv()
 
-def get_db_connection():
+logger = logging.getLogger("db_pool")
+
+# Süreç geneli bağlantı havuzu ("0" → her get_db_connection yeni bağlantı açar)
+DB_POOL_ENABLED = os.getenv("DB_POOL", "1") not in ("0", "false", "no")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+# Havuz doluysa iade için beklenen en uzun süre (sn)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Bu kadar saniyedir boşta duran bağlantı kiralanmadan önce SELECT 1 ile denenir
+DB_POOL_CHECK_IDLE = float(os.getenv("DB_POOL_CHECK_IDLE", "30"))
+# Pipeline: sıradaki ifadeler tek sorguda gönderilir ("0" → her ifade ayrı tur)
+DB_PIPELINE = os.getenv("DB_PIPELINE", "1") not in ("0", "false", "no")
+
+
+def _connect():
     """
     .env dosyasından database bilgilerini alarak PostgreSQL bağlantısı oluşturur
     """
     # Environment değişkenlerini kontrol et
     required_vars = ["PG_HOST", "PG_PORT", "PG_DB", "PG_USER", "PG_PASS"]
     missing_vars = [var for var in required_vars if not os.getenv(var)]
-    
+
     if missing_vars:
         raise ValueError(f"❌ Eksik environment değişkenleri: {', '.join(missing_vars)}")
-    
+
     try:
         conn = psycopg2.connect(
             host=os.getenv("PG_HOST"),
@@ -27,10 +48,10 @@ def get_db_connection():
             cursor_factory=RealDictCursor  # Dict şeklinde sonuç döndürür
         )
         conn.autocommit = True
-        
+
         print(f"✅ Database bağlantısı başarılı: {os.getenv('PG_HOST')}:{os.getenv('PG_PORT')}/{os.getenv('PG_DB')}")
         return conn
-        
+
     except psycopg2.Error as e:
         print(f"❌ Database bağlantı hatası: {e}")
         raise
@@ -38,10 +59,336 @@ def get_db_connection():
         print(f"❌ Beklenmeyen hata: {e}")
         raise
 
+
+class PooledConnection:
+    """
+    Havuzdan kiralanmış bağlantıyı saran ince proxy. close() bağlantıyı kapatmaz,
+    havuza iade eder; diğer her şey (cursor, commit, autocommit...) gerçek bağlantıya gider.
+    """
+
+    def __init__(self, conn, pool, owner=None):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "owner", owner)
+        object.__setattr__(self, "returned", False)
+
+    def close(self):
+        if not self.returned:
+            object.__setattr__(self, "returned", True)
+            self._pool.release(self)
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+
+class DBPool:
+    """
+    min_size..max_size arası PostgreSQL bağlantısı tutar; botlar acquire() ile kiralar,
+    close() ile iade eder. Boşta uzun kalan bağlantı kiralanmadan önce denenir, iadede
+    açık işlem geri alınıp autocommit'e dönülür; bozuk bağlantı atılır, yerine yenisi açılır.
+    """
+
+    def __init__(self, min_size=DB_POOL_MIN, max_size=DB_POOL_MAX, check_idle=DB_POOL_CHECK_IDLE):
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.check_idle = check_idle
+        self._idle = []          # (bağlantı, boşa çıkma zamanı)
+        self._total = 0          # Boşta + kirada + açılmakta olanlar
+        self._leases = {}        # owner → kiradaki bağlantı sayısı
+        self._cond = threading.Condition()
+        self._closed = False
+        self.opened = 0
+        self.discarded = 0
+
+    # === Yaşam döngüsü ===
+    def warm(self):
+        """Havuzu arka planda min_size kadar doldurur"""
+        with self._cond:
+            missing = max(self.min_size - self._total, 0)
+            self._total += missing
+        for _ in range(missing):
+            threading.Thread(target=self._open_idle, daemon=True).start()
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close(conn)
+
+    # === Kiralama ===
+    def acquire(self, owner=None, timeout=DB_POOL_TIMEOUT):
+        """Sağlıklı bir bağlantı döner; havuz doluysa iade bekler"""
+        deadline = time.time() + timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Veritabanı havuzu kapatıldı")
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                elif self._total < self.max_size:
+                    self._total += 1
+                    conn, idle_since = None, None
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Veritabanı havuzundan bağlantı alınamadı ({self.max_size} bağlantı kirada)")
+                    self._cond.wait(remaining)
+                    continue
+
+            if conn is None:
+                conn = self._open()
+            elif not self._is_healthy(conn, idle_since):
+                logger.warning("⚠️ Kopmuş veritabanı bağlantısı havuzdan çıkarıldı")
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._leases[owner] = self._leases.get(owner, 0) + 1
+            return PooledConnection(conn, self, owner)
+
+    def release(self, pooled):
+        """Bağlantıyı sıfırlayıp havuza iade eder; sıfırlanamazsa atar"""
+        with self._cond:
+            count = self._leases.get(pooled.owner, 0) - 1
+            if count > 0:
+                self._leases[pooled.owner] = count
+            else:
+                self._leases.pop(pooled.owner, None)
+
+        conn = pooled.raw
+        if not self._reset(conn):
+            self._discard(conn)
+            if not self._closed:
+                self.warm()
+            return
+
+        with self._cond:
+            if not self._closed:
+                self._idle.append((conn, time.time()))
+                self._cond.notify()
+                return
+            self._total -= 1
+        self._close(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min": self.min_size,
+                "max": self.max_size,
+                "idle": len(self._idle),
+                "leased": sum(self._leases.values()),
+                "leases": {str(owner): count for owner, count in self._leases.items()},
+                "opened": self.opened,
+                "discarded": self.discarded,
+            }
+
+    # === Yardımcılar ===
+    def _open(self):
+        try:
+            conn = _connect()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        self.opened += 1
+        return conn
+
+    def _open_idle(self):
+        try:
+            conn = self._open()
+        except Exception as e:
+            logger.warning(f"⚠️ Havuz bağlantısı açılamadı: {e}")
+            return
+        with self._cond:
+            if not self._closed:
+                self._idle.append((conn, time.time()))
+                self._cond.notify()
+                return
+            self._total -= 1
+        self._close(conn)
+
+    def _is_healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.time() - idle_since < self.check_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, conn):
+        """Kiralayanın bıraktığı işlemi geri alır, bağlantıyı autocommit'e döndürür"""
+        if conn.closed:
+            return False
+        try:
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            conn.autocommit = True
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self._total -= 1
+            self.discarded += 1
+            self._cond.notify()
+        self._close(conn)
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+# === Süreç geneli havuz ===
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_db_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DBPool()
+        return _pool
+
+
+def get_db_connection(owner=None):
+    """
+    PostgreSQL bağlantısı (autocommit açık). Havuz açıksa paylaşılan havuzdan kiralanır;
+    close() bağlantıyı havuza iade eder. owner kiralayan botun adıdır (/health'te görünür).
+    """
+    if not DB_POOL_ENABLED:
+        return _connect()
+    return get_db_pool().acquire(owner)
+
+
+def warm_db_pool():
+    if DB_POOL_ENABLED:
+        get_db_pool().warm()
+
+
+def db_pool_stats():
+    with _pool_lock:
+        pool = _pool
+    return pool.stats() if pool else None
+
+
+@atexit.register
+def shutdown_db_pool():
+    with _pool_lock:
+        pool = _pool
+    if pool:
+        pool.shutdown()
+
+
+@contextmanager
+def page_transaction(conn):
+    """
+    Bağlantı autocommit açık kurulur; blok süresince kapatılıp sonunda tek commit
+    yapılır, hata olursa bloğun tüm yazımları geri alınır.
+    """
+    autocommit = conn.autocommit
+    conn.autocommit = False
+    try:
+        yield
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = autocommit
+
+
+class Pipeline:
+    """
+    Sıradaki ifadeleri yanıt beklemeden tek sorguda gönderir (psycopg2'de pipeline
+    modunun karşılığı): execute() ifadeyi istemcide parametreleriyle birleştirip biriktirir,
+    sync() hepsini tek turda yollar. Biri hata verirse hiçbiri yazılmaz ve ifadeler tek tek
+    yeniden çalıştırılır; on_error verilen ifadenin hatası eski davranıştaki gibi sadece o
+    ifadeyi atlatır (savepoint ile), on_error'suz ifadenin hatası hepsini geri aldırır.
+    sync() tek işlemdir: bağlantı autocommit ise page_transaction açılır, zaten bir işlemin
+    içindeyse commit çağırana kalır. Böylece yeniden çalıştırmada önceki ifadeler (ör. DELETE)
+    sonraki bir hata olduğunda yazılmış olarak kalmaz.
+    """
+
+    def __init__(self, cur, enabled=None):
+        self.cur = cur
+        self.enabled = DB_PIPELINE if enabled is None else enabled
+        self.statements = []
+
+    def execute(self, sql, params=None, on_error=None):
+        self.statements.append((sql, params, on_error))
+
+    def sync(self):
+        """Biriken ifadeleri tek işlemde gönderir, on_error ile atlanan ifade sayısını döner"""
+        statements, self.statements = self.statements, []
+        if not statements:
+            return 0
+        conn = self.cur.connection
+        if conn.autocommit:
+            with page_transaction(conn):
+                return self._send(statements)
+        return self._send(statements)
+
+    def _send(self, statements):
+        if self.enabled and len(statements) > 1:
+            self.cur.execute("SAVEPOINT pipeline")
+            try:
+                self.cur.execute(b";\n".join(
+                    self.cur.mogrify(sql, params).rstrip().rstrip(b";") for sql, params, _ in statements
+                ))
+                self.cur.execute("RELEASE SAVEPOINT pipeline")
+                return 0
+            except Exception as e:
+                self.cur.execute("ROLLBACK TO SAVEPOINT pipeline")
+                logger.debug(f"Pipeline başarısız, ifadeler tek tek çalıştırılıyor: {e}")
+        return sum(not self._run(sql, params, on_error) for sql, params, on_error in statements)
+
+    def _run(self, sql, params, on_error):
+        if on_error is None:
+            self.cur.execute(sql, params)
+            return True
+        # Hatalı ifade işlemi bozmasın: sadece kendisi geri alınır
+        self.cur.execute("SAVEPOINT pipeline_statement")
+        try:
+            self.cur.execute(sql, params)
+        except Exception as e:
+            self.cur.execute("ROLLBACK TO SAVEPOINT pipeline_statement")
+            on_error(e)
+            return False
+        self.cur.execute("RELEASE SAVEPOINT pipeline_statement")
+        return True
+
+
+@contextmanager
+def pipeline(cur, enabled=None):
+    """with pipeline(cur) as pipe: pipe.execute(...) — blok sonunda tek turda gönderilir"""
+    pipe = Pipeline(cur, enabled)
+    yield pipe
+    pipe.sync()
+
+
 def test_connection():
     """Database bağlantısını test eder"""
     try:
-        conn = get_db_connection()
+        conn = get_db_connection("test")
         with conn.cursor() as cur:
             cur.execute("SELECT version();")
             version = cur.fetchone()
@@ -54,4 +401,4 @@ def test_connection():
 
 if __name__ == "__main__":
     # Test çalıştır
-    test_connection()
\ No newline at end of file
+    test_connection()
@@ -0,0 +1,107 @@
+# bots/depth_policy.py
+
+import os
+import math
+import logging
+
+logger = logging.getLogger("depth_policy")
+
+# Fiyata göre artan sıralı arama yapan platformlar (tavan kuralı sadece bunlarda geçerli)
+PRICE_SORTED_PLATFORMS = {"trendyol", "n11", "hepsiburada"}
+
+# Bir arama sayfasındaki yaklaşık ürün sayısı (öğrenilen derinlik hesabı için)
+PAGE_SIZES = {
+    "trendyol": int(os.getenv("TRENDYOL_PAGE_SIZE", "24")),
+    "n11": int(os.getenv("N11_PAGE_SIZE", "28")),
+    "hepsiburada": int(os.getenv("HEPSIBURADA_PAGE_SIZE", "36")),
+    "avansas": int(os.getenv("AVANSAS_PAGE_SIZE", "24")),
+}
+
+STOP_ON_NO_NEW = os.getenv("DEPTH_STOP_ON_NO_NEW", "1") == "1"
+# Sayfadaki en ucuz ürün, terimin takip edilen final ürün fiyatının bu katını aşarsa dur (0 = kapalı)
+PRICE_CEILING_RATIO = float(os.getenv("DEPTH_PRICE_CEILING_RATIO", "1.5"))
+LEARN_DEPTH = os.getenv("DEPTH_LEARN", "1") == "1"
+# Öğrenilen derinliğin üzerine keşif için eklenen sayfa
+EXPLORE_PAGES = int(os.getenv("DEPTH_EXPLORE_PAGES", "1"))
+
+
+def _escape_like(term):
+    """LIKE joker karakterleri (%, _) ve kaçış karakteri terimde düz metin olarak eşleşsin"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _first_value(row):
+    if not row:
+        return None
+    return row[0] if isinstance(row, (tuple, list)) else next(iter(row.values()), None)
+
+
+class DepthPolicy:
+    """
+    Terim başına sayfalama derinliği:
+    - search_terms.count geçmişinden öğrenilen derinliğin ötesine gitme
+    - yeni ürün getirmeyen (sadece bilinen/tekrar eden ürünler) sayfadan sonra dur
+    - fiyat sıralı platformlarda sayfa, takip edilen fiyatın tavanını aştıysa dur
+    """
+
+    def __init__(self, platform, max_pages, options=None):
+        options = options or {}
+        self.platform = platform
+        self.max_pages = max_pages
+        self.stop_on_no_new = options.get("stop_on_no_new", STOP_ON_NO_NEW)
+        self.price_ceiling_ratio = float(options.get("price_ceiling_ratio", PRICE_CEILING_RATIO))
+        self.learn_depth = options.get("learn_depth", LEARN_DEPTH)
+
+    def prepare(self, cur, state):
+        """Terimin maksimum derinliğini ve fiyat tavanını state'e yazar"""
+        state["max_depth"] = self.learned_depth(cur, state["term"]) if self.learn_depth else self.max_pages
+        state["price_ceiling"] = self.price_ceiling(cur, state["term"])
+
+        if state["max_depth"] < self.max_pages:
+            logger.info(f"📏 '{state['term']}' için öğrenilen derinlik: {state['max_depth']} sayfa")
+
+    def learned_depth(self, cur, term):
+        """Terimin bugüne kadar bulduğu ürün sayısı kaç sayfaya sığıyorsa + keşif payı"""
+        try:
+            cur.execute("""
+                SELECT count FROM search_terms
+                WHERE term = %s AND platform = %s
+            """, (term, self.platform))
+            count = _first_value(cur.fetchone())
+        except Exception as e:
+            logger.warning(f"⚠️ Terim geçmişi okunamadı: {e}")
+            return self.max_pages
+
+        # Hiç çalışmamış terim: tam derinlik
+        if count is None:
+            return self.max_pages
+        pages = math.ceil(count / PAGE_SIZES.get(self.platform, 24)) + EXPLORE_PAGES
+        return max(1, min(self.max_pages, pages))
+
+    def price_ceiling(self, cur, term):
+        """Terimle eşleşen final ürünlerin en yüksek satış fiyatı × oran"""
+        if self.platform not in PRICE_SORTED_PLATFORMS or self.price_ceiling_ratio <= 0:
+            return None
+        try:
+            cur.execute("""
+                SELECT MAX(COALESCE(NULLIF(campaign_price, 0), price))
+                FROM final_products
+                WHERE name ILIKE %s ESCAPE '\\'
+            """, (f"%{_escape_like(term)}%",))
+            reference = _first_value(cur.fetchone())
+        except Exception as e:
+            logger.warning(f"⚠️ Referans fiyat okunamadı: {e}")
+            return None
+
+        if not reference:
+            return None
+        return float(reference) * self.price_ceiling_ratio
+
+    def stop_reason(self, state):
+        """İşlenen sayfadan sonra durulacaksa nedenini, devam edilecekse None döner"""
+        if self.stop_on_no_new and state["page_saved"] and state["page_new"] == 0:
+            return "yeni ürün yok"
+        ceiling = state.get("price_ceiling")
+        if ceiling and state["page_min_price"] is not None and state["page_min_price"] > ceiling:
+            return f"fiyat tavanı aşıldı ({state['page_min_price']:.2f} > {ceiling:.2f} TL)"
+        return None
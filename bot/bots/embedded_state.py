@@ -0,0 +1,91 @@
+# bots/embedded_state.py
+"""
+Sayfaya gömülü durum (hydration / initial-state) JSON'unu bulur ve çözer.
+DOM kurulmadan ham HTML metninde aranır; alanlar extraction_specs'teki "json"
+kurallarıyla eşlenir, blob yoksa DOM seçicilerine düşülür.
+"""
+
+import os
+import re
+import json
+import logging
+
+logger = logging.getLogger("embedded_state")
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Platform + sayfa tipi başına blobun yeri:
+#   script_id: <script id="..."> içeriği düz JSON
+#   marker:    içeriğinde bu ifade geçen <script>; JSON, assign anahtarının değeri
+#              (Object.assign(..., {'uuid': {'STATE': {...}}}) kalıbı, son değer)
+STATE_LOCATORS = {
+    ("hepsiburada", "listing"): {"marker": "MORIA.PRODUCTLIST", "assign": "STATE"},
+    ("hepsiburada", "detail"): {"script_id": "reduxStore"},
+}
+
+
+def loads(text):
+    """orjson kuruluysa onunla (json modülünden ~1.5 kat hızlı), değilse json ile"""
+    if HAS_ORJSON:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def get_state_locator(platform, page_type, override=None):
+    """
+    Gömülü durum tanımı ya da None (sadece DOM).
+    Öncelik: bot options → EMBEDDED_STATE ortam değişkeni ("0" kapatır) → açık
+    """
+    enabled = override if override is not None else os.getenv("EMBEDDED_STATE", "1") not in ("0", "false", "no")
+    return STATE_LOCATORS.get((platform, page_type)) if enabled else None
+
+
+def _script_body(html, position):
+    """position'ı içeren <script> elemanının içeriği"""
+    start = html.rfind("<script", 0, position)
+    if start < 0:
+        return None
+    body_start = html.find(">", start) + 1
+    body_end = html.find("</script>", position)
+    if body_start <= 0 or body_end < 0:
+        return None
+    return html[body_start:body_end]
+
+
+_ASSIGN_PATTERNS = {}
+
+
+def _assigned_value(body, key):
+    """Son anahtarın değeri: 'KEY': {...} sonrasında sadece '} })' (uuid ve assign nesneleri) gelir"""
+    pattern = _ASSIGN_PATTERNS.get(key)
+    if pattern is None:
+        pattern = re.compile(r"""['"]%s['"]\s*:\s*(\{.*\})\s*\}\s*\}\s*\)\s*;?\s*$""" % re.escape(key), re.S)
+        _ASSIGN_PATTERNS[key] = pattern
+    match = pattern.search(body)
+    return match.group(1) if match else None
+
+
+def find_state(html, locator):
+    """Blobu bulup çözer; yoksa ya da çözülemezse None (çağıran DOM'a düşer)"""
+    if not html or not locator:
+        return None
+
+    if locator.get("script_id"):
+        position = html.find(f'id="{locator["script_id"]}"')
+        text = _script_body(html, position) if position >= 0 else None
+    else:
+        position = html.find(locator["marker"])
+        body = _script_body(html, position) if position >= 0 else None
+        text = _assigned_value(body, locator["assign"]) if body else None
+
+    if not text:
+        return None
+    try:
+        return loads(text)
+    except ValueError as e:
+        logger.warning(f"⚠️ Gömülü durum JSON'u çözülemedi: {e}")
+        return None
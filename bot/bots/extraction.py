@@ -0,0 +1,767 @@
+# bots/extraction.py
+"""
+Bildirimsel (declarative) alan çıkarımı.
+
+Bir spec, alan adı → kural sözlüğüdür; başlangıçta bir kez derlenir:
+
+    "title": {"css": ["h1.title", "h1"], "default": "Başlıksız"}
+    "link":  {"css": "a[href]", "attr": "href", "transform": "absolute_url", "required": True}
+    "price": {"css": "span.price", "normalize": "price", "fallback_field": "old_price"}
+    "store": {"json": "product.merchantName", "css": "div.merchant a"}
+
+Kurallar:
+    json            gömülü durum JSON'unda yol ya da yedek yollar ("a.b.0.c", "-2" sondan,
+                    "*" listeyi düzleştirir); bulunursa DOM'a hiç bakılmaz (bkz. embedded_state)
+    css             seçici ya da öncelik sırasına göre yedek seçiciler (yoksa kökün kendisi)
+    text_contains   css yerine: ilk metin düğümü bu ifadelerden birini içeren ilk eleman
+                    (script/style hariç, XPath contains(text(), ...) ile aynı)
+    closest         bulunan elemanın bu etiketteki en yakın atası (ör. "div")
+    take            text (varsayılan) | html | string | exists | count
+    attr            niteliği al (liste ise ilk dolu olan)
+    separator/strip get_text parametreleri (varsayılan "" / True)
+    pick            first (varsayılan) | all | <indeks> (ör. -2: sondan ikinci eşleşme)
+    join            pick=all sonuçlarını bu ayraçla birleştir
+    inner           seçilen elemanın içinde ikinci bir select_one
+    items           pick=all elemanlarının her biri için alt spec (liste döner)
+    transform       isim ya da isim listesi (bkz. register_transform); "ad:arg" argüman alır
+    json_transform  json'dan gelen değere uygulanan dönüşümler (transform DOM metni içindir)
+    normalize       kayıtlar çıktıktan (post'tan) sonra alanın tüm satırlarına birlikte uygulanan
+                    toplu dönüşüm (bkz. register_normalizer); extract_many sayfanın tüm kartlarını
+                    tek seferde normalize eder
+    default / fallback_field / value / found / required / private
+
+bs4 ağaçlarında tüm seçiciler ve metin kuralları tek bir ağaç yürüyüşünde
+eşleştirilir (seçiciler en sağdaki tag/sınıf/id'ye göre indekslenir, gerekenler
+bulununca yürüyüş biter). selectolax (lexbor) ağaçlarında seçiciler zaten C
+tarafında çalıştığı için her seçici yerel olarak sorgulanır. JSON'dan çözülen
+alanların seçicileri yürüyüşe hiç katılmaz.
+"""
+
+import re
+import logging
+from urllib.parse import urlsplit, unquote
+
+from bs4.element import PreformattedString
+
+from parsers import LexborNode
+from prices import parse_kurus, normalize_prices, kurus_to_price
+
+logger = logging.getLogger("extraction")
+
+
+class SpecError(ValueError):
+    """Spec ya da seçici derlenemedi"""
+
+
+# === Dönüşümler ===
+TRANSFORMS = {}
+
+
+def register_transform(name):
+    """Spec'lerde isimle kullanılacak dönüşüm: fn(value, arg, spec) -> value"""
+    def decorator(fn):
+        TRANSFORMS[name] = fn
+        return fn
+    return decorator
+
+
+# === Toplu normalizasyonlar ===
+NORMALIZERS = {}
+
+
+def register_normalizer(name):
+    """
+    Bir alanın sayfadaki tüm değerlerini birlikte işleyen aşama:
+    fn(values) -> (values, invalid); invalid, okunamayan satırların maskesi
+    """
+    def decorator(fn):
+        NORMALIZERS[name] = fn
+        return fn
+    return decorator
+
+
+@register_normalizer("price")
+def _normalize_price(values):
+    """Türkçe fiyat metinleri → TL (kuruştan, bkz. prices); okunamayan satırlar 0.0"""
+    kurus, invalid = normalize_prices(values)
+    return [0.0 if bad else kurus_to_price(value) for value, bad in zip(kurus, invalid)], invalid
+
+
+@register_transform("strip")
+def _strip(value, arg, spec):
+    return value.strip()
+
+
+@register_transform("string")
+def _string(value, arg, spec):
+    """JSON'daki sayı kimlikleri DOM niteliğiyle aynı tipe (str) çevrilir"""
+    return str(value)
+
+
+@register_transform("lower")
+def _lower(value, arg, spec):
+    return value.lower()
+
+
+@register_transform("price")
+def _price(value, arg, spec):
+    """'1.299,90 TL' → 1299.9; okunamazsa 0.0 (tek değer; sayfa için "normalize": "price" kullanın)"""
+    kurus = parse_kurus(value)
+    if kurus is None:
+        logger.warning(f"⚠️ Fiyat parse edilemedi: {value}")
+        return 0.0
+    return kurus_to_price(kurus)
+
+
+@register_transform("float")
+def _float(value, arg, spec):
+    """'4,5' → 4.5; okunamazsa None (alanın default'u kullanılır)"""
+    try:
+        return float(str(value).replace(",", ".").strip())
+    except ValueError:
+        return None
+
+
+@register_transform("first_number")
+def _first_number(value, arg, spec):
+    match = re.search(r"\d+\.?\d*", str(value).replace(",", "."))
+    return float(match.group()) if match else None
+
+
+@register_transform("absolute_url")
+def _absolute_url(value, arg, spec):
+    return value if value.startswith("http") else spec.base_url + value
+
+
+@register_transform("remove")
+def _remove(value, arg, spec):
+    return value.replace(arg, "").strip()
+
+
+@register_transform("last_segment")
+def _last_segment(value, arg, spec):
+    """'urun-adi-p-HBC0001' → 'HBC0001' (ayraç varsayılan '-')"""
+    return value.split(arg or "-")[-1]
+
+
+@register_transform("contains")
+def _contains(value, arg, spec):
+    return arg in value.lower()
+
+
+@register_transform("redirect_target")
+def _redirect_target(value, arg, spec):
+    """Reklam / takip linkinde asıl adres (redirect parametresi; ad arg ile değiştirilebilir)"""
+    # parse_qs '+' işaretlerini boşluğa çevirir; hedefin kendi sorgusu bozulmasın diye ham değer açılır
+    for part in urlsplit(value).query.split("&"):
+        name, _, raw = part.partition("=")
+        if name == (arg or "redirect") and raw:
+            return unquote(raw)
+    return value
+
+
+@register_transform("url_path")
+def _url_path(value, arg, spec):
+    """'https://x.com/a-p-1?magaza=y' → '/a-p-1'"""
+    return urlsplit(value).path
+
+
+# === Seçici derleyici (bs4 tek geçiş için CSS alt kümesi) ===
+_COMPOUND_RE = re.compile(r"""
+    (?P<tag>\*|[a-zA-Z][\w-]*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w:-]+)\s*(?:(?P<op>[*^$~|]?=)\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[^\]\s]+)))?\s*\]
+  | :not\((?P<not>[^()]*)\)
+  | :nth-of-type\(\s*(?P<nth>\d+)\s*\)
+""", re.VERBOSE)
+
+
+def split_selector_group(selector):
+    """'a, b[x=","]' → ['a', 'b[x=","]'] (parantez/köşeli parantez/tırnak içindeki virgüller bölünmez)"""
+    parts, depth, quote, current = [], 0, None, []
+    for char in selector:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "\"'":
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+class _Compound:
+    __slots__ = ("tag", "id", "classes", "attrs", "nots", "nth")
+
+    def __init__(self, text):
+        self.tag, self.id, self.classes, self.attrs, self.nots, self.nth = None, None, [], [], [], None
+        position = 0
+        while position < len(text):
+            match = _COMPOUND_RE.match(text, position)
+            if not match or match.end() == position:
+                raise SpecError(f"Desteklenmeyen seçici: {text!r}")
+            position = match.end()
+            if match["tag"]:
+                self.tag = None if match["tag"] == "*" else match["tag"].lower()
+            elif match["id"]:
+                self.id = match["id"]
+            elif match["cls"]:
+                self.classes.append(match["cls"])
+            elif match["attr"]:
+                value = next((v for v in (match["dq"], match["sq"], match["bare"]) if v is not None), None)
+                self.attrs.append((match["attr"].lower(), match["op"], value))
+            elif match["not"] is not None:
+                self.nots.append(_Compound(match["not"].strip()))
+            else:
+                self.nth = int(match["nth"])
+
+    def key(self):
+        """İndeks anahtarı: en seçici özellik"""
+        if self.id:
+            return ("#", self.id)
+        if self.classes:
+            return (".", self.classes[0])
+        return ("tag", self.tag) if self.tag else ("*", None)
+
+    def matches(self, el):
+        if self.tag and el.name != self.tag:
+            return False
+        attrs = el.attrs
+        if self.id and attrs.get("id") != self.id:
+            return False
+        if self.classes:
+            classes = attrs.get("class") or ()
+            if isinstance(classes, str):
+                classes = classes.split()
+            if any(cls not in classes for cls in self.classes):
+                return False
+        for name, op, expected in self.attrs:
+            value = attrs.get(name)
+            if value is None:
+                return False
+            if op is None:
+                continue
+            if isinstance(value, list):
+                value = " ".join(value)
+            if not _match_attr(value, op, expected):
+                return False
+        if self.nth is not None and _nth_of_type(el) != self.nth:
+            return False
+        return not any(other.matches(el) for other in self.nots)
+
+
+def _match_attr(value, op, expected):
+    if op == "=":
+        return value == expected
+    if op == "*=":
+        return bool(expected) and expected in value
+    if op == "^=":
+        return bool(expected) and value.startswith(expected)
+    if op == "$=":
+        return bool(expected) and value.endswith(expected)
+    if op == "~=":
+        return expected in value.split()
+    return value == expected or value.startswith(expected + "-")  # |=
+
+
+def _nth_of_type(el):
+    return 1 + sum(1 for sibling in el.previous_siblings if sibling.name == el.name)
+
+
+def _is_element(node):
+    return node is not None and node.name is not None and node.name != "[document]"
+
+
+class CompiledSelector:
+    """Tek bir kompleks seçici (virgülsüz); sağdan sola eşleştirilir"""
+
+    __slots__ = ("text", "compounds", "combinators")
+
+    def __init__(self, text):
+        self.text = text
+        tokens = re.split(r"\s*(>)\s*|\s+", text.strip())
+        self.compounds, self.combinators = [], []
+        pending = " "
+        for token in tokens:
+            if token is None or token == "":
+                continue
+            if token == ">":
+                pending = ">"
+                continue
+            if self.compounds:
+                self.combinators.append(pending)
+            self.compounds.append(_Compound(token))
+            pending = " "
+        if not self.compounds or pending == ">":
+            raise SpecError(f"Geçersiz seçici: {text!r}")
+
+    def key(self):
+        return self.compounds[-1].key()
+
+    def matches(self, el):
+        return self._match(el, len(self.compounds) - 1)
+
+    def _match(self, el, index):
+        if not self.compounds[index].matches(el):
+            return False
+        if index == 0:
+            return True
+        parent = el.parent
+        if self.combinators[index - 1] == ">":
+            return _is_element(parent) and self._match(parent, index - 1)
+        while _is_element(parent):
+            if self._match(parent, index - 1):
+                return True
+            parent = parent.parent
+        return False
+
+
+# === Spec derleme ===
+_NON_TEXT_PARENTS = ("script", "style")
+
+_FIELD_KEYS = {
+    "json", "css", "text_contains", "closest", "take", "attr", "separator", "strip", "pick", "join", "inner", "items",
+    "transform", "json_transform", "normalize", "default", "fallback_field", "value", "found", "required", "private",
+}
+
+
+class CompiledField:
+    def __init__(self, name, rule, spec):
+        unknown = set(rule) - _FIELD_KEYS
+        if unknown:
+            raise SpecError(f"'{name}' alanında bilinmeyen kural: {sorted(unknown)}")
+        self.name = name
+        paths = rule.get("json")
+        self.json_paths = [compile_path(path) for path in ([paths] if isinstance(paths, str) else paths or [])]
+        css = rule.get("css")
+        self.selectors = [css] if isinstance(css, str) else list(css or [])
+        words = rule.get("text_contains")
+        self.text_contains = ([words] if isinstance(words, str) else tuple(words)) if words else None
+        self.closest = rule.get("closest")
+        self.take = rule.get("take", "text")
+        attr = rule.get("attr")
+        self.attrs = [attr] if isinstance(attr, str) else list(attr or [])
+        self.separator = rule.get("separator", "")
+        self.strip = rule.get("strip", True)
+        self.pick = rule.get("pick", "first")
+        self.join = rule.get("join")
+        self.inner = rule.get("inner")
+        self.items = compile_spec(rule["items"], name=f"{spec.name}.{name}", base_url=spec.base_url) if rule.get("items") else None
+        self.transforms = _compile_transforms(name, rule.get("transform"))
+        self.json_transforms = _compile_transforms(name, rule.get("json_transform"))
+        self.normalize = rule.get("normalize")
+        if self.normalize and self.normalize not in NORMALIZERS:
+            raise SpecError(f"'{name}' alanında bilinmeyen normalizasyon: {self.normalize}")
+        self.default = rule.get("default")
+        self.fallback_field = rule.get("fallback_field")
+        self.has_value = "value" in rule
+        self.value = rule.get("value")
+        self.found = rule.get("found", True)
+        self.required = rule.get("required", False)
+        self.private = rule.get("private", False)
+        # Tüm eşleşmeler mi, sadece ilki mi gerekiyor (tek geçişte erken bitiş için)
+        self.needs_all = self.pick != "first" or self.take == "count"
+
+
+class CompiledSpec:
+    """
+    Derlenmiş spec: extract(root, state=None) → alan sözlüğü (zorunlu alan yoksa None).
+    root bir DOM düğümü ya da JSON nesnesi (gömülü durumdan gelen kart) olabilir.
+    """
+
+    def __init__(self, fields, name="spec", base_url="", post=None):
+        self.name = name
+        self.base_url = base_url
+        self.post = post
+        self.fields = [CompiledField(field_name, rule, self) for field_name, rule in fields.items()]
+        self.normalized = [(field.name, field.normalize) for field in self.fields if field.normalize]
+
+        # Seçici birimleri (virgüllü grup = tek birim, yedekler ayrı birimler)
+        self.units, self.unit_needs_all = [], []
+        unit_ids = {}
+        for field in self.fields:
+            for selector in field.selectors:
+                if selector not in unit_ids:
+                    unit_ids[selector] = len(self.units)
+                    self.units.append(selector)
+                    self.unit_needs_all.append(False)
+                if field.needs_all:
+                    self.unit_needs_all[unit_ids[selector]] = True
+        self.unit_ids = unit_ids
+        # Metin kuralları seçici birimlerinden sonra gelir (her zaman sadece ilk eşleşme)
+        self.text_units = []
+        for field in self.fields:
+            if field.text_contains and field.text_contains not in self.text_units:
+                self.text_units.append(field.text_contains)
+        # Alanın eşleşme listelerindeki yeri (JSON'dan çözülen alanlarınki atlanır)
+        for field in self.fields:
+            if field.text_contains:
+                field.unit_ids = [len(self.units) + self.text_units.index(field.text_contains)]
+            else:
+                field.unit_ids = [unit_ids[selector] for selector in field.selectors]
+        self.has_json = any(field.json_paths or (field.items and field.items.has_json) for field in self.fields)
+
+        # bs4 tek geçiş indeksi; alt kümeye sığmayan seçici varsa yerel select'e düşülür
+        self.index = {}
+        self.single_pass = True
+        try:
+            for unit_id, unit in enumerate(self.units):
+                for part in split_selector_group(unit):
+                    compiled = CompiledSelector(part)
+                    self.index.setdefault(compiled.key(), []).append((unit_id, compiled))
+        except SpecError as e:
+            logger.debug(f"'{name}' tek geçişe uygun değil, yerel select kullanılacak: {e}")
+            self.single_pass = False
+
+    # === Eşleştirme ===
+    def _collect_native(self, root, skip):
+        matches = []
+        for unit_id, unit in enumerate(self.units):
+            if unit_id in skip:
+                matches.append([])
+            elif self.unit_needs_all[unit_id]:
+                matches.append(root.select(unit))
+            else:
+                node = root.select_one(unit)
+                matches.append([node] if node is not None else [])
+        if self.text_units:
+            matches.extend(self._collect_text(root, skip))
+        return matches
+
+    def _collect_text(self, root, skip):
+        """Metin kuralları için ayrı yürüyüş (lexbor'da metin düğümleri Python'da gezilir)"""
+        found = [[] for _ in self.text_units]
+        # Atlanan kurallar bulunmuş sayılır
+        done = [len(self.units) + text_id in skip for text_id in range(len(self.text_units))]
+        remaining = done.count(False)
+        if remaining == 0:
+            return found
+        if isinstance(root, LexborNode):
+            for node in root.node.traverse(include_text=True):
+                if node.tag != "-text":
+                    continue
+                text = node.text_content
+                for text_id, words in enumerate(self.text_units):
+                    if done[text_id] or not any(word in text for word in words):
+                        continue
+                    parent = node.parent
+                    if parent.tag in _NON_TEXT_PARENTS or not _is_first_text_lexbor(parent, node):
+                        continue
+                    found[text_id].append(LexborNode(parent))
+                    done[text_id] = True
+                    remaining -= 1
+                if remaining == 0:
+                    break
+            return found
+
+        for el in root.descendants:
+            if el.name is None and self._match_text(el, found, done):
+                remaining -= 1
+                if remaining == 0:
+                    break
+        return found
+
+    def _match_text(self, string, found, done):
+        """bs4 metin düğümü bir metin kuralını karşıladıysa eşleşmeyi kaydeder"""
+        if isinstance(string, PreformattedString):
+            return False
+        matched = False
+        for text_id, words in enumerate(self.text_units):
+            if done[text_id] or not any(word in string for word in words):
+                continue
+            parent = string.parent
+            if parent.name in _NON_TEXT_PARENTS or not _is_first_text_bs4(parent, string):
+                continue
+            found[text_id].append(parent)
+            done[text_id] = True
+            matched = True
+        return matched
+
+    def _collect_single_pass(self, root, skip):
+        """Kökün alt ağacını bir kez yürür; her eleman sadece indeksteki aday seçicilerle denenir"""
+        matches = [[] for _ in self.units]
+        text_found = [[] for _ in self.text_units]
+        text_done = [len(self.units) + text_id in skip for text_id in range(len(self.text_units))]
+        active = [unit_id not in skip for unit_id in range(len(self.units))]
+        remaining = (sum(1 for unit_id, needs_all in enumerate(self.unit_needs_all) if active[unit_id] and not needs_all)
+                     + text_done.count(False))
+        wants_all = any(needs_all and active[unit_id] for unit_id, needs_all in enumerate(self.unit_needs_all))
+        if remaining == 0 and not wants_all:
+            return matches + text_found
+        check_text = not all(text_done)
+        index = self.index
+        by_tag, by_any = {}, index.get(("*", None), [])
+        for key, entries in index.items():
+            if key[0] == "tag":
+                by_tag[key[1]] = entries
+
+        for el in root.descendants:
+            name = el.name
+            if name is None:
+                if check_text and self._match_text(el, text_found, text_done):
+                    remaining -= 1
+                    if remaining == 0 and not wants_all:
+                        break
+                continue
+            attrs = el.attrs
+            candidates = by_tag.get(name, ())
+            element_id = attrs.get("id")
+            classes = attrs.get("class")
+            if element_id or classes or by_any:
+                candidates = list(candidates) + by_any
+                if element_id:
+                    candidates += index.get(("#", element_id), [])
+                if classes:
+                    for cls in (classes.split() if isinstance(classes, str) else classes):
+                        candidates += index.get((".", cls), [])
+
+            for unit_id, compiled in candidates:
+                found = matches[unit_id]
+                if not active[unit_id] or (found and (not self.unit_needs_all[unit_id] or found[-1] is el)):
+                    continue
+                if compiled.matches(el):
+                    found.append(el)
+                    if not self.unit_needs_all[unit_id]:
+                        remaining -= 1
+
+            if remaining == 0 and not wants_all:
+                break
+        return matches + text_found
+
+    # === Çıkarım ===
+    def extract(self, root, state=None):
+        """root: DOM düğümü ya da JSON nesnesi; state: sayfanın gömülü durumu (json kuralları için)"""
+        return self.extract_many([root], state)[0]
+
+    def extract_many(self, roots, state=None):
+        """
+        Sayfanın tüm kökleri (kartları) → kayıt listesi (zorunlu alanı eksik olan None).
+        normalize alanları tüm satırlar için tek seferde işlenir; okunamayan değerler
+        satır satır istisna/log yerine sayfa başına tek uyarıyla raporlanır.
+        """
+        records = [self._extract_raw(root, state) for root in roots]
+        rows = [record for record in records if record is not None]
+        for field_name, normalizer in self.normalized:
+            raw = [record.get(field_name) for record in rows]
+            values, invalid = NORMALIZERS[normalizer](raw)
+            for record, value in zip(rows, values):
+                record[field_name] = value
+            bad = [value for value, is_bad in zip(raw, invalid) if is_bad]
+            if bad:
+                logger.warning(f"⚠️ {self.name}: {len(bad)}/{len(rows)} '{field_name}' değeri okunamadı "
+                               f"(ör. {bad[0]!r}), 0 yazıldı")
+        return records
+
+    def _extract_raw(self, root, state=None):
+        if root is None:
+            return None
+        if isinstance(root, (dict, list)):
+            state, root = root, None
+
+        # Önce JSON; çözülen alanların seçicileri DOM yürüyüşüne katılmaz
+        resolved = {}
+        if state is not None and self.has_json:
+            for field in self.fields:
+                value = self._json_value(field, state)
+                if not _is_missing(value):
+                    resolved[field.name] = value
+
+        matches = []
+        if root is not None and (self.units or self.text_units):
+            needed = set()
+            for field in self.fields:
+                if field.name not in resolved and not field.has_value:
+                    needed.update(field.unit_ids)
+            skip = set(range(len(self.units) + len(self.text_units))) - needed
+            native = isinstance(root, LexborNode) or not self.single_pass
+            matches = self._collect_native(root, skip) if native else self._collect_single_pass(root, skip)
+
+        record = {}
+        for field in self.fields:
+            if field.name in resolved:
+                value = resolved[field.name]
+            elif root is not None or field.has_value:
+                value = self._field_value(field, root, matches)
+            else:
+                value = None
+            if _is_missing(value) and field.fallback_field:
+                value = record.get(field.fallback_field)
+            if _is_missing(value):
+                if field.required:
+                    logger.debug(f"⚠️ {self.name}: '{field.name}' bulunamadı, atlanıyor")
+                    return None
+                value = field.default
+            record[field.name] = value
+
+        if self.post:
+            self.post(record)
+        for field in self.fields:
+            if field.private:
+                record.pop(field.name, None)
+        return record
+
+    def _json_value(self, field, state):
+        for path in field.json_paths:
+            value = resolve_path(state, path)
+            if _is_missing(value):
+                continue
+            if field.items is not None:
+                items = [field.items.extract(item) for item in (value if isinstance(value, list) else [value])
+                         if isinstance(item, dict)]
+                value = [item for item in items if item is not None]
+            elif isinstance(value, list) and field.join is not None:
+                value = field.join.join(str(item) for item in value if not _is_missing(item))
+            else:
+                value = self._transform(field.json_transforms, value)
+            if not _is_missing(value):
+                return value
+        return None
+
+    def _field_value(self, field, root, matches):
+        if field.has_value:
+            return field.value
+
+        # css yoksa kökün kendisi
+        candidate_lists = [matches[unit_id] for unit_id in field.unit_ids] or [[root]]
+
+        if field.take == "exists":
+            return field.found if any(candidate_lists) else None
+        if field.take == "count":
+            return sum(len(nodes) for nodes in candidate_lists)
+
+        for nodes in candidate_lists:
+            if not nodes:
+                continue
+            if field.pick == "all":
+                if field.items is not None:
+                    items = [field.items.extract(node) for node in nodes]
+                    return [item for item in items if item is not None]
+                values = [value for value in (self._node_value(field, node) for node in nodes) if not _is_missing(value)]
+                if not values:
+                    continue
+                return field.join.join(values) if field.join is not None else values
+
+            if field.pick == "first":
+                node = nodes[0]
+            else:
+                try:
+                    node = nodes[field.pick]
+                except IndexError:
+                    continue
+            value = self._node_value(field, node)
+            if not _is_missing(value):
+                return value
+        return None
+
+    def _node_value(self, field, node):
+        if field.closest:
+            node = _closest(node, field.closest)
+            if node is None:
+                return None
+        if field.inner:
+            node = node.select_one(field.inner)
+            if node is None:
+                return None
+
+        if field.attrs:
+            value = next((node.get(attr) for attr in field.attrs if node.get(attr)), None)
+        elif field.take == "html":
+            value = str(node)
+        elif field.take == "string":
+            value = node.string
+        else:
+            value = node.get_text(field.separator, strip=True) if field.strip else node.get_text()
+
+        if _is_missing(value):
+            return None
+        return self._transform(field.transforms, value)
+
+    def _transform(self, transforms, value):
+        for transform, arg in transforms:
+            if value is None:
+                break
+            value = transform(value, arg, self)
+        return value
+
+
+def _is_first_text_bs4(parent, string):
+    for child in parent.children:
+        if child.name is None and not isinstance(child, PreformattedString):
+            return child is string
+    return False
+
+
+def _is_first_text_lexbor(parent, text_node):
+    for child in parent.iter(include_text=True):
+        if child.tag == "-text":
+            return child.mem_id == text_node.mem_id
+    return False
+
+
+def _closest(node, tag):
+    """En yakın (kendisi hariç) tag atası"""
+    if isinstance(node, LexborNode):
+        parent = node.node.parent
+        while parent is not None and parent.tag != tag:
+            parent = parent.parent
+        return LexborNode(parent) if parent is not None else None
+    return node.find_parent(tag)
+
+
+def _compile_transforms(field_name, transforms):
+    compiled = []
+    for transform in ([transforms] if isinstance(transforms, str) else transforms or []):
+        transform_name, _, arg = transform.partition(":")
+        if transform_name not in TRANSFORMS:
+            raise SpecError(f"'{field_name}' alanında bilinmeyen dönüşüm: {transform_name}")
+        compiled.append((TRANSFORMS[transform_name], arg))
+    return compiled
+
+
+def compile_path(path):
+    """'a.b.-2.*' → ('a', 'b', -2, '*')"""
+    return tuple(int(part) if part.lstrip("-").isdigit() else part for part in path.split(".") if part)
+
+
+def resolve_path(value, path):
+    """JSON yolunu izler; yol yoksa None, '*' adımından sonra sonuç liste"""
+    for position, part in enumerate(path):
+        if part == "*":
+            if not isinstance(value, list):
+                return None
+            rest = path[position + 1:]
+            flattened = []
+            for item in value:
+                item = resolve_path(item, rest) if rest else item
+                if isinstance(item, list) and rest and "*" in rest:
+                    flattened.extend(item)
+                elif item is not None:
+                    flattened.append(item)
+            return flattened
+        if isinstance(part, int):
+            if not isinstance(value, list) or not -len(value) <= part < len(value):
+                return None
+            value = value[part]
+        elif isinstance(value, dict):
+            value = value.get(part)
+        else:
+            return None
+        if value is None:
+            return None
+    return value
+
+
+def _is_missing(value):
+    return value is None or value == "" or value == []
+
+
+def compile_spec(fields, name="spec", base_url="", post=None):
+    return CompiledSpec(fields, name=name, base_url=base_url, post=post)
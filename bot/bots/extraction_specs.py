@@ -0,0 +1,389 @@
+# bots/extraction_specs.py
+"""
+Platform başına çıkarım spec'leri (bkz. extraction). Yeni bir pazaryeri eklemek
+için buraya liste kartı ve detay spec'i eklemek yeterli; modül yüklenirken hepsi
+bir kez derlenir, hatalı seçici / dönüşüm başlangıçta patlar.
+"""
+
+import json
+import logging
+
+from extraction import compile_spec, compile_path, resolve_path, register_transform
+from fetcher import BASE_URLS
+
+logger = logging.getLogger("extraction_specs")
+
+# Detay loglarında alan adları
+FIELD_LABELS = {
+    "description": "📝 Açıklama",
+    "store_name": "🏪 Mağaza",
+    "store_rating": "🏆 Mağaza puanı",
+    "shipping_info": "🚚 Kargo",
+    "rating": "⭐ Ürün puanı",
+    "product_type": "🏷️ Ürün tipi",
+    "image_url": "🖼️ Görsel URL",
+}
+
+# Ürün özellikleri (ad / değer çiftleri)
+NAME_VALUE_ITEMS = {
+    "name": {"css": "div.name", "required": True},
+    "value": {"css": "div.value", "required": True},
+}
+
+
+@register_transform("ld_breadcrumb")
+def _ld_breadcrumb(value, arg, spec):
+    """ld+json içindeki breadcrumb'ın sondan ikinci adı (ürün tipi)"""
+    try:
+        items = json.loads(value).get("breadcrumb", {}).get("itemListElement", [])
+    except Exception as e:
+        logger.warning(f"⚠️ Breadcrumb çözümleme hatası: {e}")
+        return None
+    if isinstance(items, list) and len(items) >= 2:
+        return items[-2].get("name", None)
+    return None
+
+
+@register_transform("n11_stock")
+def _n11_stock(value, arg, spec):
+    text = value.lower()
+    return "Tükendi" if any(word in text for word in ["tükendi", "stokta yok", "mevcut değil"]) else "Mevcut"
+
+
+@register_transform("image_size")
+def _image_size(value, arg, spec):
+    """Gömülü durumdaki görsel şablonu: '.../{size}/x.jpg' → '.../424-600/x.jpg'"""
+    return value.replace("{size}", arg)
+
+
+@register_transform("hb_shipment_day")
+def _hb_shipment_day(value, arg, spec):
+    """Kargoya veriliş günü (0: bugün, saat sınırı geçtiyse yarın) → kart metnine yakın durum"""
+    return "Yarın kargoda" if value <= 1 else f"{value} gün içinde kargoda"
+
+
+@register_transform("ty_rush_delivery")
+def _ty_rush_delivery(value, arg, spec):
+    """Hızlı teslimat süresi varsa karttaki rushDelivery rozetiyle aynı metin"""
+    return "Yarın kargoda" if value else None
+
+
+def _trendyol_state_prices(record):
+    """Kartta indirimli fiyat ayrı gösterilir (kampanya); yoksa kampanya fiyatı 0, DOM'daki gibi"""
+    price, discounted = record["price"], record["campaign_price"]
+    if not discounted or (price and discounted >= price):
+        record["campaign_price"] = 0.0
+
+
+def _hepsiburada_state_title(record):
+    """Kartta marka ürün adının önünde yazılır; JSON'daki ad markayı içermeyebilir"""
+    brand, title = record["brand"], record["title"]
+    if brand != "Belirtilmemiş" and not title.startswith(brand):
+        record["title"] = f"{brand} {title}"
+
+
+def _avansas_prices(record):
+    """Üstü çizili fiyat varsa o liste fiyatı, güncel fiyat kampanya fiyatıdır"""
+    current, old = record["current_price"], record["old_price"]
+    if not record["has_price"]:
+        record["price"], record["campaign_price"] = 0.0, 0.0
+    elif old is not None:
+        record["price"], record["campaign_price"] = old, current if current is not None else 0.0
+    else:
+        record["price"], record["campaign_price"] = current if current is not None else 0.0, None
+
+
+_TRENDYOL_CAMPAIGN_CLASSES = ("lowest-price-discounted", "basket-price-original", "discounted", "basket-price-discounted")
+
+LISTING_SPECS = {
+    "trendyol": {
+        "cards": "div.p-card-wrppr",
+        "fields": {
+            "platform_product_id": {"attr": "data-id", "required": True},
+            "title": {"css": ".prdct-desc-cntnr-name", "default": "Başlıksız"},
+            "brand": {"css": ".prdct-desc-cntnr-ttl", "default": "Bilinmeyen"},
+            "product_link": {"css": "a[href]", "attr": "href", "transform": "absolute_url", "required": True},
+            "price_container": {"css": "div.price-information", "take": "exists", "required": True, "private": True},
+            "campaign_price": {
+                "css": ", ".join(f"div.price-information .price-item.{cls}" for cls in _TRENDYOL_CAMPAIGN_CLASSES),
+                "normalize": "price", "default": 0.0,
+            },
+            "price": {
+                "css": "div.price-information .price-item" + "".join(f":not(.{cls})" for cls in _TRENDYOL_CAMPAIGN_CLASSES),
+                "normalize": "price", "fallback_field": "campaign_price",
+            },
+            "stock_status": {"css": "div.rushDelivery", "take": "exists", "found": "Yarın kargoda",
+                             "default": "2 gün içinde kargoda"},
+        },
+        # Sonsuz kaydırmada gelen arama API yanıtı (bkz. network_capture); kart başına ürün nesnesi
+        "state": {
+            "cards": "result.products",
+            "fields": {
+                "platform_product_id": {"json": "id", "json_transform": "string", "required": True},
+                "title": {"json": "name", "default": "Başlıksız"},
+                "brand": {"json": "brand.name", "default": "Bilinmeyen"},
+                "product_link": {"json": "url", "json_transform": "absolute_url", "required": True},
+                "price": {"json": ["price.sellingPrice", "price.originalPrice"], "json_transform": "float",
+                          "required": True},
+                "campaign_price": {"json": "price.discountedPrice", "json_transform": "float", "default": 0.0},
+                "stock_status": {"json": "rushDeliveryDuration", "json_transform": "ty_rush_delivery",
+                                 "default": "2 gün içinde kargoda"},
+            },
+            "post": _trendyol_state_prices,
+        },
+    },
+    "hepsiburada": {
+        "cards": "li[class*='productListContent-']",
+        "fields": {
+            "title": {"css": "h2[class*='title-module_titleRoot']", "required": True},
+            "brand": {"css": "h2[class*='title-module_titleRoot'] span[class*='title-module_brandText']",
+                      "default": "Belirtilmemiş"},
+            "product_link": {"css": "a[href]", "attr": "href", "transform": "absolute_url", "required": True},
+            "platform_product_id": {"css": "a[href]", "attr": "href", "transform": "last_segment", "required": True},
+            # Ödenen fiyat kampanya fiyatı olarak, üstü çizili fiyat liste fiyatı olarak yazılır
+            "campaign_price": {"css": "div[class^='price-module_finalPrice__'], div[class*=' price-module_finalPrice__']",
+                               "normalize": "price", "default": 0.0},
+            "price": {"css": "div[class^='price-module_originalPrice__'], div[class*=' price-module_originalPrice__']",
+                      "normalize": "price", "fallback_field": "campaign_price"},
+            "stock_status": {"css": "div[class*='estimatedArrivalDate']", "transform": "remove:Teslimat bilgisi:",
+                             "default": "Belirsiz"},
+        },
+        # Ürün listesi window.MORIA.PRODUCTLIST durumunda (bkz. embedded_state); kart başına varsayılan varyant
+        "state": {
+            "cards": "data.products",
+            "fields": {
+                "title": {"json": "variantList.0.name", "required": True},
+                "brand": {"json": "brand", "default": "Belirtilmemiş"},
+                "product_link": {"json": "variantList.0.url", "json_transform": ["redirect_target", "absolute_url"],
+                                 "required": True},
+                "platform_product_id": {"json": "variantList.0.url",
+                                        "json_transform": ["redirect_target", "url_path", "last_segment"],
+                                        "required": True},
+                # Sepette indirim varsa kartta o fiyat gösterilir
+                "campaign_price": {"json": ["variantList.0.listing.campaignPriceInfo.discountedPrice",
+                                            "variantList.0.listing.priceInfo.price"],
+                                   "json_transform": "float", "default": 0.0},
+                "price": {"json": "variantList.0.listing.priceInfo.originalPrice", "json_transform": "float",
+                          "fallback_field": "campaign_price"},
+                "stock_status": {"json": "variantList.0.listing.shipmentDay", "json_transform": "hb_shipment_day",
+                                 "default": "Belirsiz"},
+            },
+            "post": _hepsiburada_state_title,
+        },
+    },
+    "avansas": {
+        "cards": "div.product-list",
+        "fields": {
+            "platform_product_id": {"attr": "data-product-id", "transform": "strip", "required": True},
+            "title": {"attr": "data-product-name", "transform": "strip", "default": ""},
+            "brand": {"attr": "data-product-brand", "transform": "strip", "default": ""},
+            "product_link": {"css": "a[href]", "attr": "href", "transform": "absolute_url"},
+            "has_price": {"css": "div.price", "take": "exists", "default": False, "private": True},
+            # Ham metinler; post fiyat alanlarına dağıtır, sayfa toplu normalize eder
+            "current_price": {"css": "div.price span.current-price", "private": True},
+            "old_price": {"css": "div.price span.strike-through-price", "private": True},
+            "price": {"value": 0.0, "normalize": "price"},
+            "campaign_price": {"value": None, "normalize": "price"},
+            "stock_status": {"value": "Mevcut"},
+        },
+        "post": _avansas_prices,
+    },
+    "n11": {
+        "cards": "div.productArea li.column",
+        "fields": {
+            "plink": {"css": "a.plink", "take": "exists", "required": True, "private": True},
+            "platform_product_id": {"css": "a.plink", "attr": "data-id", "default": ""},
+            "title": {"css": "h3.productName", "default": "Başlık bulunamadı"},
+            "brand": {"css": "input.sellerNickName", "attr": "value", "default": "Bilinmeyen"},
+            "product_link": {"css": "a.plink", "attr": "href", "transform": "absolute_url", "default": ""},
+            "price": {"css": "span.newPrice ins", "normalize": "price", "default": 0.0},
+            "campaign_price": {"value": None},
+            # Kartın tüm metninde stok ifadeleri aranır
+            "stock_status": {"strip": False, "transform": "n11_stock", "default": "Mevcut"},
+        },
+        # Sayfa düzeyi alanlar (kartlardan bağımsız, tüm belge üzerinde)
+        "page": {
+            "has_pagination": {"css": "div.paginationArea", "take": "exists", "default": False},
+        },
+    },
+}
+
+DETAIL_SPECS = {
+    "trendyol": {
+        "fields": {
+            "description": {"css": "ul.content-descriptions-description-content li", "pick": "all", "join": " "},
+            "store_name": {"css": "div.merchant-name"},
+            "shipping_info": {"css": "div.delivery-container", "separator": " "},
+            "free_shipping": {"value": True},
+            "rating": {"css": "span.reviews-summary-average-rating", "transform": "float", "default": 0.0},
+            "product_type": {"css": "ul.breadcrumb-list li.product-detail-new-breadcrumbs-item a", "pick": -2},
+            "image_url": {
+                "css": ['img[data-testid="image"]', ".gallery-modal-content img",
+                        ".product-slide-image img", ".product-image-container img"],
+                "attr": ["src", "data-src"],
+            },
+            "store_rating": {"css": "div.score-badge", "transform": "float", "default": 0.0},
+            "attributes": {"css": "div.attribute-item", "pick": "all", "items": NAME_VALUE_ITEMS, "default": []},
+        },
+    },
+    # json yolları script#reduxStore durumunda (bkz. embedded_state); açıklama ve kargo metni sadece DOM'da
+    "hepsiburada": {
+        "fields": {
+            "description": {"css": "div.productDescriptionContent", "separator": " "},
+            # Eski mutlak XPath'in CSS karşılığı: //*[@id='container']/main/div/div[2]/section[1]/div[2]/div[2]/div[1]/a
+            "store_name": {"json": "productState.product.merchantName",
+                           "css": "#container > main > div > div:nth-of-type(2) > section:nth-of-type(1)"
+                                  " > div:nth-of-type(2) > div:nth-of-type(2) > div:nth-of-type(1) > a",
+                           "separator": " "},
+            "store_rating": {"json": "productState.product.merchant.lifetimeRating", "json_transform": "float",
+                             "css": 'span[data-test-id="merchant-rating"]', "transform": "float", "default": 0.0},
+            # Sınıf adları her derlemede değişiyor; başlık metninden bulunur
+            "shipping_info": {"text_contains": ["Teslimat", "teslimat"], "closest": "div", "separator": " "},
+            "rating": {"json": "productState.product.reviews.customerReviewScore", "json_transform": "float",
+                       "css": "div[data-test-id='has-review'] span", "transform": "float", "default": 0.0},
+            "product_type": {"json": "productState.breadcrumbs.-2.name",
+                             "css": 'script[type="application/ld+json"]', "take": "string", "transform": "ld_breadcrumb"},
+            "image_url": {"json": "productState.product.media.0.url", "json_transform": "image_size:424-600",
+                          "css": "picture img", "attr": "src"},
+            "free_shipping": {"value": True},
+            "attributes": {"json": "productState.product.expends.*.properties.*", "css": "div.attribute-item",
+                           "pick": "all", "default": [], "items": {
+                "name": {"json": "name", **NAME_VALUE_ITEMS["name"]},
+                "value": {"json": "property", **NAME_VALUE_ITEMS["value"]},
+            }},
+        },
+    },
+    "avansas": {
+        "fields": {
+            "description": {"css": "div.product-description-tab.tab-description", "take": "html"},
+            "store_name": {"value": "Avansas"},
+            "shipping_info": {"css": "div.delivery-detail-button a"},
+            "free_shipping": {"value": True},
+            "rating": {"css": "div.product-detail-review span.review-overall", "transform": "float", "default": 0.0},
+            "product_type": {"css": "ul.breadcrumb li", "pick": -2, "inner": "span"},
+            "image_url": {
+                "css": ["div.product-detail-media-list img", "div.product-image img",
+                        "img.product-detail-image", "div.swiper-slide img"],
+                "attr": ["src", "data-src"],
+            },
+            "store_rating": {"value": 0.0},
+        },
+    },
+    "n11": {
+        "fields": {
+            "description": {"css": ".unf-info-context .unf-info-desc", "default": ""},
+            "store_name": {"css": ".unf-p-seller-name", "default": ""},
+            "shipping_info": {"css": [".cargo", ".cargo-new"], "default": ""},
+            "free_shipping": {"css": [".cargo", ".cargo-new"], "transform": ["lower", "contains:ücretsiz"], "default": False},
+            "rating": {"css": ".ratingScore", "transform": "float"},
+            "product_type": {"css": "#breadCrumb ul li a", "pick": -2, "default": ""},
+            "image_url": {
+                "css": [".unf-p-img-box-big img", ".imgObj img", ".product-image img", ".proDetailCarousel img"],
+                "attr": ["src", "data-src", "data-original"],
+                "default": "Görsel bulunamadı",
+            },
+            "store_rating": {"css": ".point", "transform": "first_number", "default": 0.0},
+            "attributes": {"css": ".unf-prop-list .unf-prop-list-item", "pick": "all", "default": [], "items": {
+                "name": {"css": ".unf-prop-list-title", "required": True},
+                "value": {"css": ".unf-prop-list-prop", "required": True},
+            }},
+            "table_attributes": {"css": ".productFeatures table tr, .specifications table tr", "pick": "all",
+                                 "default": [], "items": {
+                "name": {"css": "td", "pick": 0, "required": True},
+                "value": {"css": "td", "pick": 1, "required": True},
+            }},
+        },
+    },
+}
+
+
+def _compile_all():
+    listing, listing_state, listing_page, detail = {}, {}, {}, {}
+    for platform_name, spec in LISTING_SPECS.items():
+        base_url = BASE_URLS.get(platform_name, "")
+        listing[platform_name] = compile_spec(spec["fields"], name=f"{platform_name}:listing",
+                                              base_url=base_url, post=spec.get("post"))
+        if spec.get("state"):
+            state_spec = spec["state"]
+            listing_state[platform_name] = (
+                compile_path(state_spec["cards"]),
+                compile_spec(state_spec["fields"], name=f"{platform_name}:listing-state",
+                             base_url=base_url, post=state_spec.get("post")),
+            )
+        if spec.get("page"):
+            listing_page[platform_name] = compile_spec(spec["page"], name=f"{platform_name}:listing-page",
+                                                       base_url=base_url)
+    for platform_name, spec in DETAIL_SPECS.items():
+        detail[platform_name] = compile_spec(spec["fields"], name=f"{platform_name}:detail",
+                                             base_url=BASE_URLS.get(platform_name, ""), post=spec.get("post"))
+    return listing, listing_state, listing_page, detail
+
+
+# Başlangıçta bir kez derlenir
+LISTING_EXTRACTORS, LISTING_STATE_EXTRACTORS, LISTING_PAGE_EXTRACTORS, DETAIL_EXTRACTORS = _compile_all()
+
+
+def find_cards(platform_name, soup):
+    return soup.select(LISTING_SPECS[platform_name]["cards"])
+
+
+def extract_cards(platform_name, cards):
+    """Sayfanın tüm kartları → alan sözlükleri (ya da None); fiyatlar sayfa başına toplu normalize edilir"""
+    if not cards:
+        return []
+    if isinstance(cards[0], dict):
+        return LISTING_STATE_EXTRACTORS[platform_name][1].extract_many(cards)
+    return LISTING_EXTRACTORS[platform_name].extract_many(cards)
+
+
+def find_state_cards(platform_name, state):
+    """Gömülü durumdaki ürün listesi; durum ya da spec yoksa boş liste (çağıran DOM kartlarına düşer)"""
+    if state is None or platform_name not in LISTING_STATE_EXTRACTORS:
+        return []
+    cards = resolve_path(state, LISTING_STATE_EXTRACTORS[platform_name][0])
+    return [card for card in cards if isinstance(card, dict)] if isinstance(cards, list) else []
+
+
+def extract_card(platform_name, card):
+    """Liste kartı (DOM düğümü ya da gömülü durumdaki ürün) → alan sözlüğü; zorunlu alan eksikse None"""
+    if isinstance(card, dict):
+        return LISTING_STATE_EXTRACTORS[platform_name][1].extract(card)
+    return LISTING_EXTRACTORS[platform_name].extract(card)
+
+
+def extract_detail(platform_name, soup, state=None):
+    """Detay sayfası → alan sözlüğü; state verilirse json kuralları önce denenir"""
+    return DETAIL_EXTRACTORS[platform_name].extract(soup, state) or {}
+
+
+def extract_page(platform_name, page_type, page):
+    """
+    Getirilmiş sayfa (.soup / .state sunan nesne, bkz. fetcher.FetchResult) → kompakt kayıtlar.
+    listing: {"cards": [alan sözlüğü ya da None, ...], "page": sayfa düzeyi alanlar}
+    detail:  {"details": alan sözlüğü}
+    Gömülü durumda kart varsa DOM hiç kurulmaz. Sonuç düz sözlük/liste; süreçler arası taşınabilir.
+    """
+    if page_type == "detail":
+        return {"details": extract_detail(platform_name, page.soup, page.state)}
+
+    cards = find_state_cards(platform_name, page.state) or find_cards(platform_name, page.soup)
+    page_spec = LISTING_PAGE_EXTRACTORS.get(platform_name)
+    return {
+        "cards": extract_cards(platform_name, cards),
+        "page": (page_spec.extract(page.soup) or {}) if page_spec else {},
+    }
+
+
+def page_records(page):
+    """Havuzda çıkarılmış kayıtlar (bkz. parse_pool); yoksa (havuz kapalı / hata) burada çıkarılır"""
+    if page.records is None:
+        page.records = extract_page(page.platform, page.page_type, page)
+    return page.records
+
+
+def log_details(log, details):
+    for key, label in FIELD_LABELS.items():
+        value = details.get(key)
+        if key == "description":
+            value = "Bulundu" if value else None
+        log.info(f"{label}: {value if value not in (None, '') else 'Bulunamadı'}")
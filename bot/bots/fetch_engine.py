@@ -0,0 +1,297 @@
+# bots/fetch_engine.py
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from urllib.parse import urlparse
+
+from browser_pool import POOL_SIZE
+from fetcher import Fetcher, NoDriverAvailable, get_fetch_mode
+from parse_pool import get_parse_workers, get_parse_pool, parse_page
+from waits import MIN_REQUEST_INTERVAL
+
+logger = logging.getLogger("fetch_engine")
+
+# Platform başına aynı anda açık istek sayısı (tarayıcı modlarında havuz boyutuyla sınırlı)
+PLATFORM_CONCURRENCY = {
+    "trendyol": int(os.getenv("FETCH_CONCURRENCY_TRENDYOL", "3")),
+    "hepsiburada": int(os.getenv("FETCH_CONCURRENCY_HEPSIBURADA", "3")),
+    "avansas": int(os.getenv("FETCH_CONCURRENCY_AVANSAS", "4")),
+    # n11 bot tespiti yapıyor, tek tek ilerle
+    "n11": int(os.getenv("FETCH_CONCURRENCY_N11", "1")),
+}
+
+# Host başına saniyedeki istek sayısı (token bucket); nezaket seviyesi buradan ayarlanır
+HOST_RATES = {
+    "trendyol": float(os.getenv("HOST_RATE_TRENDYOL", "1")),
+    "hepsiburada": float(os.getenv("HOST_RATE_HEPSIBURADA", "1")),
+    "avansas": float(os.getenv("HOST_RATE_AVANSAS", "1")),
+    "n11": float(os.getenv("HOST_RATE_N11", str(1 / MIN_REQUEST_INTERVAL["n11"]))),
+}
+
+# Getirilmiş ama henüz işlenmemiş en fazla sonuç sayısı; dolunca işçiler yeni sayfa açmaz
+PIPELINE_WINDOW = int(os.getenv("FETCH_PIPELINE_WINDOW", "2"))
+
+# Tarayıcısı olmayan ek işçinin havuzu yeniden yoklama aralığı (sn)
+DRIVER_RETRY_SECONDS = float(os.getenv("FETCH_DRIVER_RETRY_SECONDS", "2"))
+
+
+class TokenBucket:
+    """
+    Rezervasyonlu token bucket: her istek bir token ayırır, token yoksa
+    sırası gelene kadar bekler. Thread-safe; farklı event loop'lar paylaşabilir.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Bir token ayırır, kullanılabilmesi için beklenecek süreyi (sn) döner"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_host_bucket(url, rate, burst=1):
+    """Aynı host'a giden tüm işler (aynı süreçteki diğer botlar dahil) tek bucket paylaşır"""
+    host = urlparse(url).netloc
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(rate, burst)
+        return _buckets[host]
+
+
+class FetchEngine:
+    """
+    asyncio tabanlı eşzamanlı, boru hattı (pipeline) şeklinde sayfa getirici.
+    Her işçinin kendi Fetcher'ı (ve gerekirse kendi Chrome'u) vardır. Tarayıcı havuzu diğer
+    botlarla paylaşıldığından sadece ilk işçi kiralamayı bekler; diğerleri ancak boşta tarayıcı
+    varsa kiralar, yoksa kuyruktan istek almadan bekler (istekler tarayıcılı işçilere kalır). Sayfalar
+    thread'lerde getirilir ve sınırlı bir pencereye bırakılır. Tek bir tüketici
+    sonuçları tamamlanma sırasıyla handle() ile işlerken işçiler sonraki sayfaya
+    geçer: k+1. ürünün yüklenmesi k. ürünün parse/DB yazımıyla örtüşür.
+    Çıkarım havuzu açıksa (bkz. parse_pool) getirilen HTML hemen ayrı bir sürece
+    gönderilir; pencerede HTML yerine bekleyen çıkarım işi durur, handle() hazır
+    kayıtları result.records'ta bulur.
+    handle(url, context, result, error) yeni (url, context) istekleri dönebilir.
+    """
+
+    def __init__(self, platform, page_type, driver_factory=None, mode=None, concurrency=None,
+                 window=None, parser=None, subtree=None, state=None, lean=None, capture=None, harvest=None,
+                 parse_workers=None, logger=logger):
+        self.platform = platform
+        self.page_type = page_type
+        self.mode = get_fetch_mode(platform, mode)
+        self.logger = logger
+        self.rate = HOST_RATES.get(platform, 1.0)
+        self.window = max(1, int(window or PIPELINE_WINDOW))
+        self.parse_workers = get_parse_workers(parse_workers)
+        self.pooled_pages = 0
+
+        concurrency = int(concurrency or PLATFORM_CONCURRENCY.get(platform, 1))
+        if self.mode != "http":
+            # Havuzdan fazlası tarayıcı beklerken kilitlenir
+            concurrency = min(concurrency, POOL_SIZE)
+        self.concurrency = max(1, concurrency)
+
+        self.fetchers = [
+            Fetcher(platform, page_type, driver_factory, mode=self.mode, parser=parser, subtree=subtree,
+                    state=state, lean=lean, capture=capture, harvest=harvest, wait_for_driver=index == 0,
+                    logger=logger)
+            for index in range(self.concurrency)
+        ]
+        self._cancelled = False
+
+    # === Yaşam döngüsü ===
+    def open(self):
+        """İlk işçinin tarayıcısını hemen kiralar (browser modu); başarısızsa False"""
+        return self.fetchers[0].open()
+
+    def close(self, broken=False):
+        for fetcher in self.fetchers:
+            fetcher.close(broken=broken)
+
+    def cancel(self):
+        """Kuyruktaki istekleri getirmeden bırakır"""
+        self._cancelled = True
+
+    def stats(self):
+        totals = {"mode": self.mode, "parser": self.fetchers[0].parser,
+                  "subtree_filter": self.fetchers[0].subtree is not None,
+                  "embedded_state": self.fetchers[0].state_locator is not None,
+                  "lean_source": self.fetchers[0].lean,
+                  "network_capture": self.fetchers[0].capture_rule is not None,
+                  "scroll_harvest": self.harvesting, "concurrency": self.concurrency,
+                  "parse_workers": self.parse_workers, "pooled": self.pooled_pages}
+        for fetcher in self.fetchers:
+            for key, value in fetcher.counts.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    @property
+    def harvesting(self):
+        """Sonsuz kaydırmalı toplama açık mı (bkz. scroll_harvest); açıksa terim başına tek istek yeter"""
+        return self.fetchers[0].harvest_rule is not None
+
+    def set_harvest_batches(self, batches):
+        """Kaydırmalı toplamada tek navigasyonda alınacak en fazla parti (sayfa) sayısı"""
+        for fetcher in self.fetchers:
+            fetcher.harvest_batches = max(1, int(batches))
+
+    @property
+    def has_driver(self):
+        return any(fetcher.has_driver for fetcher in self.fetchers)
+
+    def network_summary(self):
+        """Tüm işçi tarayıcılarının ağ özetlerini toplar"""
+        merged = None
+        for fetcher in self.fetchers:
+            summary = fetcher.network_summary()
+            if not summary:
+                continue
+            if merged is None:
+                merged = {key: (dict(value) if isinstance(value, dict) else value) for key, value in summary.items()}
+                continue
+            for key, value in summary.items():
+                if isinstance(value, dict):
+                    for sub_key, sub_value in value.items():
+                        merged[key][sub_key] = merged[key].get(sub_key, 0) + sub_value
+                else:
+                    merged[key] += value
+        return merged
+
+    # === Çalıştırma ===
+    def run(self, requests, handle, skip=None):
+        """
+        (url, context) isteklerini getirir; tüm kuyruk (takip istekleri dahil) bitince döner.
+        skip(url, context) True dönerse istek getirilmez / sonucu handle'a verilmez.
+        """
+        self._cancelled = False
+        asyncio.run(self._run(list(requests), handle, skip))
+
+    async def _run(self, requests, handle, skip=None):
+        queue = asyncio.Queue()
+        for request in requests:
+            queue.put_nowait(request)
+
+        # Getirilen sayfalar (ve çıkarım işleri) burada bekler; dolunca işçiler durur (backpressure).
+        # Bellekte en fazla window + concurrency sayfanın HTML'i bulunur.
+        results = asyncio.Queue(maxsize=self.window)
+        pool = get_parse_pool(self.parse_workers)
+        tasks = [asyncio.create_task(self._worker(queue, results, fetcher, skip, pool)) for fetcher in self.fetchers]
+        tasks.append(asyncio.create_task(self._consumer(queue, results, handle, skip)))
+        try:
+            await queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _worker(self, queue, results, fetcher, skip, pool=None):
+        while True:
+            if not await self._has_browser(fetcher):
+                await asyncio.sleep(DRIVER_RETRY_SECONDS)
+                continue
+
+            url, context = await queue.get()
+            handed_over = False
+            try:
+                if self._is_skipped(url, context, skip):
+                    continue
+
+                await get_host_bucket(url, self.rate, self.concurrency).acquire()
+                try:
+                    result, error = await asyncio.to_thread(fetcher.fetch, url), None
+                except NoDriverAvailable:
+                    # auto modda tarayıcıya yükselirken havuz doluydu: istek diğer işçilere kalır
+                    queue.put_nowait((url, context))
+                    await asyncio.sleep(DRIVER_RETRY_SECONDS)
+                    continue
+                except Exception as e:
+                    result, error = None, e
+
+                records = self._submit_parse(pool, result) if error is None else None
+
+                # task_done artık tüketicide: takip istekleri kuyruğa girmeden join bitmesin
+                await results.put((url, context, result, error, records))
+                handed_over = True
+            except Exception as e:
+                self.logger.error(f"❌ Sayfa getirilemedi: {url} - {e}")
+                self.logger.debug(f"Stack trace:\n{traceback.format_exc()}")
+            finally:
+                if not handed_over:
+                    queue.task_done()
+
+    async def _has_browser(self, fetcher):
+        """Beklemeyen işçi tarayıcı gerektiğinde boşta tarayıcı varsa kiralar; yoksa False"""
+        if fetcher.wait_for_driver or not fetcher.needs_driver or fetcher.has_driver:
+            return True
+        return await asyncio.to_thread(lambda: fetcher.driver) is not None
+
+    async def _consumer(self, queue, results, handle, skip):
+        """Sonuçları tek tek işler; handle() DB'ye yazdığı için aynı anda tek çağrı"""
+        while True:
+            url, context, result, error, records = await results.get()
+            try:
+                if self._is_skipped(url, context, skip):
+                    if records is not None:
+                        records.cancel()
+                    continue
+                if records is not None:
+                    await self._collect_parse(result, records)
+                follow_ups = await asyncio.to_thread(handle, url, context, result, error)
+                for request in follow_ups or ():
+                    queue.put_nowait(request)
+            except Exception as e:
+                self.logger.error(f"❌ İstek işlenemedi: {url} - {e}")
+                self.logger.debug(f"Stack trace:\n{traceback.format_exc()}")
+            finally:
+                queue.task_done()
+
+    def _submit_parse(self, pool, result):
+        """
+        HTML'i çıkarım havuzuna gönderir; havuz yoksa ya da soup zaten kurulduysa None.
+        HTML'siz (API yanıtı yakalanmış) sayfaların çıkarımı ucuz, yerinde yapılır.
+        """
+        # HTTP modunda hazır olma kontrolü soup'u kurdu; yeniden parse etmek yerine yerinde çıkarılır
+        if pool is None or result is None or not result.html or result.parsed:
+            return None
+        try:
+            return asyncio.get_running_loop().run_in_executor(
+                pool, parse_page, self.platform, self.page_type, result.html, result.parser, result.subtree,
+                result.state_locator,
+            )
+        except RuntimeError as e:
+            # Havuz kapatıldı / bozuldu: bu sayfa tüketicide çıkarılır
+            self.logger.warning(f"⚠️ Çıkarım havuzuna gönderilemedi: {e}")
+            return None
+
+    async def _collect_parse(self, result, records):
+        """Havuzun kayıtlarını sonuca yazar; hata olursa records boş kalır ve handle içinde çıkarılır"""
+        try:
+            result.records = await records
+            self.pooled_pages += 1
+        except Exception as e:
+            self.logger.warning(f"⚠️ Havuzda çıkarım başarısız, yerinde denenecek: {result.url} - {e}")
+
+    def _is_skipped(self, url, context, skip):
+        return self._cancelled or bool(skip and skip(url, context))
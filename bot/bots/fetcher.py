@@ -0,0 +1,379 @@
+# bots/fetcher.py
+
+import os
+import time
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from browser import USER_AGENTS
+from browser_pool import release_driver
+from parsers import parse_html, get_parser_backend, get_subtree_filter
+from embedded_state import find_state, get_state_locator
+from network_capture import get_capture_rule
+from scroll_harvest import get_harvest_rule, harvest
+from waits import READY_SELECTORS, wait_until_ready, throttle
+
+logger = logging.getLogger("fetcher")
+
+FETCH_MODES = ("http", "browser", "auto")
+
+# Platform kök adresleri; testlerde yerel sahte sunucuya yönlendirilebilir
+BASE_URLS = {
+    "trendyol": os.getenv("TRENDYOL_BASE_URL", "https://www.trendyol.com").rstrip("/"),
+    "n11": os.getenv("N11_BASE_URL", "https://www.n11.com").rstrip("/"),
+    "hepsiburada": os.getenv("HEPSIBURADA_BASE_URL", "https://www.hepsiburada.com").rstrip("/"),
+    "avansas": os.getenv("AVANSAS_BASE_URL", "https://www.avansas.com").rstrip("/"),
+}
+
+# Varsayılan modlar: Avansas ürünleri sunucu tarafında basıyor, diğerleri JS ile dolduruyor
+DEFAULT_FETCH_MODES = {
+    "trendyol": "browser",
+    "n11": "browser",
+    "hepsiburada": "browser",
+    "avansas": "auto",
+}
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+# auto modda art arda bu kadar HTTP denemesi yetersiz kalırsa direkt tarayıcıya geçilir
+AUTO_HTTP_MISS_LIMIT = int(os.getenv("AUTO_HTTP_MISS_LIMIT", "3"))
+
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+def get_fetch_mode(platform, override=None):
+    """Öncelik: bot options → FETCH_MODE_<PLATFORM> ortam değişkeni → varsayılan"""
+    mode = override or os.getenv(f"FETCH_MODE_{platform.upper()}") or DEFAULT_FETCH_MODES.get(platform, "browser")
+    if mode not in FETCH_MODES:
+        logger.warning(f"⚠️ Geçersiz fetch modu '{mode}', browser kullanılıyor")
+        return "browser"
+    return mode
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Süreç geneli keep-alive HTTP oturumu (bağlantı havuzu + sıkıştırma + retry)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=("GET",))
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "User-Agent": USER_AGENTS["selenium"],
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "tr-TR,tr;q=0.9,en;q=0.8",
+                "Accept-Encoding": ACCEPT_ENCODING,
+            })
+            _session = session
+        return _session
+
+
+# Sayfa kaynağı yerine tek execute_script ile sadece gereken HTML:
+#   containers verildiyse: o kapsayıcılar (iç içe olmayanlar) + marker içeren script'ler, belge sırasıyla
+#   yoksa (lean): tüm belge, ama script/stil/svg vb. olmadan (keep'e uyan ve marker içeren script'ler kalır)
+_PAGE_SCRIPT = """
+const [containers, markers, keep, strip] = arguments;
+const keptScript = s => (keep && s.matches(keep)) || markers.some(marker => s.text.includes(marker));
+if (containers) {
+    const picked = [];
+    for (const selector of containers) {
+        for (const el of document.querySelectorAll(selector)) {
+            if (!picked.some(p => p.contains(el))) picked.push(el);
+        }
+    }
+    for (const script of document.scripts) {
+        if (markers.some(marker => script.text.includes(marker))) picked.push(script);
+    }
+    picked.sort((a, b) => a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING ? -1 : 1);
+    return picked.map(el => el.outerHTML).join("\\n");
+}
+const root = document.documentElement.cloneNode(true);
+for (const el of root.querySelectorAll(strip)) {
+    if (el.tagName !== "SCRIPT" || !keptScript(el)) el.remove();
+}
+return "<!DOCTYPE html>" + root.outerHTML;
+"""
+
+# lean modda atılan etiketler; spec'ler bunların içine bakmıyor (JSON-LD ve gömülü durum script'leri hariç)
+LEAN_STRIP_TAGS = "script, style, noscript, svg, link, template, iframe"
+LEAN_KEEP_SCRIPTS = 'script[type="application/ld+json"]'
+
+
+def get_lean_source(override=None):
+    """Öncelik: bot options → LEAN_PAGE_SOURCE ortam değişkeni ("0" kapatır) → açık"""
+    if override is not None:
+        return bool(override)
+    return os.getenv("LEAN_PAGE_SOURCE", "1") not in ("0", "false", "no")
+
+
+def has_ready_selectors(soup, platform, page_type):
+    selectors = READY_SELECTORS.get((platform, page_type), [])
+    return bool(selectors) and all(soup.select_one(selector) is not None for selector in selectors)
+
+
+class FetchResult:
+    """
+    Bir sayfanın HTML'i ve nereden geldiği; soup ilk erişimde bir kez parse edilir (bkz. parsers).
+    subtree verilmişse soup sadece liste kartlarını içerir (html tarayıcıdan geldiyse zaten öyle).
+    state, tarayıcının yakaladığı API yanıtı (captured, bkz. network_capture) ya da sayfaya
+    gömülü durum JSON'u (bkz. embedded_state); ikisi de yoksa None.
+    records, çıkarım havuzunda hazırlanan kayıtlar (bkz. parse_pool, extraction_specs.page_records).
+    batches, kaydırmalı toplamada (bkz. scroll_harvest) her parti için ayrı FetchResult; yoksa None.
+    """
+
+    def __init__(self, url, html, via, ready, elapsed, status_code=None, parser=None, subtree=None,
+                 state_locator=None, platform=None, page_type=None, captured=None):
+        self.url = url
+        self.html = html
+        self.via = via            # "http" veya "browser"
+        self.ready = ready        # Hazır olma seçicileri bulundu mu
+        self.elapsed = elapsed
+        self.status_code = status_code
+        self.parser = parser
+        self.subtree = subtree
+        self.state_locator = state_locator
+        self.platform = platform
+        self.page_type = page_type
+        self.captured = captured
+        self.batches = None
+        self.records = None
+        self._soup = None
+        self._state = None
+        self._state_checked = False
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            self._soup = parse_html(self.html, self.parser, self.subtree)
+        return self._soup
+
+    @property
+    def parsed(self):
+        """soup kuruldu mu (HTTP modunda hazır olma kontrolü için getirirken kurulur)"""
+        return self._soup is not None
+
+    @property
+    def state(self):
+        if self.captured is not None:
+            return self.captured
+        if not self._state_checked:
+            self._state = find_state(self.html, self.state_locator)
+            self._state_checked = True
+        return self._state
+
+
+class NoDriverAvailable(Exception):
+    """Beklemeyen işçi (wait_for_driver=False) boşta tarayıcı bulamadı; istek başka işçiye bırakılmalı"""
+
+
+class Fetcher:
+    """
+    Platform + sayfa tipi için sayfa getirici.
+    http: sadece HTTP, browser: sadece Chrome,
+    auto: önce HTTP, statik HTML'de hazır olma seçicileri yoksa Chrome'a yükselt.
+    Tarayıcı sadece gerektiğinde havuzdan kiralanır; wait_for_driver=False ise havuzda boş tarayıcı
+    yoksa beklenmez, NoDriverAvailable fırlatılır (bkz. fetch_engine: ek işçiler).
+    Liste sayfalarında sadece ürün kartlarının alt ağacı alınır/parse edilir (bkz. parsers.LISTING_SUBTREES),
+    diğer sayfalar lean açıksa script/stil olmadan; ikisi de tek execute_script ile gelir.
+    Platformun ürün API'si tanımlıysa (bkz. network_capture) yanıt yakalandığında HTML hiç alınmaz.
+    Sonsuz kaydırmalı listelerde (bkz. scroll_harvest) tek navigasyonda harvest_batches parti toplanır.
+    """
+
+    def __init__(self, platform, page_type, driver_factory=None, mode=None, parser=None, subtree=None,
+                 state=None, lean=None, capture=None, harvest=None, wait_for_driver=True, logger=logger):
+        self.platform = platform
+        self.page_type = page_type
+        self.driver_factory = driver_factory
+        self.wait_for_driver = wait_for_driver
+        self.mode = get_fetch_mode(platform, mode)
+        self.parser = get_parser_backend(parser)
+        self.subtree = get_subtree_filter(platform, page_type, subtree)
+        self.state_locator = get_state_locator(platform, page_type, state)
+        self.lean = get_lean_source(lean)
+        self.capture_rule = get_capture_rule(platform, page_type, capture)
+        # Kaydırmalı toplama sadece tarayıcıda; HTTP yanıtı kaydırılamaz
+        self.harvest_rule = get_harvest_rule(platform, page_type, harvest) if self.mode == "browser" else None
+        self.harvest_batches = 1
+        self.logger = logger
+        self._driver = None
+        self._driver_failed = False
+        self._http_misses = 0
+        self.counts = {"http": 0, "browser": 0, "escalated": 0, "http_errors": 0, "subtree": 0, "lean": 0, "captured": 0, "harvested": 0}
+
+    # === Yaşam döngüsü ===
+    def open(self):
+        """browser modunda tarayıcıyı hemen kiralar; kiralanamazsa False döner"""
+        if self.mode == "browser":
+            return self.driver is not None
+        return True
+
+    def close(self, broken=False):
+        if self._driver is not None:
+            release_driver(self._driver, broken=broken)
+            self._driver = None
+
+    @property
+    def driver(self):
+        """Kiralanmış tarayıcı; ilk erişimde havuzdan alınır"""
+        if self._driver is None and not self._driver_failed and self.driver_factory:
+            if self.wait_for_driver:
+                self._driver = self.driver_factory()
+                self._driver_failed = self._driver is None
+            else:
+                # Boşta tarayıcı yoksa kalıcı hata sayılmaz, sonraki erişimde yeniden denenir
+                self._driver = self.driver_factory(timeout=0)
+        return self._driver
+
+    @property
+    def needs_driver(self):
+        """Sonraki getirme tarayıcı ister mi (browser modu ya da auto'da statik HTML'den vazgeçildiyse)"""
+        return self.mode == "browser" or (self.mode == "auto" and self._http_misses >= AUTO_HTTP_MISS_LIMIT)
+
+    @property
+    def has_driver(self):
+        return self._driver is not None
+
+    def stats(self):
+        return {"mode": self.mode, "parser": self.parser, "subtree_filter": self.subtree is not None,
+                "embedded_state": self.state_locator is not None, "lean_source": self.lean,
+                "network_capture": self.capture_rule is not None, "scroll_harvest": self.harvest_rule is not None,
+                **self.counts}
+
+    def network_summary(self):
+        """Tarayıcı kullanıldıysa engellenen istek / byte özeti, yoksa None"""
+        if self._driver is None or not hasattr(self._driver, "network_summary"):
+            return None
+        return self._driver.network_summary()
+
+    # === Getirme ===
+    def fetch(self, url):
+        throttle(self.platform)
+
+        if self.mode == "http":
+            return self._fetch_http(url)
+        if self.mode == "browser":
+            return self._fetch_browser(url)
+
+        # auto: HTTP yeterliyse tarayıcıya hiç gitme
+        result = None
+        if self._http_misses < AUTO_HTTP_MISS_LIMIT:
+            result = self._fetch_http(url)
+            if result.ready:
+                self._http_misses = 0
+                return result
+            self._http_misses += 1
+            if self._http_misses == AUTO_HTTP_MISS_LIMIT:
+                self.logger.info(f"🔁 {self.platform} {self.page_type}: statik HTML yetersiz, tarayıcıya geçiliyor")
+
+        if self.driver is None:
+            if not self.wait_for_driver:
+                raise NoDriverAvailable(url)
+            # Tarayıcı yoksa elimizdeki en iyi sonucu dön
+            return result or self._fetch_http(url)
+
+        self.counts["escalated"] += 1
+        return self._fetch_browser(url)
+
+    def _fetch_http(self, url):
+        started = time.monotonic()
+        try:
+            response = get_http_session().get(url, timeout=HTTP_TIMEOUT)
+            html = response.text if response.ok else ""
+            status_code = response.status_code
+        except requests.RequestException as e:
+            self.logger.warning(f"⚠️ HTTP isteği başarısız: {url} - {e}")
+            html, status_code = "", None
+
+        if not html:
+            self.counts["http_errors"] += 1
+        self.counts["http"] += 1
+
+        result = FetchResult(url, html, "http", False, time.monotonic() - started, status_code, self.parser,
+                             self.subtree, self.state_locator, self.platform, self.page_type)
+        result.ready = bool(html) and has_ready_selectors(result.soup, self.platform, self.page_type)
+        self.logger.debug(f"🌐 HTTP {status_code} {url} ({result.elapsed * 1000:.0f} ms, hazır: {result.ready})")
+        return result
+
+    def _fetch_browser(self, url):
+        driver = self.driver
+        if driver is None:
+            if not self.wait_for_driver:
+                raise NoDriverAvailable(url)
+            raise RuntimeError("Chrome oturumu alınamadı")
+
+        started = time.monotonic()
+        # Havuz dışı (düz) driver'da yakalama yok; kaydırmalı toplamada kartlar DOM'dan parti parti alınır
+        capture = self.capture_rule if hasattr(driver, "start_capture") and not self.harvest_rule else None
+        if capture:
+            driver.start_capture(capture, url)
+        driver.get(url)
+        ready = wait_until_ready(driver, self.platform, self.page_type,
+                                 captured=driver.poll_capture if capture else None)
+        self.counts["browser"] += 1
+
+        if capture:
+            captured, failed = driver.finish_capture()
+            if failed:
+                self.logger.debug(f"{failed} API yanıtının gövdesi alınamadı: {url}")
+            if captured is not None:
+                # Ürünler API yanıtında: HTML serileştirilmez, DOM kurulmaz
+                self.counts["captured"] += 1
+                return FetchResult(url, "", "browser", True, time.monotonic() - started, parser=self.parser,
+                                   state_locator=self.state_locator, platform=self.platform,
+                                   page_type=self.page_type, captured=captured)
+
+        if self.harvest_rule and ready:
+            return self._harvest(driver, url, started)
+
+        # page_source yerine tek çağrıda sadece gereken HTML (script/stil megabaytları gelmez)
+        html = self._page_html(driver, containers=self.subtree["css"] if ready and self.subtree else None)
+        if not html:
+            html = driver.page_source
+        return FetchResult(url, html, "browser", ready, time.monotonic() - started, parser=self.parser,
+                           subtree=self.subtree, state_locator=self.state_locator, platform=self.platform,
+                           page_type=self.page_type)
+
+    def _harvest(self, driver, url, started):
+        """Açık sayfayı kaydırarak partileri toplar; her parti sadece yeni kartların HTML'i"""
+        batches = harvest(driver, self.harvest_rule, self.harvest_batches)
+        self.counts["harvested"] += len(batches)
+        self.logger.debug(f"🧺 {url}: tek navigasyonda {len(batches)} parti kart toplandı")
+        result = FetchResult(url, "", "browser", True, time.monotonic() - started, parser=self.parser,
+                             subtree=self.subtree, platform=self.platform, page_type=self.page_type)
+        result.batches = [
+            FetchResult(url, html, "browser", True, 0.0, parser=self.parser, subtree=self.subtree,
+                        platform=self.platform, page_type=self.page_type)
+            for html in batches
+        ]
+        return result
+
+    def _page_html(self, driver, containers=None):
+        """Kapsayıcıların ya da yalın belgenin HTML'i; kapalıysa / alınamazsa None (page_source'a düşülür)"""
+        if not containers and not self.lean:
+            return None
+        locator = self.state_locator or {}
+        markers = [locator["marker"]] if locator.get("marker") else []
+        keep = LEAN_KEEP_SCRIPTS + (f', script#{locator["script_id"]}' if locator.get("script_id") else "")
+        try:
+            html = driver.execute_script(_PAGE_SCRIPT, containers, markers, keep, LEAN_STRIP_TAGS)
+        except Exception as e:
+            self.logger.debug(f"Sayfa HTML'i script ile alınamadı, tam sayfa kullanılıyor: {e}")
+            return None
+        if html:
+            self.counts["subtree" if containers else "lean"] += 1
+        return html
@@ -0,0 +1,170 @@
+# bots/job_queue.py
+
+import os
+import threading
+import traceback
+import uuid
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+logger = logging.getLogger("job_queue")
+
+# Aynı anda çalışabilecek bot sayısı ve hafızada tutulacak iş geçmişi
+MAX_CONCURRENT_JOBS = int(os.getenv("BOT_MAX_CONCURRENCY", "2"))
+MAX_JOB_HISTORY = int(os.getenv("BOT_JOB_HISTORY", "100"))
+# Kapanışta çalışan işlerin bitmesi için beklenen en uzun süre (sn)
+JOB_DRAIN_TIMEOUT = float(os.getenv("BOT_JOB_DRAIN_TIMEOUT", "60"))
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class Job:
+    """Tek bir bot çalıştırmasının durumu, ilerleme sayaçları ve zamanlamaları"""
+
+    def __init__(self, bot_name):
+        self.id = uuid.uuid4().hex
+        self.bot = bot_name
+        self.status = "queued"
+        self.progress = {"processed": 0, "errors": 0}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._lock = threading.Lock()
+
+    def increment(self, counter, amount=1):
+        """İlerleme sayacını thread-safe şekilde artır"""
+        with self._lock:
+            self.progress[counter] = self.progress.get(counter, 0) + amount
+
+    def to_dict(self):
+        with self._lock:
+            progress = dict(self.progress)
+
+        end = self.finished_at or datetime.now()
+        duration = (end - self.started_at).total_seconds() if self.started_at else None
+        queue_wait = ((self.started_at or end) - self.created_at).total_seconds()
+
+        return {
+            "job_id": self.id,
+            "bot": self.bot,
+            "status": self.status,
+            "progress": progress,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "queue_wait_seconds": round(queue_wait, 2),
+            "duration_seconds": round(duration, 2) if duration is not None else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Bot çalıştırmalarını sınırlı sayıda worker thread üzerinde yürütür"""
+
+    def __init__(self, max_workers=MAX_CONCURRENT_JOBS, history=MAX_JOB_HISTORY):
+        self.max_workers = max_workers
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bot-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, bot_name, target):
+        """
+        Yeni iş oluşturur ve kuyruğa ekler. target(job) çağrılır, dönen dict job.result olur.
+        Aynı bot zaten kuyrukta veya çalışıyorsa mevcut iş döner (ikinci kopya başlatılmaz).
+        """
+        with self._lock:
+            active = self._find_active(bot_name)
+            if active:
+                return active, False
+
+            job = Job(bot_name)
+            self._jobs[job.id] = job
+            self._trim_history()
+
+        job.future = self._executor.submit(self._run, job, target)
+        logger.info(f"📥 İş kuyruğa eklendi: {bot_name} ({job.id})")
+        return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, status=None):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if status:
+            jobs = [job for job in jobs if job.status == status]
+        return list(reversed(jobs))
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"max_concurrency": self.max_workers, "jobs": counts}
+
+    def shutdown(self, timeout=JOB_DRAIN_TIMEOUT):
+        """
+        Kuyrukta bekleyen işleri iptal eder, çalışan işlerin bitmesini en fazla timeout sn bekler.
+        Tüm işler bittiyse True döner (tarayıcı ve yazıcı ancak bundan sonra kapatılmalı).
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.future is not None]
+
+        running = []
+        for job in jobs:
+            if job.future.cancelled():
+                job.status = "cancelled"
+                job.finished_at = datetime.now()
+            elif not job.future.done():
+                running.append(job)
+        if not running:
+            return True
+
+        logger.info(f"⏳ {len(running)} çalışan işin bitmesi bekleniyor (en fazla {timeout:.0f} sn)")
+        _, pending = wait([job.future for job in running], timeout=timeout)
+        if pending:
+            names = ", ".join(job.bot for job in running if job.future in pending)
+            logger.warning(f"⚠️ {len(pending)} iş {timeout:.0f} sn içinde bitmedi, yine de kapatılıyor: {names}")
+        return not pending
+
+    def _find_active(self, bot_name):
+        for job in self._jobs.values():
+            if job.bot == bot_name and job.status in ACTIVE_STATUSES:
+                return job
+        return None
+
+    def _trim_history(self):
+        # Sadece bitmiş işler silinir, aktif işler her zaman görünür kalır
+        while len(self._jobs) > self.history:
+            finished = next((jid for jid, j in self._jobs.items() if j.status not in ACTIVE_STATUSES), None)
+            if not finished:
+                break
+            del self._jobs[finished]
+
+    def _run(self, job, target):
+        job.status = "running"
+        job.started_at = datetime.now()
+        logger.info(f"🚀 İş başladı: {job.bot} ({job.id})")
+
+        try:
+            result = target(job) or {}
+            job.result = result
+            job.status = result.get("status", "success")
+        except Exception as e:
+            job.status = "error"
+            job.error = str(e)
+            logger.error(f"❌ İş hatası: {job.bot} ({job.id}) - {e}")
+            logger.debug(f"Stack trace:\n{traceback.format_exc()}")
+        finally:
+            job.finished_at = datetime.now()
+            logger.info(f"🏁 İş bitti: {job.bot} ({job.id}) → {job.status}")
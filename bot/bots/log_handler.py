@@ -2,31 +2,46 @@
 import logging
 import os
 
-def setup_logger(bot_name: str) -> logging.Logger:
-    logger = logging.getLogger(bot_name)
-    logger.setLevel(logging.INFO)
-
-    if logger.hasHandlers():
-        return logger  # tekrar handler ekleme
+# Docker volume altındaki path (/app/bots/../bot_logs)
+base_dir = os.path.dirname(os.path.abspath(__file__))
+LOG_DIR = os.path.join(base_dir, "..", "bot_logs")
 
-    # Docker volume altındaki path
-    log_dir = "/app/bot_logs"
-    os.makedirs(log_dir, exist_ok=True)
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 
-    log_path = os.path.join(log_dir, f"{bot_name}_latest.log")
 
-    file_handler = logging.FileHandler(log_path, encoding="utf-8")
+def setup_logger(bot_name: str, fresh: bool = True) -> logging.Logger:
+    """
+    Bot'a özel logger döner. Loglar {bot_name}_latest.log dosyasına yazılır.
+    fresh=True ise dosya her çalıştırmada sıfırlanır (API canlı log akışı bu dosyayı okur).
+    """
+    logger = logging.getLogger(bot_name)
+    logger.setLevel(logging.INFO)
+    # Aynı süreçte birden fazla bot çalıştığı için root logger'a taşma olmasın
+    logger.propagate = False
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f"{bot_name}_latest.log")
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    has_console = False
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.FileHandler):
+            if not fresh:
+                return logger  # tekrar handler ekleme
+            logger.removeHandler(handler)
+            handler.close()
+        elif isinstance(handler, logging.StreamHandler):
+            has_console = True
+
+    file_handler = logging.FileHandler(log_path, mode='w' if fresh else 'a', encoding="utf-8")
     file_handler.setLevel(logging.INFO)
-
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-
     file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-
     logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+
+    if not has_console:
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(formatter)
+        logger.addHandler(console_handler)
 
     return logger
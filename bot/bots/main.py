@@ -1,14 +1,28 @@
 from fastapi import FastAPI, HTTPException,Request
 from pydantic import BaseModel
-from typing import List
-import subprocess
+from typing import List, Optional
+import sys
 import os
 
+# Bot modülleri birbirini düz isimle import ediyor (ör. db_connection)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from job_queue import JobManager
+import browser_pool
+import db_connection
+import write_behind
+import product_writer
+import registry
+import waits
+
 app = FastAPI()
+job_manager = JobManager()
 
 
 class BotRequest(BaseModel):
     bot_name: str
+    terms: Optional[List[str]] = None   # Boşsa terms.txt kullanılır
+    options: Optional[dict] = None      # Ör. {"max_pages": 3} veya {"limit": 100}
 
 class TermsPayload(BaseModel):
     terms: List[str]
@@ -54,6 +68,18 @@ async def update_terms(payload: TermsPayload):
         raise HTTPException(status_code=500, detail=f"terms.txt güncellenemedi: {str(e)}")
 
 
+@app.get("/health")
+async def health():
+    return {
+        "status": "healthy",
+        **job_manager.stats(),
+        "browsers": browser_pool.pool_stats(),
+        "database": db_connection.db_pool_stats(),
+        "db_writer": write_behind.writer_stats(),
+        "price_logs": product_writer.price_log_stats()
+    }
+
+
 @app.get("/")
 async def root():
     return {
@@ -62,6 +88,11 @@ async def root():
             "/health",
             "/terms",
             "POST /terms",
+            "/bots",
+            "/jobs",
+            "/jobs/{job_id}",
+            "/metrics/waits",
+            "/metrics/db-writer",
             "/run-trendyol",
             "/run-n11",
             "/run-hepsiburada",
@@ -72,57 +103,112 @@ async def root():
 
 # ======================== BOT ENDPOINTLERİ ========================
 
-def run_bot_file(filepath: str, bot_name: str):
-    if not os.path.exists(filepath):
+def run_bot_file(bot_name: str, terms=None, options=None):
+    """Botu registry üzerinden iş kuyruğuna ekler ve hemen job id döner"""
+    if not registry.get_bot_class(bot_name):
         raise HTTPException(status_code=404, detail=f"{bot_name} bulunamadı")
 
-    try:
-        result = subprocess.run(
-            ["python3", filepath],
-            capture_output=True,
-            text=True,
-            timeout=900
-        )
-        return {
-            "status": "success" if result.returncode == 0 else "error",
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "bot": bot_name
-        }
-    except subprocess.TimeoutExpired:
-        return {"status": "error", "message": f"{bot_name} zaman aşımına uğradı (15 dakika)"}
-    except Exception as e:
-        return {"status": "error", "message": f"{bot_name} hatası: {str(e)}"}
+    job, created = job_manager.submit(
+        bot_name,
+        lambda job: registry.run_bot(bot_name, terms, options, progress=job.increment)
+    )
+    return {
+        "success": True,
+        "status": job.status,
+        "job_id": job.id,
+        "message": f"{bot_name} kuyruğa eklendi" if created else f"{bot_name} zaten çalışıyor",
+        "job": job.to_dict()
+    }
+
+
+@app.on_event("startup")
+def load_bots():
+    # Bot modüllerini servis açılışında bir kez yükle
+    registry.load_bots()
+
+    # İlk çalıştırma Chrome açılışını beklemesin diye havuzu önceden ısıt
+    if os.getenv("BROWSER_POOL_WARM", "1") == "1":
+        browser_pool.warm_pools()
+
+    # Botlar aynı anda başlayınca Postgres'e bağlantı yağmuru gitmesin: bağlantılar tek havuzdan kiralanır
+    db_connection.warm_db_pool()
+
+
+@app.get("/bots")
+async def list_bots():
+    return {
+        "success": True,
+        "bots": sorted(registry.BOT_REGISTRY.keys())
+    }
+
+
+@app.get("/metrics/waits")
+async def wait_metrics():
+    """Platform ve sayfa tipine göre gerçek bekleme süreleri (p50/p95/histogram)"""
+    return {"success": True, "waits": waits.wait_stats.summary()}
+
+
+@app.get("/metrics/db-writer")
+async def db_writer_metrics():
+    """Arka plan yazıcısının kuyruk derinliği ve işlem (flush) süreleri; fiyat logu tamponunun düşen satırları"""
+    return {"success": True, "db_writer": write_behind.writer_stats(), "price_logs": product_writer.price_log_stats()}
+
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None):
+    return {
+        "success": True,
+        "jobs": [job.to_dict() for job in job_manager.list(status)]
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    return {"success": True, **job.to_dict()}
+
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    # Çalışan botlar bitmeden (ya da süre dolmadan) Chrome'lar ve yazıcı kapatılmaz
+    job_manager.shutdown()
+    browser_pool.shutdown_pools()
+    # Kuyruktaki kayıtlar yazılmadan havuz kapanmasın
+    write_behind.shutdown_db_writer()
+    db_connection.shutdown_db_pool()
+
 
 @app.post("/run-trendyol")
 async def run_trendyol(request: BotRequest = BotRequest(bot_name="trendyol")):
-    return run_bot_file(f"/app/bots/{request.bot_name}.py", request.bot_name)
+    return run_bot_file(request.bot_name, request.terms, request.options)
 
 @app.post("/run-trendyol-detail")
 async def run_trendyol_detail(request: BotRequest = BotRequest(bot_name="trendyol")):
-    return run_bot_file(f"/app/bots/{request.bot_name}Detay.py", f"{request.bot_name}Detay")
+    return run_bot_file(f"{request.bot_name}-detail", request.terms, request.options)
 
 @app.post("/run-n11")
-async def run_n11():
-    return run_bot_file("/app/bots/n11.py", "n11")
+async def run_n11(request: BotRequest = BotRequest(bot_name="n11")):
+    return run_bot_file("n11", request.terms, request.options)
 
 @app.post("/run-n11-detail")
-async def run_n11_detail():
-    return run_bot_file("/app/bots/n11Detay.py", "n11Detay")
+async def run_n11_detail(request: BotRequest = BotRequest(bot_name="n11")):
+    return run_bot_file("n11-detail", request.terms, request.options)
 
 @app.post("/run-hepsiburada")
 async def run_hepsiburada(request: BotRequest = BotRequest(bot_name="hepsiburada")):
-    return run_bot_file(f"/app/bots/{request.bot_name}.py", request.bot_name)
+    return run_bot_file(request.bot_name, request.terms, request.options)
 
 @app.post("/run-hepsiburada-detail")
 async def run_hepsiburada_detail(request: BotRequest = BotRequest(bot_name="hepsiburada")):
-    return run_bot_file(f"/app/bots/{request.bot_name}Detay.py", f"{request.bot_name}Detay")
+    return run_bot_file(f"{request.bot_name}-detail", request.terms, request.options)
 
 @app.post("/run-avansas")
 async def run_avansas(request: BotRequest = BotRequest(bot_name="avansas")):
-    return run_bot_file(f"/app/bots/{request.bot_name}.py", request.bot_name)
+    return run_bot_file(request.bot_name, request.terms, request.options)
 
 
 @app.post("/run-avansas-detail")
 async def run_avansas_detail(request: BotRequest = BotRequest(bot_name="avansas")):
-    return run_bot_file(f"/app/bots/{request.bot_name}Detay.py", f"{request.bot_name}Detay")
\ No newline at end of file
+    return run_bot_file(f"{request.bot_name}-detail", request.terms, request.options)
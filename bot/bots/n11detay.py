@@ -1,197 +1,33 @@
 # bots/n11detay.py
 
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import time
-import re
 import traceback
 from datetime import datetime
-from db_connection import get_db_connection
+from db_connection import get_db_connection, pipeline
+from base_bot import BaseBot
+from registry import register_bot
+from browser_pool import acquire_driver
+from fetch_engine import FetchEngine
+from extraction_specs import extract_detail, log_details, page_records
 import logging
-import os
-
-# === Loglama ayarları ===
-base_dir = os.path.dirname(os.path.abspath(__file__))
-log_dir = os.path.join(base_dir, "..", "bot_logs")
-os.makedirs(log_dir, exist_ok=True)
-
-log_path = os.path.join(log_dir, "n11-detail_latest.log")
-
-# Logger ayarla
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_path, mode='w', encoding="utf-8"),  # Her seferinde üzerine yaz
-        logging.StreamHandler()
-    ]
-)
-
-logger = logging.getLogger(__name__)
-
-# === PostgreSQL bağlantısı ===
-try:
-    conn = get_db_connection()
-    logger.info("✅ Veritabanı bağlantısı başarılı")
-except Exception as e:
-    logger.error(f"❌ Veritabanı bağlantı hatası: {e}")
-    raise
-
-# İstatistikleri takip et
-processed_count = 0
-error_count = 0
-error_products = []
-
-def setup_chrome_driver():
-    """Chrome driver'ı ayarla ve başlat"""
-    try:
-        options = uc.ChromeOptions()
-        options.add_argument("--headless=new")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        driver = uc.Chrome(
-            options=options,
-            browser_executable_path="/usr/bin/chromium",
-            driver_executable_path="/usr/bin/chromedriver"
-        )
-        logger.info("✅ Chrome driver başlatıldı")
-        return driver
-    except Exception as e:
-        logger.error(f"❌ Chrome driver başlatma hatası: {e}")
-        return None
 
-def extract_product_details(driver, url, product_id):
-    """Ürün detaylarını çıkar"""
-    try:
-        driver.get(url)
-        logger.info("⏳ Sayfa yükleniyor...")
-        
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        time.sleep(2)
-        
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        logger.info("✅ Sayfa başarıyla yüklendi")
-
-        # === Açıklama ===
-        desc_elem = soup.select_one(".unf-info-context .unf-info-desc")
-        description = desc_elem.get_text(strip=True) if desc_elem else ""
-        logger.info(f"📝 Açıklama: {'Bulundu' if description else 'Bulunamadı'}")
-
-        # === Mağaza bilgileri ===
-        store_elem = soup.select_one(".unf-p-seller-name")
-        store_name = store_elem.get_text(strip=True) if store_elem else ""
-        logger.info(f"🏪 Mağaza: {store_name or 'Bulunamadı'}")
-
-        # === Mağaza puanı ===
-        store_rating = 0.0
-        rating_span = soup.select_one(".point")
-        if rating_span:
-            try:
-                rating_text = rating_span.get_text(strip=True).replace(",", ".")
-                store_rating = float(re.findall(r"\d+\.?\d*", rating_text)[0])
-                logger.info(f"⭐ Mağaza puanı: {store_rating}")
-            except Exception as e:
-                logger.warning(f"⚠️ Mağaza puanı parse edilemedi: {e}")
-
-        # === Kargo bilgisi ===
-        shipping_info = ""
-        kargo_elem = soup.select_one(".cargo") or soup.select_one(".cargo-new")
-        if kargo_elem:
-            shipping_info = kargo_elem.get_text(strip=True)
-            logger.info(f"🚚 Kargo: {shipping_info}")
-        else:
-            logger.warning("⚠️ Kargo bilgisi bulunamadı")
-
-        free_shipping = "ücretsiz" in shipping_info.lower()
-        logger.info(f"📦 Ücretsiz kargo: {'Evet' if free_shipping else 'Hayır'}")
-
-        # === Ürün puanı ===
-        rating = None
-        rating_elem = soup.select_one(".ratingScore")
-        if rating_elem:
-            try:
-                rating = float(rating_elem.get_text(strip=True).replace(",", "."))
-                logger.info(f"⭐ Ürün puanı: {rating}")
-            except Exception as e:
-                logger.warning(f"⚠️ Ürün puanı parse edilemedi: {e}")
-
-        # === Kategori ===
-        category = ""
-        breadcrumb = soup.select("#breadCrumb ul li a")
-        if len(breadcrumb) >= 2:
-            category = breadcrumb[-2].get_text(strip=True)
-            logger.info(f"🏷️ Kategori: {category}")
-        else:
-            logger.warning("⚠️ Kategori bulunamadı")
-
-        # === Görsel URL ===
-        image_url = ""
-        image_selectors = [
-            ".unf-p-img-box-big img",
-            ".imgObj img",
-            ".product-image img",
-            ".proDetailCarousel img"
-        ]
-        
-        for selector in image_selectors:
-            image_container = soup.select_one(selector)
-            if image_container:
-                image_url = (image_container.get("src") or 
-                           image_container.get("data-src") or 
-                           image_container.get("data-original"))
-                if image_url:
-                    logger.info(f"🖼️ Görsel URL: {image_url}")
-                    break
-        
-        if not image_url:
-            logger.warning("⚠️ Görsel URL bulunamadı")
-
-        details = {
-            "description": description,
-            "store_name": store_name,
-            "shipping_info": shipping_info,
-            "free_shipping": free_shipping,
-            "rating": rating,
-            "product_type": category,
-            "image_url": image_url or "Görsel bulunamadı",
-            "store_rating": store_rating
-        }
-
-        # === Ürün özellikleri ===
-        attributes = {}
-        
-        # Yeni stil özellik listesi
-        rows = soup.select(".unf-prop-list .unf-prop-list-item")
-        for row in rows:
-            name = row.select_one(".unf-prop-list-title")
-            value = row.select_one(".unf-prop-list-prop")
-            if name and value:
-                attributes[name.get_text(strip=True)] = value.get_text(strip=True)
-
-        # Eski stil tablo özellikleri
-        tables = soup.select(".productFeatures table tr, .specifications table tr")
-        for row in tables:
-            cells = row.select("td")
-            if len(cells) >= 2:
-                key = cells[0].get_text(strip=True)
-                val = cells[1].get_text(strip=True)
-                if key and val:
-                    attributes[key] = val
-
-        logger.info(f"📋 {len(attributes)} özellik bulundu")
-        return details, attributes
+logger = logging.getLogger("n11-detail")
 
-    except Exception as e:
-        logger.error(f"❌ Ürün detayları çıkarılırken hata: {e}")
-        logger.error(f"Stack trace:\n{traceback.format_exc()}")
-        raise
+def setup_chrome_driver(timeout=None):
+    """Havuzdan sıcak Chrome oturumu kirala (bkz. browser_pool); timeout=0 → boş tarayıcı yoksa beklemeden None"""
+    return acquire_driver("uc", logger=logger, platform="n11", timeout=timeout)
+
+def extract_product_details(soup):
+    """Getirilmiş ürün sayfasından detayları ve özellikleri çıkar (bkz. extraction_specs)"""
+    return split_details(extract_detail("n11", soup))
+
+def split_details(details):
+    """Çıkarılmış alanları loglar, (details, attributes) olarak ayırır"""
+    # Yeni stil özellik listesi + eski stil tablo; aynı ad tekrar ederse tablodaki kazanır
+    attributes = {item["name"]: item["value"]
+                  for item in details.pop("attributes", []) + details.pop("table_attributes", [])}
+    log_details(logger, details)
+    logger.info(f"📋 {len(attributes)} özellik bulundu")
+    return details, attributes
 
 def insert_product_detail(cur, product_id, details):
     """Ürün detaylarını veritabanına ekle"""
@@ -243,111 +79,140 @@ def insert_product_attributes(cur, product_id, attributes):
         logger.error(f"❌ Ürün özellikleri kaydedilirken hata: {e}")
         raise
 
-def run_n11_detay_bot():
-    """Ana bot fonksiyonu"""
-    global processed_count, error_count, error_products
-    
-    logger.info("🚀 n11 detay botu başlatılıyor...")
-    
-    driver = setup_chrome_driver()
-    if not driver:
-        logger.error("❌ Chrome başlatılamadı, bot sonlandırılıyor")
-        return
+@register_bot
+class N11DetailBot(BaseBot):
+    name = "n11-detail"
+    platform = "n11"
+    display_name = "n11 detay botu"
+
+    def run(self, terms=None, options=None):
+        """Tüm n11 ürünlerinin detaylarını günceller (terms kullanılmaz)"""
+        options = options or {}
+        self.start()
+
+        # === PostgreSQL bağlantısı ===
+        try:
+            conn = get_db_connection(self.name)
+            self.logger.info("✅ Veritabanı bağlantısı başarılı")
+        except Exception as e:
+            self.logger.error(f"❌ Veritabanı bağlantı hatası: {e}")
+            return self.result("error")
+
+        # Eşzamanlı sayfa getirici (browser modunda ilk Chrome hemen kiralanır)
+        engine = FetchEngine("n11", "detail", setup_chrome_driver, mode=options.get("fetch_mode"),
+                             concurrency=options.get("concurrency"), window=options.get("window"),
+                             parser=options.get("parser"),
+                             lean=options.get("lean"), parse_workers=options.get("parse_workers"),
+                             logger=self.logger)
+        if not engine.open():
+            self.logger.error("❌ Chrome başlatılamadı, bot sonlandırılıyor")
+            conn.close()
+            return self.result("error")
+
+        status = "success"
+        try:
+            with conn.cursor() as cur:
+                # Detayı alınmamış ürünleri çek
+                cur.execute("""
+                    SELECT id, product_link FROM products
+                    WHERE platform = 'n11'
+                      AND product_link IS NOT NULL
+                    ORDER BY id;
+                """)
+                products = cur.fetchall()
+                if options.get("limit"):
+                    products = products[:int(options["limit"])]
+                total_products = len(products)
+
+                self.logger.info(f"📊 Toplam {total_products} ürün bulundu")
+
+                if not products:
+                    self.logger.warning("⚠️ İşlenecek ürün bulunamadı")
+
+                requests = []
+                for index, row in enumerate(products, 1):
+                    pid = row['id']
+                    url = row['product_link']
 
-    try:
-        with conn.cursor() as cur:
-            # Detayı alınmamış ürünleri çek
-            cur.execute("""
-                SELECT id, product_link FROM products
-        WHERE platform = 'n11'
-          AND product_link IS NOT NULL
-        ORDER BY id;
-            """)
-            products = cur.fetchall()
-            total_products = len(products)
-            
-            logger.info(f"📊 Toplam {total_products} ürün bulundu")
-
-            if not products:
-                logger.warning("⚠️ İşlenecek ürün bulunamadı")
-                return
-
-            for index, row in enumerate(products, 1):
-                pid = row['id']
-                url = row['product_link']
-
-                logger.info(f"\n{'='*60}")
-                logger.info(f"🔍 İşleniyor [{index}/{total_products}]: Product ID {pid}")
-                logger.info(f"📌 URL: {url}")
-
-                try:
                     if not url or not url.startswith("http"):
-                        logger.warning(f"⚠️ Geçersiz URL atlandı: {url}")
+                        self.logger.warning(f"⚠️ Geçersiz URL atlandı: {url}")
                         continue
 
-                    details, attributes = extract_product_details(driver, url, pid)
-                    insert_product_detail(cur, pid, details)
-                    insert_product_attributes(cur, pid, attributes)
-                    conn.commit()
-                    
-                    processed_count += 1
-                    logger.info(f"✅ Product ID {pid} başarıyla güncellendi")
-                    
-                    # Rate limiting
-                    time.sleep(2)
-                    
-                except Exception as e:
-                    error_count += 1
-                    error_products.append({
-                        'product_id': pid,
-                        'url': url,
-                        'error': str(e)
-                    })
-                    logger.error(f"❌ Product ID {pid} işlenirken hata: {e}")
-                    logger.error(f"Stack trace:\n{traceback.format_exc()}")
-                    
-                    conn.rollback()
-                    
-                    # Kritik hata kontrolü
-                    if "chrome not reachable" in str(e).lower():
-                        logger.error("🚨 Chrome erişilemiyor, bot durduruluyor!")
-                        break
-                    
-                    continue
+                    requests.append((url, (index, pid)))
 
-    except Exception as e:
-        logger.error(f"🚨 Genel hata: {e}")
-        logger.error(f"Stack trace:\n{traceback.format_exc()}")
-    
-    finally:
-        # Özet rapor
-        logger.info(f"\n{'='*60}")
-        logger.info("📊 ÖZET RAPOR")
-        logger.info(f"✅ Başarıyla işlenen: {processed_count}")
-        logger.info(f"❌ Hatalı: {error_count}")
-        logger.info(f"📈 Toplam: {processed_count + error_count}")
-        
-        if error_products:
-            logger.info("\n❌ HATALI ÜRÜNLER:")
-            for error_product in error_products[:10]:
-                logger.info(f"- Product ID: {error_product['product_id']}")
-                logger.info(f"  URL: {error_product['url']}")
-                logger.info(f"  Hata: {error_product['error']}")
-        
-        # Temizlik
-        try:
-            driver.quit()
-            logger.info("✅ Chrome driver kapatıldı")
-        except:
-            logger.warning("⚠️ Chrome driver kapatılamadı")
-        
+                def handle(url, context, result, error):
+                    nonlocal status
+                    index, pid = context
+                    self.logger.info(f"\n{'='*60}")
+                    self.logger.info(f"🔍 İşleniyor [{index}/{total_products}]: Product ID {pid}")
+                    self.logger.info(f"📌 URL: {url}")
+
+                    if not self.process_product(conn, cur, pid, url, result, error):
+                        self.logger.error("🚨 Chrome erişilemiyor, bot durduruluyor!")
+                        status = "error"
+                        engine.cancel()
+
+                # Sonraki ürün yüklenirken mevcut ürün parse edilip kaydedilir
+                engine.run(requests, handle)
+
+        except Exception as e:
+            status = "error"
+            self.logger.error(f"🚨 Genel hata: {e}")
+            self.logger.error(f"Stack trace:\n{traceback.format_exc()}")
+
+        finally:
+            self.log_summary()
+
+            # Temizlik
+            try:
+                self.report_fetcher(engine)
+                engine.close(broken=(status == "error"))
+                self.logger.info("✅ Chrome oturumu havuza iade edildi")
+            except:
+                self.logger.warning("⚠️ Chrome oturumu iade edilemedi")
+
+            try:
+                conn.close()
+                self.logger.info("✅ Veritabanı bağlantısı kapatıldı")
+            except:
+                self.logger.warning("⚠️ Veritabanı bağlantısı kapatılamadı")
+
+            self.logger.info(f"\n🎉 n11 detay botu tamamlandı!")
+
+        return self.result(status)
+
+    def process_product(self, conn, cur, pid, url, result, error=None):
+        """Getirilen ürün sayfasının detayını kaydet; Chrome erişilemezse False döner"""
         try:
-            conn.close()
-            logger.info("✅ Veritabanı bağlantısı kapatıldı")
-        except:
-            logger.warning("⚠️ Veritabanı bağlantısı kapatılamadı")
-        
-        logger.info(f"\n🎉 n11 detay botu tamamlandı!")
+            # Sayfa getirilemediyse hatayı burada raporla
+            if error:
+                raise error
+            # Alanlar çıkarım havuzunda hazırlanmış olarak gelir (bkz. parse_pool)
+            details, attributes = split_details(page_records(result)["details"])
+            # Detay ve özellik ifadeleri tek turda gönderilir (bkz. db_connection.pipeline)
+            with pipeline(cur) as pipe:
+                insert_product_detail(pipe, pid, details)
+                insert_product_attributes(pipe, pid, attributes)
+            conn.commit()
+
+            self.mark_processed()
+            self.logger.info(f"✅ Product ID {pid} başarıyla güncellendi")
+            return True
+
+        except Exception as e:
+            self.mark_error(product_id=pid, url=url, error=str(e))
+            self.logger.error(f"❌ Product ID {pid} işlenirken hata: {e}")
+            self.logger.error(f"Stack trace:\n{traceback.format_exc()}")
+
+            conn.rollback()
+
+            # Kritik hata kontrolü
+            return "chrome not reachable" not in str(e).lower()
+
+
+def run_n11_detay_bot(terms=None, options=None):
+    return N11DetailBot().run(terms, options)
+
 
 if __name__ == "__main__":
-    run_n11_detay_bot()
\ No newline at end of file
+    run_n11_detay_bot()
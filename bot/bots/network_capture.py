@@ -0,0 +1,133 @@
+# bots/network_capture.py
+"""
+Tarayıcının XHR/fetch ile aldığı ürün JSON'larını CDP Network olaylarından yakalar.
+Eşleşen yanıtların gövdesi Network.getResponseBody ile alınır, çözülüp sayfanın
+durumu olarak extraction_specs'teki "json" kurallarına verilir; DOM hiç kurulmaz.
+Olaylar, engelleme raporuyla aynı performance logundan okunur (bkz. request_blocking).
+Sonsuz kaydırma API'si sayfa yüklenirken sonraki sayfayı da isteyebilir; kuralda page_param
+varsa sadece istenen sayfanın yanıtı kabul edilir, diğerleri yok sayılır (kartlar DOM'dan okunur).
+"""
+
+import os
+import re
+import base64
+from urllib.parse import urlparse, parse_qs
+import logging
+
+from embedded_state import loads
+from extraction import compile_path, resolve_path
+
+logger = logging.getLogger("network_capture")
+
+# Varsayılan kapalı: trendyol eşlemesi gerçek bir yanıt kaydıyla doğrulanana kadar kartlar DOM'dan okunur
+CAPTURE_ENABLED = os.getenv("NETWORK_CAPTURE", "0") not in ("0", "false", "no")
+
+# Platform + sayfa tipi başına yakalanacak API yanıtları:
+#   url:   yanıt adresinde aranan düzenli ifade
+#   cards: ürün listesinin yanıttaki yolu; birden çok yanıt bu listede birleştirilir
+#   page_param: sayfa numarasının sorgu parametresi; yanıt adresindeki değer sayfanınkiyle aynı olmalı
+CAPTURE_RULES = {
+    # Sonsuz kaydırmada sonraki ürünler arama ağ geçidinden JSON olarak gelir
+    ("trendyol", "listing"): {
+        "url": r"/discovery-web-searchgw-service/v\d+/api/infinite-scroll/",
+        "cards": "result.products",
+        "page_param": "pi",
+    },
+}
+
+
+def get_capture_rule(platform, page_type, override=None):
+    """
+    Yakalama kuralı ya da None.
+    Öncelik: bot options → NETWORK_CAPTURE ortam değişkeni ("1" açar) → kapalı
+    """
+    enabled = override if override is not None else CAPTURE_ENABLED
+    return CAPTURE_RULES.get((platform, page_type)) if enabled else None
+
+
+def page_number(url, param):
+    """Adresin sorgusundaki sayfa numarası; parametre yoksa ilk sayfa"""
+    values = parse_qs(urlparse(url).query).get(param)
+    try:
+        return int(values[0]) if values else 1
+    except ValueError:
+        return None
+
+
+def merge_payloads(payloads, cards):
+    """Yanıtları ilkinin üzerinde birleştirir: her yanıtın ürün listesi sırayla eklenir"""
+    if not payloads:
+        return None
+    path = compile_path(cards)
+    merged = payloads[0]
+    products = resolve_path(merged, path)
+    if not isinstance(products, list):
+        return merged
+    for payload in payloads[1:]:
+        more = resolve_path(payload, path)
+        if isinstance(more, list):
+            products.extend(more)
+    return merged
+
+
+class NetworkCapture:
+    """
+    Bir sayfa yüklemesi boyunca url kalıbına uyan JSON yanıtlarını toplar.
+    feed() performance logundan okunmuş Network mesajlarını alır; yanıt tamamen
+    indiğinde (loadingFinished) gövde tek bir CDP çağrısıyla istenir.
+    page_url verilirse ve kuralda page_param varsa başka sayfanın yanıtı alınmaz (skipped sayılır).
+    """
+
+    def __init__(self, rule, page_url=None):
+        self.rule = rule
+        self.pattern = re.compile(rule["url"])
+        self.page_param = rule.get("page_param")
+        self.page = page_number(page_url, self.page_param) if page_url and self.page_param else None
+        self.payloads = []
+        self.failed = 0
+        self.skipped = 0
+        self._pending = {}
+
+    def feed(self, driver, messages):
+        for message in messages:
+            method = message.get("method")
+            params = message.get("params", {})
+            request_id = params.get("requestId")
+
+            if method == "Network.responseReceived":
+                response = params.get("response", {})
+                if self.pattern.search(response.get("url", "")) and "json" in response.get("mimeType", ""):
+                    if self._same_page(response["url"]):
+                        self._pending[request_id] = response["url"]
+                    else:
+                        self.skipped += 1
+                        logger.debug(f"Başka sayfanın yanıtı yok sayıldı: {response['url']}")
+            elif method == "Network.loadingFinished" and request_id in self._pending:
+                url = self._pending.pop(request_id)
+                payload = self._body(driver, request_id, url)
+                if payload is not None:
+                    self.payloads.append(payload)
+            elif method == "Network.loadingFailed":
+                self._pending.pop(request_id, None)
+
+    def _same_page(self, url):
+        if self.page is None:
+            return True
+        return page_number(url, self.page_param) == self.page
+
+    def _body(self, driver, request_id, url):
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            text = body.get("body", "")
+            if body.get("base64Encoded"):
+                text = base64.b64decode(text)
+            return loads(text)
+        except Exception as e:
+            # Gövde tarayıcı tamponundan düşmüş ya da JSON değil: sayfa DOM'dan okunur
+            self.failed += 1
+            logger.debug(f"Yanıt gövdesi alınamadı: {url} - {e}")
+            return None
+
+    def result(self):
+        """Birleştirilmiş yanıt ya da hiç yakalanmadıysa None"""
+        return merge_payloads(self.payloads, self.rule["cards"])
@@ -0,0 +1,80 @@
+# bots/parse_pool.py
+"""
+Sayfa çıkarımını (parse + alan çıkarımı) ayrı süreçlerde çalıştıran havuz.
+Ham HTML gider, kompakt kayıtlar döner (bkz. extraction_specs.extract_page); böylece
+tarayıcı bir sonraki sayfayı yüklerken önceki sayfa başka bir çekirdekte işlenir.
+Aynı süreçteki tüm botlar tek havuzu paylaşır.
+"""
+
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from fetcher import FetchResult
+from extraction_specs import extract_page
+
+logger = logging.getLogger("parse_pool")
+
+# Varsayılan süreç sayısının üst sınırı: her süreç lxml / selectolax'ı yeniden yükler
+# ve Chrome havuzuyla aynı çekirdekleri paylaşır
+PARSE_WORKERS_CAP = 4
+
+
+def _usable_cpus():
+    """Sürece ayrılmış çekirdek sayısı (konteyner / affinity sınırı); desteklenmiyorsa host çekirdekleri"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Çıkarım süreci sayısı; 0 ise çıkarım tüketici thread'inde yapılır (eski davranış).
+# Varsayılan: kullanılabilir çekirdek - 1, en fazla PARSE_WORKERS_CAP
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(max(0, min(PARSE_WORKERS_CAP, _usable_cpus() - 1)))))
+# Selenium / iş kuyruğu thread'leri varken fork güvenli değil; varsayılan spawn
+PARSE_START_METHOD = os.getenv("PARSE_START_METHOD", "spawn")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_workers(override=None):
+    """Öncelik: bot options → PARSE_WORKERS ortam değişkeni → kullanılabilir çekirdek - 1 (en fazla 4)"""
+    return max(0, int(override if override is not None else PARSE_WORKERS))
+
+
+def get_parse_pool(workers=None):
+    """Paylaşılan havuz; ilk çağrıda o çağrının süreç sayısıyla kurulur, 0 ise None"""
+    global _pool
+    workers = get_parse_workers(workers)
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        # Bir süreç çökerse havuz kalıcı olarak bozulur; sonraki çağrıda yenisi kurulur
+        if _pool is not None and getattr(_pool, "_broken", False):
+            logger.warning("⚠️ Çıkarım havuzu bozulmuş, yeniden kuruluyor")
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context(PARSE_START_METHOD))
+            logger.info(f"🧵 Çıkarım havuzu açıldı ({workers} süreç, {PARSE_START_METHOD})")
+        return _pool
+
+
+def parse_page(platform, page_type, html, parser=None, subtree=None, state_locator=None):
+    """Havuz süreçlerinde çalışır: ham HTML → extract_page kayıtları (soup süreçten çıkmaz)"""
+    page = FetchResult(None, html, None, True, 0.0, parser=parser, subtree=subtree, state_locator=state_locator,
+                       platform=platform, page_type=page_type)
+    return extract_page(platform, page_type, page)
+
+
+@atexit.register
+def shutdown_parse_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,332 @@
+# bots/parser_bench.py
+"""
+Parser benchmark: kaydedilmiş HTML sayfaları (varsayılan bot/debug) üzerinde her
+platformun liste / detay çıkarımını her parser backend'i ile çalıştırır.
+
+    python parser_bench.py --output bench.json
+    python parser_bench.py --backends lxml selectolax --repeat 3 --compare bench_eski.json
+
+Rapor: sayfa/sn, p50/p95 sayfa süresi (parse + çıkarım), sayfa başına tepe bellek
+(tracemalloc, sadece Python heap'i) ve alan bazında dolu / referanstan farklı sayıları.
+JSON çıktısı commit'ler arası karşılaştırma içindir.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import statistics
+import tracemalloc
+from datetime import datetime
+
+from fetcher import has_ready_selectors
+from parsers import PARSER_BACKENDS, HAS_SELECTOLAX, HAS_LXML, parse_html, get_subtree_filter
+from embedded_state import find_state, get_state_locator
+from extraction_specs import find_state_cards
+from waits import READY_SELECTORS
+
+import trendyol
+import hepsiburada
+import avansas
+import n11
+import trendyolDetay
+import hepsiburadaDetay
+import avansasDetay
+import n11detay
+
+logger = logging.getLogger("parser_bench")
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "debug")
+# Alan farkları bu backend'e göre hesaplanır (botların tarihsel olarak kullandığı parser)
+REFERENCE_BACKEND = "html.parser"
+
+# Sayfanın hangi platforma ait olduğu kanonik adresten anlaşılır
+PLATFORM_HOSTS = {
+    "trendyol": "trendyol.com",
+    "hepsiburada": "hepsiburada.com",
+    "avansas": "avansas.com",
+    "n11": "n11.com",
+}
+
+LISTING_MODULES = {"trendyol": trendyol, "hepsiburada": hepsiburada, "avansas": avansas, "n11": n11}
+
+
+def _extract_listing(platform_name, module):
+    def extract(doc, state):
+        cards = find_state_cards(platform_name, state) or module.find_product_cards(doc)
+        cards = [module.parse_product_card(card) for card in cards]
+        cards = [card for card in cards if card]
+        fields = {"cards": len(cards)}
+        # Kart alanları: kaç kartta dolu
+        for card in cards:
+            for key, value in card.items():
+                fields[key] = fields.get(key, 0) + (1 if value not in (None, "", 0, 0.0) else 0)
+        return fields
+    return extract
+
+
+def _flatten_details(result):
+    """(details, attributes) veya sadece details → tek seviyeli alan sözlüğü"""
+    details, attributes = result if isinstance(result, tuple) else (result, None)
+    fields = dict(details)
+    if attributes is not None:
+        fields["attributes"] = len(attributes)
+    return fields
+
+
+EXTRACTORS = {
+    **{(plat, "listing"): _extract_listing(plat, module) for plat, module in LISTING_MODULES.items()},
+    ("trendyol", "detail"): lambda doc, state: _flatten_details(trendyolDetay.extract_product_details(doc)),
+    ("hepsiburada", "detail"): lambda doc, state: _flatten_details(hepsiburadaDetay.extract_product_details(doc, state)),
+    ("avansas", "detail"): lambda doc, state: _flatten_details(avansasDetay.extract_product_details(doc)),
+    ("n11", "detail"): lambda doc, state: _flatten_details(n11detay.extract_product_details(doc)),
+}
+
+
+def available_backends():
+    return [b for b in PARSER_BACKENDS
+            if not (b == "selectolax" and not HAS_SELECTOLAX) and not (b == "lxml" and not HAS_LXML)]
+
+
+def detect_page(html):
+    """(platform, page_type) tahmini: host sayımı + hazır olma seçicileri; emin olunamazsa detay"""
+    head = html[:200000]
+    platform_name = max(PLATFORM_HOSTS, key=lambda p: head.count(PLATFORM_HOSTS[p]))
+    if head.count(PLATFORM_HOSTS[platform_name]) == 0:
+        return None
+
+    # Detay sayfalarında öneri karuselleri liste kartlarına benzer; detay seçicisinden biri yeterli
+    doc = parse_html(html, "lxml" if HAS_LXML else "html.parser")
+    detail_selectors = READY_SELECTORS.get((platform_name, "detail"), [])
+    if any(doc.select_one(selector) is not None for selector in detail_selectors):
+        return platform_name, "detail"
+    if has_ready_selectors(doc, platform_name, "listing"):
+        return platform_name, "listing"
+    return platform_name, "detail"
+
+
+def load_corpus(corpus, limit=None):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus, "*.html")))[:limit]:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            html = f.read()
+        kind = detect_page(html)
+        if kind is None:
+            logger.warning(f"⚠️ Platform tespit edilemedi, atlanıyor: {os.path.basename(path)}")
+            continue
+        pages.append({"file": os.path.basename(path), "kind": kind, "html": html, "bytes": len(html.encode("utf-8"))})
+    return pages
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_page(page, backend, subtree=False, state=False):
+    """
+    Tek sayfa: (parse_sn, toplam_sn, alanlar, hata). subtree: liste sayfalarında sadece
+    kartlar parse edilir; state: gömülü JSON önce çözülür (liste kartları oradan gelirse DOM kurulmaz).
+    """
+    platform_name, page_type = page["kind"]
+    subtree_filter = get_subtree_filter(platform_name, page_type, override=True) if subtree else None
+    started = time.perf_counter()
+    embedded = find_state(page["html"], get_state_locator(platform_name, page_type, override=True)) if state else None
+    if page_type == "listing" and find_state_cards(platform_name, embedded):
+        doc = None
+    else:
+        doc = parse_html(page["html"], backend, subtree_filter)
+    parsed = time.perf_counter()
+    try:
+        fields, error = EXTRACTORS[page["kind"]](doc, embedded), None
+    except Exception as e:
+        fields, error = {}, f"{type(e).__name__}: {e}"
+    return parsed - started, time.perf_counter() - started, fields, error
+
+
+def measure_memory(page, backend, subtree=False, state=False):
+    """Parse + çıkarım sırasındaki tepe Python heap kullanımı (byte)"""
+    tracemalloc.start()
+    try:
+        run_page(page, backend, subtree, state)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_backend(pages, backend, repeat=1, memory=True, subtree=False, state=False):
+    parse_times, total_times, peaks, errors = [], [], [], 0
+    results = {}
+
+    wall_started = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            parse_s, total_s, fields, error = run_page(page, backend, subtree, state)
+            parse_times.append(parse_s)
+            total_times.append(total_s)
+            errors += bool(error)
+            results[page["file"]] = {"kind": page["kind"], "fields": fields, "error": error}
+    wall = time.perf_counter() - wall_started
+
+    if memory:
+        peaks = [measure_memory(page, backend, subtree, state) for page in pages]
+
+    return {
+        "pages": len(pages) * repeat,
+        "pages_per_sec": round(len(pages) * repeat / wall, 2) if wall else None,
+        "mb_per_sec": round(sum(p["bytes"] for p in pages) * repeat / wall / (1024 * 1024), 2) if wall else None,
+        "parse_ms": {"p50": _ms(_percentile(parse_times, 50)), "p95": _ms(_percentile(parse_times, 95))},
+        "page_ms": {"p50": _ms(_percentile(total_times, 50)), "p95": _ms(_percentile(total_times, 95)),
+                    "mean": _ms(statistics.fmean(total_times)) if total_times else None},
+        "peak_memory_kb": {"max": round(max(peaks) / 1024, 1), "mean": round(statistics.fmean(peaks) / 1024, 1)} if peaks else None,
+        "errors": errors,
+    }, results
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def field_report(results, reference):
+    """Platform/sayfa tipi başına: alan dolu sayısı ve referans backend'den farklı çıkan sayfa sayısı"""
+    report = {}
+    for file_name, page in results.items():
+        key = ":".join(page["kind"])
+        entry = report.setdefault(key, {"pages": 0, "errors": 0, "filled": {}, "mismatches": {}})
+        entry["pages"] += 1
+        entry["errors"] += bool(page["error"])
+        reference_fields = (reference or {}).get(file_name, {}).get("fields", {})
+        for name, value in page["fields"].items():
+            entry["filled"][name] = entry["filled"].get(name, 0) + (1 if value not in (None, "", 0, 0.0) else 0)
+            if reference is not None and reference_fields.get(name) != value:
+                entry["mismatches"][name] = entry["mismatches"].get(name, 0) + 1
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def run_benchmark(corpus=DEFAULT_CORPUS, backends=None, repeat=1, limit=None, memory=True, subtree=False,
+                  state=False):
+    backends = backends or available_backends()
+    pages = load_corpus(corpus, limit)
+    kinds = {}
+    for page in pages:
+        key = ":".join(page["kind"])
+        kinds[key] = kinds.get(key, 0) + 1
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "corpus": os.path.abspath(corpus),
+            "pages": len(pages),
+            "corpus_mb": round(sum(p["bytes"] for p in pages) / (1024 * 1024), 2),
+            "kinds": kinds,
+            "repeat": repeat,
+            "reference_backend": REFERENCE_BACKEND,
+            "memory": "tracemalloc (Python heap)" if memory else None,
+            "subtree": subtree,
+            "embedded_state": state,
+        },
+        "backends": {},
+    }
+
+    # Çıkarımların logları ölçümü bozmasın
+    logging.disable(logging.CRITICAL)
+    try:
+        all_results = {}
+        for backend in backends:
+            summary, all_results[backend] = bench_backend(pages, backend, repeat, memory, subtree, state)
+            report["backends"][backend] = summary
+    finally:
+        logging.disable(logging.NOTSET)
+
+    reference = all_results.get(REFERENCE_BACKEND)
+    for backend, results in all_results.items():
+        report["backends"][backend]["fields"] = field_report(results, reference if backend != REFERENCE_BACKEND else None)
+    return report
+
+
+def compare(report, baseline):
+    """Önceki JSON'a göre sayfa/sn ve p95 değişimlerini loglar"""
+    logger.info(f"📊 Karşılaştırma: {baseline['meta'].get('commit')} → {report['meta'].get('commit')}")
+    for backend, current in report["backends"].items():
+        previous = baseline.get("backends", {}).get(backend)
+        if not previous:
+            continue
+        speed = _change(previous["pages_per_sec"], current["pages_per_sec"])
+        p95 = _change(previous["page_ms"]["p95"], current["page_ms"]["p95"])
+        logger.info(f"   {backend:<12} sayfa/sn {speed:+.1f}%  p95 {p95:+.1f}%")
+
+
+def _change(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def log_report(report):
+    meta = report["meta"]
+    logger.info(f"📂 {meta['pages']} sayfa ({meta['corpus_mb']} MB): {meta['kinds']}")
+    for backend, summary in report["backends"].items():
+        memory = summary["peak_memory_kb"]
+        logger.info(
+            f"⚙️ {backend:<12} {summary['pages_per_sec']:>8} sayfa/sn  "
+            f"p50 {summary['page_ms']['p50']} ms  p95 {summary['page_ms']['p95']} ms  "
+            f"parse p50 {summary['parse_ms']['p50']} ms"
+            + (f"  tepe bellek {memory['max']} KB" if memory else "")
+            + (f"  ❌ {summary['errors']} hata" if summary["errors"] else "")
+        )
+        for kind, fields in summary["fields"].items():
+            if fields["mismatches"]:
+                logger.warning(f"   ⚠️ {kind}: referanstan farklı alanlar {fields['mismatches']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTML parser backend benchmark")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="*.html sayfalarının bulunduğu klasör")
+    parser.add_argument("--backends", nargs="+", choices=PARSER_BACKENDS, help="varsayılan: kurulu olanların hepsi")
+    parser.add_argument("--repeat", type=int, default=1, help="korpusun kaç kez çalıştırılacağı")
+    parser.add_argument("--limit", type=int, help="en fazla bu kadar sayfa")
+    parser.add_argument("--no-memory", action="store_true", help="tracemalloc ölçümünü atla")
+    parser.add_argument("--subtree", action="store_true", help="liste sayfalarında sadece ürün kartlarını parse et")
+    parser.add_argument("--state", action="store_true", help="gömülü durum JSON'unu kullan (DOM'a sadece eksikte düş)")
+    parser.add_argument("--output", help="JSON raporunun yazılacağı dosya")
+    parser.add_argument("--compare", help="karşılaştırılacak önceki JSON raporu")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    report = run_benchmark(args.corpus, args.backends, args.repeat, args.limit, memory=not args.no_memory,
+                           subtree=args.subtree, state=args.state)
+    log_report(report)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"💾 Rapor yazıldı: {args.output}")
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# bots/parsers.py
+
+import os
+import re
+import importlib.util
+import logging
+from itertools import islice
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger("parsers")
+
+PARSER_BACKENDS = ("html.parser", "lxml", "selectolax")
+
+# lxml'i bs4 kendisi yükler; burada sadece kurulu mu diye bakılır
+HAS_LXML = importlib.util.find_spec("lxml") is not None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+# Varsayılan: lxml (C ile yazılmış ağaç kurucu, requirements'ta var); yoksa saf Python html.parser
+DEFAULT_PARSER = "lxml" if HAS_LXML else "html.parser"
+
+# bs4 get_text bu etiketlerin içeriğini metin saymaz
+_NON_TEXT_TAGS = ("script", "style", "template")
+
+
+def _class_tokens(*names):
+    """class niteliğinde bu sınıflardan biri var mı (strainer ham class metnini görebilir, bs4 sürümüne göre değişir)"""
+    return re.compile(r"(?:^|\s)(?:" + "|".join(re.escape(name) for name in names) + r")(?:\s|$)")
+
+
+# Liste sayfalarında botların baktığı alt ağaçlar (ürün kartları + gerekiyorsa sayfalama).
+#   css:      tarayıcıda sadece bu elemanların outerHTML'i alınır
+#   strainer: statik HTML parse edilirken bs4 ağacı sadece bunlar için kurulur (SoupStrainer)
+LISTING_SUBTREES = {
+    "trendyol": {"css": ["div.p-card-wrppr"], "strainer": {"name": "div", "class": _class_tokens("p-card-wrppr")}},
+    "n11": {"css": ["div.productArea", "div.paginationArea"],
+            "strainer": {"name": "div", "class": _class_tokens("productArea", "paginationArea")}},
+    "hepsiburada": {"css": ["li[class*='productListContent-']"],
+                    "strainer": {"name": "li", "class": re.compile("productListContent-")}},
+    "avansas": {"css": ["div.product-list"], "strainer": {"name": "div", "class": _class_tokens("product-list")}},
+}
+
+
+def get_subtree_filter(platform, page_type, override=None):
+    """
+    Liste sayfası için alt ağaç filtresi ya da None (tam sayfa).
+    Öncelik: bot options → LISTING_SUBTREE ortam değişkeni ("0" kapatır) → açık
+    """
+    if page_type != "listing":
+        return None
+    enabled = override if override is not None else os.getenv("LISTING_SUBTREE", "1") not in ("0", "false", "no")
+    return LISTING_SUBTREES.get(platform) if enabled else None
+
+
+def get_parser_backend(override=None):
+    """Öncelik: çağıran → HTML_PARSER ortam değişkeni → varsayılan; kurulu olmayan backend düşürülür"""
+    backend = override or os.getenv("HTML_PARSER") or DEFAULT_PARSER
+    if backend not in PARSER_BACKENDS:
+        logger.warning(f"⚠️ Geçersiz parser '{backend}', {DEFAULT_PARSER} kullanılıyor")
+        return DEFAULT_PARSER
+    if backend == "selectolax" and not HAS_SELECTOLAX:
+        logger.warning(f"⚠️ selectolax kurulu değil, {DEFAULT_PARSER} kullanılıyor")
+        return DEFAULT_PARSER
+    if backend == "lxml" and not HAS_LXML:
+        return "html.parser"
+    return backend
+
+
+def parse_html(html, backend=None, subtree=None):
+    """
+    HTML'i seçilen backend ile parse eder. Dönen belge botların kullandığı
+    BeautifulSoup alt kümesini destekler: select_one / select / find / find_all /
+    get_text / get / ["attr"] / has_attr / attrs / string.
+
+    subtree (bkz. LISTING_SUBTREES) verilirse bs4 ağacı sadece eşleşen elemanlar
+    ve altları için kurulur; selectolax'ta ağaç zaten C tarafında, filtre yok sayılır.
+    """
+    backend = get_parser_backend(backend)
+    if backend == "selectolax":
+        return LexborNode(LexborHTMLParser(html or "").root)
+    if subtree:
+        strainer = subtree["strainer"]
+        return BeautifulSoup(html or "", backend,
+                             parse_only=SoupStrainer(strainer["name"], {"class": strainer["class"]}))
+    return BeautifulSoup(html or "", backend)
+
+
+def _matches_value(value, expected):
+    """BeautifulSoup eşleştirme kuralları: True = var, str = eşit, regex = search, liste = biri"""
+    if expected is True:
+        return value is not None
+    if expected is None or expected is False:
+        return value is None
+    if value is None:
+        return False
+    if isinstance(expected, (list, tuple, set)):
+        return any(_matches_value(value, item) for item in expected)
+    if hasattr(expected, "search"):
+        return expected.search(value) is not None
+    return value == expected
+
+
+def _matches_class(value, expected):
+    """class çok değerlidir: her sınıf tek tek, sonra tüm değer denenir (bs4 ile aynı)"""
+    if expected is True or expected is None or expected is False:
+        return _matches_value(value, expected)
+    if value is None:
+        return False
+    return any(_matches_value(token, expected) for token in value.split()) or _matches_value(value, expected)
+
+
+class LexborNode:
+    """
+    selectolax (lexbor) düğümünün BeautifulSoup Tag arayüzüyle sarmalanmış hali.
+    Seçiciler C tarafında çalışır; sadece botların kullandığı API taklit edilir.
+    """
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def __repr__(self):
+        return f"<LexborNode {self.name}>"
+
+    def __str__(self):
+        """bs4 str(tag) gibi elemanın HTML'i"""
+        return self.node.html or ""
+
+    # === Seçiciler ===
+    def select_one(self, selector):
+        node = self.node.css_first(selector)
+        return LexborNode(node) if node is not None else None
+
+    def select(self, selector):
+        return [LexborNode(node) for node in self.node.css(selector)]
+
+    def find(self, name=None, attrs=None, **kwargs):
+        found = self.find_all(name, attrs, limit=1, **kwargs)
+        return found[0] if found else None
+
+    def find_all(self, name=None, attrs=None, limit=None, **kwargs):
+        filters = dict(attrs or {})
+        if "class_" in kwargs:
+            filters["class"] = kwargs.pop("class_")
+        filters.update(kwargs)
+
+        # Etiket adı tek ise aday kümesini C tarafında daralt (css sadece alt düğümlere bakar)
+        if isinstance(name, str):
+            candidates = self.node.css(name)
+        else:
+            candidates = islice(self.node.traverse(include_text=False), 1, None)
+        results = []
+        for node in candidates:
+            if node.tag.startswith(("-", "_", "#")):
+                continue
+            if name is not None and not isinstance(name, str) and not _matches_value(node.tag, name):
+                continue
+            if not self._matches_attrs(node, filters):
+                continue
+            results.append(LexborNode(node))
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    @staticmethod
+    def _matches_attrs(node, filters):
+        attributes = node.attributes
+        for key, expected in filters.items():
+            # Değersiz nitelik (<input disabled>) bs4'te "" olarak görünür
+            value = (attributes[key] or "") if key in attributes else None
+            matcher = _matches_class if key == "class" else _matches_value
+            if not matcher(value, expected):
+                return False
+        return True
+
+    # === İçerik ===
+    def get_text(self, separator="", strip=False):
+        """bs4 ile aynı: script/style metni atlanır, strip=True boş parçaları düşürür"""
+        own_script = self.node.tag in _NON_TEXT_TAGS
+        parts = []
+        for node in self.node.traverse(include_text=True):
+            if node.tag != "-text" or (not own_script and node.parent.tag in _NON_TEXT_TAGS):
+                continue
+            text = node.text_content
+            if strip:
+                text = text.strip()
+                if not text:
+                    continue
+            parts.append(text)
+        return separator.join(parts)
+
+    @property
+    def text(self):
+        return self.get_text()
+
+    @property
+    def string(self):
+        """Tek bir metin çocuğu varsa o metin, yoksa None (bs4 .string gibi)"""
+        children = list(self.node.iter(include_text=True))
+        if len(children) == 1:
+            child = children[0]
+            if child.tag == "-text":
+                return child.text_content
+            return LexborNode(child).string
+        return None
+
+    @property
+    def name(self):
+        return self.node.tag
+
+    @property
+    def attrs(self):
+        """bs4 ile aynı: class liste, değersiz nitelik "" """
+        attributes = {key: value or "" for key, value in self.node.attributes.items()}
+        if "class" in attributes:
+            attributes["class"] = attributes["class"].split()
+        return attributes
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    def has_attr(self, key):
+        return key in self.node.attributes
+
+    def __getitem__(self, key):
+        return self.attrs[key]
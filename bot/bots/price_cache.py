@@ -0,0 +1,125 @@
+# bots/price_cache.py
+"""
+Değişmeyen fiyat için log yazmamak üzere ürünlerin son fiyat gözlemini bellekte tutar.
+Çalışma başında platformun her ürünü için son (price, campaign_price, stock_status)
+tek sorguyla yüklenir; log satırı yalnız değer değişince ya da son logdan bu yana
+heartbeat süresi geçince yazılır (grafikler kesintisiz kalsın diye).
+Kontrol ve kayıt ayrıdır: should_log önbelleği değiştirmez; yeni fiyat ancak log satırı
+commit edilince remember ile işlenir, yazılamayan logların ürünleri forget ile silinir
+(sonraki gözlem yeniden loglanır, fiyat geçmişinde sessiz boşluk kalmaz). Kuyruğa alınıp
+henüz yazılmamış loglar (queue) bekleyen olarak tutulur; ürün yazım bitmeden başka sayfada
+ya da terimde aynı değerle tekrar görülürse ikinci log yazılmaz.
+"""
+
+import os
+import time
+import logging
+
+logger = logging.getLogger("price_cache")
+
+# "0" → her gözlem loglanır (eski davranış)
+PRICE_LOG_CHANGES_ONLY = os.getenv("PRICE_LOG_CHANGES_ONLY", "1") not in ("0", "false", "no")
+# Fiyat değişmese de bu kadar saatte bir log yazılır
+PRICE_LOG_HEARTBEAT_HOURS = float(os.getenv("PRICE_LOG_HEARTBEAT_HOURS", "24"))
+
+# Ürün başına son log; yaş sunucuda hesaplanır (istemci / sunucu saat dilimi farkı önemsiz).
+# Her ürün için product_price_logs (product_id, created_at DESC) index'inden tek okuma (bkz. api/src/initDb.js)
+_LAST_PRICES_SQL = """
+    SELECT p.platform_product_id, l.price, l.campaign_price, l.stock_status,
+           EXTRACT(EPOCH FROM NOW() - l.created_at) AS age
+    FROM products p
+    CROSS JOIN LATERAL (
+        SELECT price, campaign_price, stock_status, created_at
+        FROM product_price_logs
+        WHERE product_id = p.id
+        ORDER BY created_at DESC
+        LIMIT 1
+    ) l
+    WHERE p.platform = %s
+"""
+
+
+def _kurus(value):
+    """Karşılaştırma kuruş üzerinden: DB'den Decimal, karttan float gelir"""
+    return None if value is None else round(float(value) * 100)
+
+
+def _key(price, campaign_price, stock_status):
+    return _kurus(price), _kurus(campaign_price), stock_status
+
+
+class LastPriceCache:
+    """platform_product_id → (fiyat kuruş, kampanya kuruş, stok, son log zamanı) eşlemesi"""
+
+    def __init__(self, heartbeat_hours=None):
+        hours = PRICE_LOG_HEARTBEAT_HOURS if heartbeat_hours is None else heartbeat_hours
+        self.heartbeat = hours * 3600
+        self.prices = {}
+        # platform_product_id → kuyruğa alınmış, yazımı henüz bildirilmemiş logun değeri
+        self.pending = {}
+        self.logged = 0
+        self.skipped = 0
+
+    def load(self, cur, platform):
+        cur.execute(_LAST_PRICES_SQL, (platform,))
+        now = time.time()
+        for row in cur.fetchall():
+            self.prices[row["platform_product_id"]] = (
+                *_key(row["price"], row["campaign_price"], row["stock_status"]), now - float(row["age"] or 0)
+            )
+        return self
+
+    def should_log(self, product_id, price, campaign_price, stock_status):
+        """
+        Değer son loglanan değerden farklıysa ya da heartbeat dolduysa True; önbelleğe dokunmaz.
+        Bekleyen log varsa karşılaştırma ona göre yapılır (ürünün en son loglanan değeri odur).
+        """
+        key = _key(price, campaign_price, stock_status)
+        pending = self.pending.get(product_id)
+        if pending is not None:
+            unchanged = pending == key
+        else:
+            last = self.prices.get(product_id)
+            unchanged = last is not None and last[:3] == key and time.time() - last[3] < self.heartbeat
+        if unchanged:
+            self.skipped += 1
+            return False
+        return True
+
+    def queue(self, product_id, price, campaign_price, stock_status):
+        """Log yazılmak üzere kuyruğa alındı: sonucu bildirilene kadar bekleyen sayılır"""
+        self.pending[product_id] = _key(price, campaign_price, stock_status)
+
+    def remember(self, product_id, price, campaign_price, stock_status):
+        """Log satırı commit edildi: gözlem ürünün son logu olur"""
+        key = _key(price, campaign_price, stock_status)
+        self.prices[product_id] = (*key, time.time())
+        self._settle(product_id, key)
+        self.logged += 1
+
+    def forget(self, product_id, price, campaign_price, stock_status):
+        """Log yazılamadı: ürünün sonraki gözlemi değer aynı olsa da loglanır"""
+        self.prices.pop(product_id, None)
+        self._settle(product_id, _key(price, campaign_price, stock_status))
+
+    def _settle(self, product_id, key):
+        # Arada farklı değerle yeni log kuyruğa alındıysa o beklemeye devam eder
+        if self.pending.get(product_id) == key:
+            del self.pending[product_id]
+
+
+def get_price_cache(cur, platform, override=None, logger=logger):
+    """
+    Yüklenmiş önbellek ya da None (her gözlem loglanır).
+    Öncelik: bot options → PRICE_LOG_CHANGES_ONLY ortam değişkeni ("0" kapatır) → açık
+    """
+    enabled = override if override is not None else PRICE_LOG_CHANGES_ONLY
+    if not enabled:
+        return None
+    try:
+        cache = LastPriceCache().load(cur, platform)
+    except Exception as e:
+        logger.warning(f"⚠️ Son fiyatlar okunamadı, tüm fiyatlar loglanacak: {e}")
+        return None
+    logger.info(f"💾 {len(cache.prices)} ürünün son fiyatı yüklendi (değişmeyen fiyat loglanmayacak)")
+    return cache
@@ -0,0 +1,71 @@
+# bots/prices.py
+"""
+Türkçe biçimli fiyat metinlerini ("1.234,56 TL", "₺12,99", "1 299") kuruş cinsinden
+tam sayıya çevirir. Bir sayfanın tüm fiyatları tek seferde normalize edilir; okunamayan
+satırlar istisna yerine maske ile döner (bkz. extraction, "normalize": "price").
+
+Ayraç kuralları:
+    virgül ve nokta birlikteyse sondaki ondalık ayracıdır   "1.299,90" / "1,299.90"
+    sadece virgül: ardından 1-2 hane ondalık, 3 hanelik gruplar binlik   "12,99" / "1,299,000"
+    sadece nokta: 3 hanelik gruplar binlik, tek ve 1-2 haneli ise ondalık   "1.299" / "12.99"
+    boşluk (nbsp dahil) sadece ardından 3 hane geliyorsa binlik ayracıdır   "1 299"
+Metinde birden çok sayı varsa ("3 adet 1.299 TL") hangisinin fiyat olduğu bilinemez; okunamaz sayılır.
+"""
+
+import re
+
+# Sayı: rakamlar ve aralarındaki ayraçlar (para birimi / metin yok sayılır)
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+|\s\d{3}(?!\d))*")
+_SPACES_RE = re.compile(r"\s")
+_SEPARATORS_RE = re.compile(r"[.,]")
+_THOUSANDS_RE = re.compile(r"\d{1,3}(?:[.,]\d{3})+")
+
+
+def parse_kurus(value):
+    """Tek fiyat → kuruş (int); sayı yoksa ya da birden çoksa None. Sayısal değerler (JSON) yuvarlanarak çevrilir"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return round(value * 100)
+    if not isinstance(value, str):
+        return None
+    numbers = _NUMBER_RE.findall(value)
+    if len(numbers) != 1:
+        return None
+    number = _SPACES_RE.sub("", numbers[0])
+
+    comma, dot = number.rfind(","), number.rfind(".")
+    if comma >= 0 and dot >= 0:
+        decimal = max(comma, dot)
+    elif comma >= 0 or dot >= 0:
+        # "1.299" / "1,299,000" binlik; "12,99" / "1299.9" ondalık
+        decimal = -1 if _THOUSANDS_RE.fullmatch(number) else max(comma, dot)
+    else:
+        decimal = -1
+
+    if decimal >= 0:
+        whole, fraction = number[:decimal], number[decimal + 1:]
+    else:
+        whole, fraction = number, ""
+    whole = _SEPARATORS_RE.sub("", whole) or "0"
+    # Kuruştan fazla hane yarım yukarı yuvarlanır
+    cents = int((fraction + "00")[:2])
+    if len(fraction) > 2 and fraction[2] >= "5":
+        cents += 1
+    return int(whole) * 100 + cents
+
+
+def normalize_prices(values):
+    """
+    Sayfadaki fiyatlar → (kuruş listesi, okunamayan maske listesi).
+    None (alan yok) None kalır ve hatalı sayılmaz; sayı içermeyen metin maskelenir.
+    """
+    kurus, invalid = [], []
+    for value in values:
+        parsed = parse_kurus(value) if value is not None else None
+        kurus.append(parsed)
+        invalid.append(value is not None and parsed is None)
+    return kurus, invalid
+
+
+def kurus_to_price(kurus):
+    """Kuruş → TL (float); bölme tek adımda, ara float aritmetiği yok"""
+    return None if kurus is None else kurus / 100
@@ -0,0 +1,392 @@
+# bots/product_writer.py
+"""
+Liste sayfasının tüm ürünlerini tek seferde yazar: ürünler tek bir upsert ifadesiyle,
+fiyat logları tek bir çok satırlı INSERT ile eklenir ve sayfa başına bir kez commit edilir.
+Ürün başına SELECT + UPDATE/INSERT + log + commit gidiş-dönüşleri yerine sayfa başına 4 tur
+(BEGIN, upsert, loglar, COMMIT).
+
+Fiyat logları PriceLogWriter ile de yazılabilir: satırlar bellekte biriktirilir, boyut ya da
+süre dolunca COPY FROM STDIN ile toplu aktarılır (botlar ve geriye dönük doldurma araçları için).
+"""
+
+import io
+import os
+import csv
+import time
+import logging
+import threading
+
+import psycopg2
+from psycopg2 import errors
+from psycopg2.extras import execute_values
+
+from db_connection import get_db_connection, page_transaction
+
+logger = logging.getLogger("product_writer")
+
+# xmax = 0 → satır bu ifadede eklendi (güncellenen satırda xmax güncelleyen işlemdir)
+_UPSERT_SQL = """
+    INSERT INTO products (platform, platform_product_id, product_link, title, brand)
+    VALUES %s
+    ON CONFLICT (platform, platform_product_id) DO UPDATE
+    SET product_link = EXCLUDED.product_link,
+        title = EXCLUDED.title,
+        brand = EXCLUDED.brand,
+        updated_at = NOW()
+    RETURNING id, platform_product_id, (xmax = 0) AS is_new
+"""
+
+# (platform, platform_product_id) üzerinde unique kısıt yoksa ON CONFLICT hata verir;
+# aynı işi tek ifadede yapan CTE: önce var olanlar güncellenir, kalanlar eklenir
+_UPSERT_CTE_SQL = """
+    WITH input (platform, platform_product_id, product_link, title, brand) AS (VALUES %s),
+    updated AS (
+        UPDATE products p
+        SET product_link = i.product_link,
+            title = i.title,
+            brand = i.brand,
+            updated_at = NOW()
+        FROM input i
+        WHERE p.platform = i.platform AND p.platform_product_id = i.platform_product_id
+        RETURNING p.id, p.platform_product_id
+    ),
+    inserted AS (
+        INSERT INTO products (platform, platform_product_id, product_link, title, brand)
+        SELECT i.platform, i.platform_product_id, i.product_link, i.title, i.brand
+        FROM input i
+        WHERE NOT EXISTS (SELECT 1 FROM updated u WHERE u.platform_product_id = i.platform_product_id)
+        RETURNING id, platform_product_id
+    )
+    SELECT id, platform_product_id, FALSE AS is_new FROM updated
+    UNION ALL
+    SELECT id, platform_product_id, TRUE AS is_new FROM inserted
+"""
+
+_PRICE_LOG_SQL = """
+    INSERT INTO product_price_logs (product_id, price, campaign_price, stock_status, created_at)
+    VALUES %s
+"""
+_PRICE_LOG_TEMPLATE = "(%s, %s, %s, %s, NOW())"
+
+# Fiyat logları COPY ile toplu yazılır ("0" → sayfa başına çok satırlı INSERT)
+PRICE_LOG_COPY = os.getenv("PRICE_LOG_COPY", "1") not in ("0", "false", "no")
+# Tampon bu kadar satıra ya da ilk satırdan bu kadar saniye sonrasına ulaşınca boşaltılır
+PRICE_LOG_BATCH_ROWS = int(os.getenv("PRICE_LOG_BATCH_ROWS", "500"))
+PRICE_LOG_FLUSH_SECONDS = float(os.getenv("PRICE_LOG_FLUSH_SECONDS", "5"))
+PRICE_LOG_RETRIES = int(os.getenv("PRICE_LOG_RETRIES", "3"))
+PRICE_LOG_RETRY_DELAY = float(os.getenv("PRICE_LOG_RETRY_DELAY", "1"))
+
+# Yeni bağlantıyla tekrar denenmeye değer hatalar (bkz. write_behind)
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError,
+                    errors.SerializationFailure, errors.DeadlockDetected)
+
+# created_at sunucu saatiyle (NOW()) yazılsın diye COPY geçici tabloya yapılır, oradan tek
+# INSERT ... SELECT ile aktarılır; commit'te geçici tablo boşalır
+_PRICE_LOG_STAGE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS price_log_stage (
+        product_id bigint, price numeric, campaign_price numeric, stock_status text
+    ) ON COMMIT DELETE ROWS
+"""
+_NULL = "\\N"
+_PRICE_LOG_COPY_SQL = (
+    "COPY price_log_stage (product_id, price, campaign_price, stock_status) "
+    f"FROM STDIN WITH (FORMAT csv, NULL '{_NULL}')"
+)
+_PRICE_LOG_MOVE_SQL = """
+    INSERT INTO product_price_logs (product_id, price, campaign_price, stock_status, created_at)
+    SELECT product_id, price, campaign_price, stock_status, NOW() FROM price_log_stage
+"""
+
+_TERM_COUNT_SQL = """
+    INSERT INTO search_terms (term, platform, count)
+    VALUES %s
+    ON CONFLICT (term, platform)
+    DO UPDATE SET count = search_terms.count + EXCLUDED.count
+"""
+
+# None: henüz denenmedi; kısıt yoksa ilk denemeden sonra süreç boyunca CTE kullanılır
+_on_conflict = None
+
+
+def _column(row, key, index):
+    """RealDictCursor satırı ya da tuple"""
+    return row[index] if isinstance(row, tuple) else row[key]
+
+
+def upsert_products(cur, platform, products):
+    """
+    products: (platform_product_id, product_link, title, brand) listesi.
+    Tek ifadede ekler/günceller, {platform_product_id: (id, is_new)} döner.
+    Aynı sayfada tekrar eden ürün tek satıra indirilir (ON CONFLICT aynı satırı iki kez güncelleyemez).
+    """
+    global _on_conflict
+    unique = {}
+    for product_id, product_link, title, brand in products:
+        unique[product_id] = (platform, product_id, product_link, title, brand)
+    if not unique:
+        return {}
+
+    rows = list(unique.values())
+    if _on_conflict is None:
+        # İlk deneme savepoint içinde: hata işlemin önceki yazımlarını geri aldırmasın
+        cur.execute("SAVEPOINT product_upsert")
+        try:
+            returned = execute_values(cur, _UPSERT_SQL, rows, page_size=len(rows), fetch=True)
+            cur.execute("RELEASE SAVEPOINT product_upsert")
+            _on_conflict = True
+        except errors.InvalidColumnReference:
+            cur.execute("ROLLBACK TO SAVEPOINT product_upsert")
+            _on_conflict = False
+            logger.warning("⚠️ products tablosunda (platform, platform_product_id) kısıtı yok, CTE ile upsert ediliyor")
+    elif _on_conflict:
+        returned = execute_values(cur, _UPSERT_SQL, rows, page_size=len(rows), fetch=True)
+    if _on_conflict is False:
+        returned = execute_values(cur, _UPSERT_CTE_SQL, rows, page_size=len(rows), fetch=True)
+
+    saved = {}
+    for row in returned:
+        # Tabloda aynı ürünün birden çok satırı varsa ilk id kullanılır (eski SELECT davranışı)
+        saved.setdefault(_column(row, "platform_product_id", 1), (_column(row, "id", 0), _column(row, "is_new", 2)))
+    return saved
+
+
+def insert_price_logs(cur, logs):
+    """logs: (product_id, price, campaign_price, stock_status) listesi; tek çok satırlı INSERT"""
+    if logs:
+        execute_values(cur, _PRICE_LOG_SQL, logs, template=_PRICE_LOG_TEMPLATE, page_size=len(logs))
+        logger.debug(f"💰 {len(logs)} fiyat logu eklendi")
+
+
+def copy_price_logs(cur, logs):
+    """logs: (product_id, price, campaign_price, stock_status) listesi; açık bir işlemin içinde COPY ile yazar"""
+    if not logs:
+        return
+    buffer = io.StringIO()
+    # None → \N (COPY'nin NULL işareti); boş metin boş metin olarak kalır
+    csv.writer(buffer).writerows([_NULL if value is None else value for value in row] for row in logs)
+    buffer.seek(0)
+    cur.execute(_PRICE_LOG_STAGE_SQL)
+    cur.copy_expert(_PRICE_LOG_COPY_SQL, buffer)
+    cur.execute(_PRICE_LOG_MOVE_SQL)
+
+
+def add_term_counts(cur, counts):
+    """counts: (term, platform, yeni_ürün_sayısı) listesi; aynı terim toplanıp tek INSERT ile eklenir"""
+    totals = {}
+    for term, platform, count in counts:
+        totals[(term, platform)] = totals.get((term, platform), 0) + count
+    if totals:
+        execute_values(cur, _TERM_COUNT_SQL, [(term, platform, count) for (term, platform), count in totals.items()],
+                       page_size=len(totals))
+
+
+def load_known_ids(cur, platform):
+    """Platformun kayıtlı ürün kimlikleri; yazım arkada yapılırken yeni ürün bu kümeden anlaşılır"""
+    cur.execute("SELECT platform_product_id FROM products WHERE platform = %s", (platform,))
+    return {_column(row, "platform_product_id", 0) for row in cur.fetchall()}
+
+
+# Süreç geneli fiyat logu tamponu sayaçları (/health, /metrics/db-writer)
+_price_log_totals = {"written": 0, "retried": 0, "fallback": 0, "dropped": 0}
+_price_log_totals_lock = threading.Lock()
+
+
+def price_log_stats():
+    with _price_log_totals_lock:
+        return dict(_price_log_totals)
+
+
+def _count_price_logs(**counts):
+    with _price_log_totals_lock:
+        for key, value in counts.items():
+            _price_log_totals[key] += value
+
+
+class PriceLogWriter:
+    """
+    Fiyat loglarını biriktirip COPY ile yazan tampon. add() tampon dolduysa ya da en eski
+    satır PRICE_LOG_FLUSH_SECONDS'tan eskiyse boşaltır; close() kalanları yazar.
+    Bağlantıyı yazan tek thread kullanmalıdır (botlarda sayfa tüketicisi).
+    Geçici hatada yazıcıya ait yeni bir bağlantıyla yeniden denenir; COPY yine olmazsa satırlar
+    tek tek INSERT edilir, sadece yazılamayanlar düşülür (dropped).
+
+        with PriceLogWriter(conn) as logs:
+            logs.add([(product_id, price, campaign_price, stock_status), ...])
+    """
+
+    def __init__(self, conn, batch_rows=None, flush_seconds=None, retries=PRICE_LOG_RETRIES, on_done=None,
+                 logger=logger):
+        self.conn = conn
+        self.batch_rows = batch_rows or PRICE_LOG_BATCH_ROWS
+        self.flush_seconds = flush_seconds if flush_seconds is not None else PRICE_LOG_FLUSH_SECONDS
+        self.retries = retries
+        self.logger = logger
+        # on_done(anahtarlar, yazıldı_mı): satırlar commit edilince ya da düşülünce add'e verilen anahtarlarla
+        self.on_done = on_done
+        self.rows = []
+        self.keys = []
+        self.oldest = None
+        self.written = 0
+        self.dropped = 0
+        self.retried = 0
+        self.flushes = 0
+        # Botun bağlantısı koparsa yazıcının kiraladığı bağlantı (close'da iade edilir)
+        self._own_conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, rows, keys=None):
+        """keys: satır başına anahtar (ör. ürün), on_done'a satırın sonucuyla verilir"""
+        if not rows:
+            return
+        if not self.rows:
+            self.oldest = time.monotonic()
+        self.rows.extend(rows)
+        self.keys.extend(keys if keys is not None else [None] * len(rows))
+        if len(self.rows) >= self.batch_rows or time.monotonic() - self.oldest >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Tamponu tek işlemde yazar; yazılan satır sayısını döner (ürün kayıtları etkilenmez)"""
+        rows, self.rows, self.oldest = self.rows, [], None
+        keys, self.keys = self.keys, []
+        if not rows:
+            return 0
+        try:
+            self._copy(rows)
+            results = [True] * len(rows)
+            self.flushes += 1
+            self.logger.debug(f"💰 {len(rows)} fiyat logu COPY ile yazıldı")
+        except Exception as e:
+            self.logger.warning(f"⚠️ {len(rows)} fiyat logu COPY ile yazılamadı, tek tek yazılıyor: {e}")
+            if isinstance(e, TRANSIENT_ERRORS):
+                self._reconnect()
+            results = self._insert_each(rows)
+            _count_price_logs(fallback=len(rows), dropped=results.count(False))
+            if not all(results):
+                self.logger.error(f"❌ {results.count(False)} fiyat logu yazılamadı, düşüldü")
+        written = results.count(True)
+        self._notify(keys, results)
+        self.written += written
+        self.dropped += len(rows) - written
+        _count_price_logs(written=written)
+        return written
+
+    def _copy(self, rows):
+        """COPY; geçici hatada yeni bağlantıyla artan beklemeyle yeniden dener, son hatayı fırlatır"""
+        for attempt in range(self.retries + 1):
+            try:
+                with page_transaction(self.conn), self.conn.cursor() as cur:
+                    copy_price_logs(cur, rows)
+                return
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.retries:
+                    raise
+                self.retried += 1
+                _count_price_logs(retried=1)
+                delay = PRICE_LOG_RETRY_DELAY * 2 ** attempt
+                self.logger.warning(f"⚠️ Geçici fiyat logu hatası, {delay:.0f} sn sonra yeniden denenecek: {e}")
+                time.sleep(delay)
+                self._reconnect()
+
+    def _insert_each(self, rows):
+        """Satırları ayrı ayrı (autocommit) INSERT eder; satır başına yazıldı mı listesi döner"""
+        results = []
+        for row in rows:
+            try:
+                with self.conn.cursor() as cur:
+                    insert_price_logs(cur, [row])
+                results.append(True)
+            except Exception as e:
+                self.logger.debug(f"Fiyat logu yazılamadı {row}: {e}")
+                results.append(False)
+        return results
+
+    def _notify(self, keys, results):
+        if self.on_done is None:
+            return
+        for written in (True, False):
+            done = [key for key, result in zip(keys, results) if result is written and key is not None]
+            if done:
+                try:
+                    self.on_done(done, written)
+                except Exception as e:
+                    self.logger.warning(f"⚠️ Fiyat logu sonucu bildirilemedi: {e}")
+
+    def _reconnect(self):
+        """Botun (kopmuş olabilecek) bağlantısı yerine yazıcıya ait yeni bir bağlantı kiralar"""
+        self._release_own_conn()
+        try:
+            self.conn = self._own_conn = get_db_connection("price-logs")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Fiyat logları için yeni bağlantı alınamadı: {e}")
+
+    def _release_own_conn(self):
+        conn, self._own_conn = self._own_conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def close(self):
+        self.flush()
+        self._release_own_conn()
+        if self.flushes:
+            self.logger.info(f"💰 {self.written} fiyat logu yazıldı ({self.flushes} COPY partisi)")
+        if self.dropped:
+            self.logger.warning(f"⚠️ {self.dropped} fiyat logu yazılamadı")
+
+
+def get_price_log_writer(conn, override=None, on_done=None, logger=logger):
+    """
+    Toplu yazıcı ya da None (loglar sayfanın işleminde INSERT edilir).
+    Öncelik: bot options → PRICE_LOG_COPY ortam değişkeni ("0" kapatır) → açık
+    """
+    return PriceLogWriter(conn, on_done=on_done, logger=logger) if price_log_copy_enabled(override) else None
+
+
+def price_log_copy_enabled(override=None):
+    """Fiyat logları COPY ile mi yazılır: bot options → PRICE_LOG_COPY ortam değişkeni → açık"""
+    return override if override is not None else PRICE_LOG_COPY
+
+
+def save_products(conn, cur, platform, products, price_logs=None):
+    """
+    products: (platform_product_id, product_link, title, brand, price, campaign_price, stock_status, log) listesi;
+    log False ise ürün güncellenir ama fiyat logu yazılmaz (bkz. price_cache).
+    Ürünleri ve fiyat loglarını tek işlemde yazar; sıra korunarak (id, is_new) listesi döner.
+    id alınamayan üründe (None, False) döner ve logu yazılmaz.
+    price_logs (PriceLogWriter) verilirse loglar ürünler commit edildikten sonra tampona eklenir;
+    anahtar olarak loglanan ürün satırı verilir (yazım sonucu price_logs.on_done ile bildirilir).
+    """
+    with page_transaction(conn):
+        results, logs = write_products(cur, platform, products)
+        if price_logs is None:
+            insert_price_logs(cur, logs)
+    if price_logs is not None:
+        # write_products'taki süzgeçle aynı: id alınan ve loglanacak ürünler, aynı sırayla
+        price_logs.add(logs, [product for product, (db_id, _) in zip(products, results) if db_id and product[7]])
+    return results
+
+
+def write_products(cur, platform, products):
+    """
+    save_products'un işlem içindeki adımı: ürünleri upsert eder, sıra korunarak
+    ((id, is_new) listesi, yazılacak fiyat logları) döner. Commit ve log yazımı çağırana kalır.
+    """
+    saved = upsert_products(cur, platform, [product[:4] for product in products])
+    results, logs, reported = [], [], set()
+    for product_id, _, _, _, price, campaign_price, stock_status, log in products:
+        db_id, is_new = saved.get(product_id, (None, False))
+        # Sayfada tekrar eden ürün yalnız ilk görüldüğünde yeni sayılır
+        is_new = is_new and product_id not in reported
+        reported.add(product_id)
+        results.append((db_id, is_new))
+        if db_id and log:
+            logs.append((db_id, price, campaign_price, stock_status))
+    return results, logs
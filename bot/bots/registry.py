@@ -0,0 +1,47 @@
+# bots/registry.py
+
+import importlib
+
+# Bot sınıfları import sırasında @register_bot ile buraya eklenir
+BOT_REGISTRY = {}
+
+# Registry'yi dolduran bot modülleri
+BOT_MODULES = [
+    "trendyol",
+    "trendyolDetay",
+    "n11",
+    "n11detay",
+    "hepsiburada",
+    "hepsiburadaDetay",
+    "avansas",
+    "avansasDetay",
+]
+
+
+def register_bot(cls):
+    """Bot sınıfını adıyla (cls.name) registry'ye ekler"""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} için name tanımlanmamış")
+    BOT_REGISTRY[cls.name] = cls
+    return cls
+
+
+def load_bots():
+    """Tüm bot modüllerini bir kez import eder"""
+    for module_name in BOT_MODULES:
+        importlib.import_module(module_name)
+    return BOT_REGISTRY
+
+
+def get_bot_class(name):
+    if not BOT_REGISTRY:
+        load_bots()
+    return BOT_REGISTRY.get(name)
+
+
+def run_bot(name, terms=None, options=None, progress=None):
+    """Botu süreç içinde çalıştırır ve sonuç dict'ini döner"""
+    bot_class = get_bot_class(name)
+    if not bot_class:
+        raise KeyError(f"{name} bulunamadı")
+    return bot_class(progress=progress).run(terms, options)
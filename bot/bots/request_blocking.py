@@ -0,0 +1,165 @@
+# bots/request_blocking.py
+
+import os
+import json
+import logging
+
+logger = logging.getLogger("request_blocking")
+
+BLOCKING_ENABLED = os.getenv("BLOCK_RESOURCES", "1") == "1"
+
+# Botlar sadece HTML metni ve img src niteliklerini okuyor; görselin kendisi,
+# font, video, reklam/analitik scriptleri ve (çoğu platformda) CSS gereksiz
+IMAGE_PATTERNS = ["*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+                  "*/format:webp*"]
+FONT_PATTERNS = ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"]
+MEDIA_PATTERNS = ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*"]
+CSS_PATTERNS = ["*.css*"]
+TRACKER_PATTERNS = [
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*connect.facebook.com*",
+    "*hotjar.com*", "*criteo.com*", "*criteo.net*", "*go2sdk.com*", "*glov.ai*",
+    "*cookielaw.org*", "*useinsider.com*", "*tiktok.com*", "*clarity.ms*",
+    "*yandex.ru*", "*bing.com*",
+]
+
+COMMON_DENY = IMAGE_PATTERNS + FONT_PATTERNS + MEDIA_PATTERNS + TRACKER_PATTERNS
+
+# Platform profilleri: deny engellenir, allow ise deny'a rağmen yüklenir
+BLOCKING_PROFILES = {
+    "trendyol": {"deny": COMMON_DENY + CSS_PATTERNS, "allow": []},
+    "hepsiburada": {"deny": COMMON_DENY + CSS_PATTERNS, "allow": []},
+    "avansas": {"deny": COMMON_DENY + CSS_PATTERNS, "allow": []},
+    # n11 bot tespiti yapıyor, CSS'e dokunma
+    "n11": {"deny": COMMON_DENY, "allow": []},
+}
+
+# Ortamdan ek kalıplar (virgülle ayrılmış), tüm platformlara eklenir
+EXTRA_DENY = [p.strip() for p in os.getenv("BLOCK_EXTRA_DENY", "").split(",") if p.strip()]
+EXTRA_ALLOW = [p.strip() for p in os.getenv("BLOCK_EXTRA_ALLOW", "").split(",") if p.strip()]
+
+# Bu oturumda aynı tipte hiç yüklenen kaynak yoksa tasarruf tahmini için kullanılan boyutlar
+DEFAULT_RESOURCE_BYTES = {
+    "Image": 40_000,
+    "Font": 35_000,
+    "Stylesheet": 30_000,
+    "Script": 60_000,
+    "Media": 500_000,
+    "XHR": 5_000,
+    "Fetch": 5_000,
+    "Other": 10_000,
+}
+
+
+def get_profile(platform):
+    profile = BLOCKING_PROFILES.get(platform, {"deny": COMMON_DENY, "allow": []})
+    return {
+        "deny": profile["deny"] + EXTRA_DENY,
+        "allow": profile["allow"] + EXTRA_ALLOW,
+    }
+
+
+def apply_blocking(driver, platform):
+    """Platform profilini CDP Network.setBlockedURLs ile tarayıcıya uygular"""
+    if not BLOCKING_ENABLED:
+        clear_blocking(driver)
+        return False
+
+    profile = get_profile(platform)
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        try:
+            # Yeni Chrome: sıralı kalıplar, ilk eşleşen kazanır (allow → deny)
+            patterns = [{"urlPattern": p, "block": False} for p in profile["allow"]]
+            patterns += [{"urlPattern": p, "block": True} for p in profile["deny"]]
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urlPatterns": patterns})
+        except Exception:
+            # Eski Chrome sadece engelleme listesini destekler, allow kalıpları uygulanamaz
+            if profile["allow"]:
+                logger.debug("Allow kalıpları bu Chrome sürümünde desteklenmiyor")
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": profile["deny"]})
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ İstek engelleme uygulanamadı ({platform}): {e}")
+        return False
+
+
+def read_network_log(driver):
+    """Tarayıcının performance log tamponunu boşaltır, Network mesajlarını döner"""
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return []
+
+    messages = []
+    for entry in entries:
+        try:
+            messages.append(json.loads(entry["message"])["message"])
+        except (KeyError, ValueError, TypeError):
+            continue
+    return messages
+
+
+def clear_blocking(driver):
+    try:
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+    except Exception:
+        pass
+
+
+class BlockingStats:
+    """Performance loglarından engellenen/yüklenen istekleri ve byte'ları sayar"""
+
+    def __init__(self):
+        self.blocked = {}
+        self.loaded = {}
+        self.loaded_bytes = {}
+        self._pending_types = {}
+
+    def collect(self, driver):
+        """Tarayıcının performance log tamponunu boşaltır ve sayaçları günceller"""
+        self.update(read_network_log(driver))
+
+    def update(self, messages):
+        """read_network_log mesajlarıyla sayaçları günceller"""
+        for message in messages:
+            method = message.get("method")
+            params = message.get("params", {})
+            request_id = params.get("requestId")
+
+            if method == "Network.requestWillBeSent":
+                self._pending_types[request_id] = params.get("type", "Other")
+            elif method == "Network.loadingFinished":
+                resource_type = self._pending_types.pop(request_id, "Other")
+                self.loaded[resource_type] = self.loaded.get(resource_type, 0) + 1
+                self.loaded_bytes[resource_type] = (
+                    self.loaded_bytes.get(resource_type, 0) + int(params.get("encodedDataLength", 0))
+                )
+            elif method == "Network.loadingFailed":
+                resource_type = params.get("type") or self._pending_types.get(request_id, "Other")
+                self._pending_types.pop(request_id, None)
+                if params.get("blockedReason"):
+                    self.blocked[resource_type] = self.blocked.get(resource_type, 0) + 1
+
+        # Cevabı hiç gelmeyen isteklerin tipleri birikmesin
+        if len(self._pending_types) > 10_000:
+            self._pending_types.clear()
+
+    def estimated_saved_bytes(self):
+        total = 0
+        for resource_type, count in self.blocked.items():
+            if self.loaded.get(resource_type):
+                average = self.loaded_bytes[resource_type] / self.loaded[resource_type]
+            else:
+                average = DEFAULT_RESOURCE_BYTES.get(resource_type, DEFAULT_RESOURCE_BYTES["Other"])
+            total += count * average
+        return int(total)
+
+    def summary(self):
+        return {
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+            "loaded_requests": sum(self.loaded.values()),
+            "transferred_bytes": sum(self.loaded_bytes.values()),
+            "estimated_saved_bytes": self.estimated_saved_bytes(),
+        }
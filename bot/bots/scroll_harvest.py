@@ -0,0 +1,87 @@
+# bots/scroll_harvest.py
+"""
+Sonsuz kaydırmalı liste sayfalarında tek oturumda toplama: sayfa bir kez açılır,
+aşağı kaydırdıkça eklenen kartlar parti parti alınır. Her parti bir "sayfa" gibi
+işlenir (bkz. base_bot.ListingBot); sayfa başına ayrı navigasyon ve tam DOM parse'ı yok.
+"""
+
+import os
+import time
+import logging
+
+logger = logging.getLogger("scroll_harvest")
+
+# Varsayılan kapalı: sayfa parametresiyle gezinmeden farklı sonuç kümesi dönebilir, platform başına açılır
+HARVEST_ENABLED = os.getenv("SCROLL_HARVEST", "0") in ("1", "true", "yes")
+# Kaydırma sonrası yeni kartların gelmesi için beklenen en uzun süre (sn)
+HARVEST_WAIT = float(os.getenv("SCROLL_HARVEST_WAIT", "5"))
+HARVEST_POLL = float(os.getenv("SCROLL_HARVEST_POLL", "0.25"))
+
+# Platform başına kart seçicisi ve tekrarları ayıklamak için kimlik niteliği
+HARVEST_RULES = {
+    "trendyol": {"cards": "div.p-card-wrppr", "id_attr": "data-id"},
+}
+
+# Tek round-trip: henüz alınmamış kartları işaretleyip (kimlik, HTML) döner, sonra sayfa sonuna kaydırır
+_HARVEST_SCRIPT = """
+const [selector, idAttr] = arguments;
+const cards = [];
+for (const el of document.querySelectorAll(selector + ':not([data-harvested])')) {
+    cards.push([el.getAttribute(idAttr) || '', el.outerHTML]);
+    el.setAttribute('data-harvested', '1');
+}
+window.scrollTo(0, document.body.scrollHeight);
+return cards;
+"""
+
+# Liste kaydırınca eski kartları DOM'dan atabilir; toplam yerine alınmamış kart sayısına bakılır
+_FRESH_SCRIPT = "return document.querySelectorAll(arguments[0] + ':not([data-harvested])').length;"
+
+
+def get_harvest_rule(platform, page_type, override=None):
+    """
+    Kaydırmalı toplama kuralı ya da None (sayfa parametresiyle gezinme).
+    Öncelik: bot options → SCROLL_HARVEST ortam değişkeni ("1" açar) → kapalı
+    """
+    if page_type != "listing":
+        return None
+    enabled = override if override is not None else HARVEST_ENABLED
+    return HARVEST_RULES.get(platform) if enabled else None
+
+
+def _wait_for_more(driver, selector, timeout=HARVEST_WAIT):
+    """Alınmamış kart belirene kadar bekler; süre dolarsa False (liste bitti)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(HARVEST_POLL)
+        try:
+            if driver.execute_script(_FRESH_SCRIPT, selector) > 0:
+                return True
+        except Exception as e:
+            logger.debug(f"Kart sayısı okunamadı: {e}")
+            return False
+    return False
+
+
+def harvest(driver, rule, max_batches):
+    """
+    Açık sayfadan en fazla max_batches parti kart HTML'i toplar.
+    İlk parti sayfayla gelen kartlardır; sonrakiler her kaydırmada eklenenler.
+    Aynı kimlikli kart (yeniden çizim) ikinci kez alınmaz.
+    """
+    seen = set()
+    batches = []
+    # Yeni kart gelmeyen ya da hepsi tekrar olan turlar da sayılır; sonsuz döngü olmasın
+    for _ in range(max_batches * 2):
+        cards = driver.execute_script(_HARVEST_SCRIPT, rule["cards"], rule["id_attr"]) or []
+        fresh = []
+        for card_id, html in cards:
+            if card_id and card_id in seen:
+                continue
+            seen.add(card_id)
+            fresh.append(html)
+        if fresh:
+            batches.append("\n".join(fresh))
+        if len(batches) >= max_batches or not _wait_for_more(driver, rule["cards"]):
+            break
+    return batches
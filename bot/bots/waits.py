@@ -0,0 +1,163 @@
+# bots/waits.py
+
+import os
+import time
+import bisect
+import threading
+import logging
+
+logger = logging.getLogger("waits")
+
+# Sayfa hazır sayılmadan önce beklenen en uzun süre ve ağın sessiz kalması gereken süre
+WAIT_TIMEOUT = float(os.getenv("WAIT_TIMEOUT", "15"))
+NETWORK_IDLE_MS = int(os.getenv("WAIT_NETWORK_IDLE_MS", "1000"))
+POLL_INTERVAL = float(os.getenv("WAIT_POLL_INTERVAL", "0.25"))
+
+# Platform + sayfa tipine göre hazır olma seçicileri (listedeki hepsi bulunmalı)
+READY_SELECTORS = {
+    ("trendyol", "listing"): ["div.p-card-wrppr"],
+    ("n11", "listing"): ["div.productArea li.column"],
+    ("hepsiburada", "listing"): ["li[class*='productListContent-']"],
+    ("avansas", "listing"): ["div.product-list"],
+    ("trendyol", "detail"): ["div.merchant-name", "ul.content-descriptions-description-content"],
+    ("n11", "detail"): [".unf-p-seller-name"],
+    ("hepsiburada", "detail"): ["[data-test-id='title']", "div.productDescriptionContent"],
+    ("avansas", "detail"): ["div.product-description-tab"],
+}
+
+# Aynı platforma iki istek arası en az süre (sn); sayfa yükleme süresi buna dahildir
+MIN_REQUEST_INTERVAL = {
+    "n11": float(os.getenv("N11_MIN_REQUEST_INTERVAL", "2")),
+}
+
+# Seçici, readyState ve yüklenen kaynak sayısını tek round-trip'te döner
+_READY_SCRIPT = """
+const selectors = arguments[0];
+return {
+    ready: selectors.every(s => document.querySelector(s) !== null),
+    complete: document.readyState === 'complete',
+    resources: performance.getEntriesByType('resource').length
+};
+"""
+
+HISTOGRAM_BUCKETS = [0.25, 0.5, 1, 2, 3, 5, 8, 13, 21]
+
+
+class WaitStats:
+    """Platform/sayfa tipi başına bekleme süresi histogramı"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, platform, page_type, seconds, outcome):
+        key = f"{platform}:{page_type}"
+        with self._lock:
+            entry = self._samples.setdefault(key, {
+                "durations": [],
+                "outcomes": {},
+                "buckets": [0] * (len(HISTOGRAM_BUCKETS) + 1),
+            })
+            entry["durations"].append(seconds)
+            # Hafızada sınırlı örnek tut
+            if len(entry["durations"]) > 5000:
+                del entry["durations"][:1000]
+            entry["outcomes"][outcome] = entry["outcomes"].get(outcome, 0) + 1
+            entry["buckets"][bisect.bisect_left(HISTOGRAM_BUCKETS, seconds)] += 1
+
+    def summary(self):
+        with self._lock:
+            snapshot = {key: {
+                "durations": sorted(entry["durations"]),
+                "outcomes": dict(entry["outcomes"]),
+                "buckets": list(entry["buckets"]),
+            } for key, entry in self._samples.items()}
+
+        result = {}
+        for key, entry in snapshot.items():
+            durations = entry["durations"]
+            labels = [f"<={b}s" for b in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]}s"]
+            result[key] = {
+                "count": sum(entry["outcomes"].values()),
+                "p50": _percentile(durations, 50),
+                "p95": _percentile(durations, 95),
+                "max": round(durations[-1], 3) if durations else None,
+                "outcomes": entry["outcomes"],
+                "histogram": dict(zip(labels, entry["buckets"])),
+            }
+        return result
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 3)
+
+
+wait_stats = WaitStats()
+_last_request = {}
+_last_request_lock = threading.Lock()
+
+
+def wait_until_ready(driver, platform, page_type, timeout=WAIT_TIMEOUT, selectors=None, captured=None):
+    """
+    Sabit time.sleep yerine: platformun hazır olma seçicileri DOM'da görünene
+    kadar bekler. Seçiciler hiç gelmezse sayfa yüklenip ağ NETWORK_IDLE_MS boyunca
+    sessiz kaldığında (ör. boş arama sonucu) veya timeout dolduğunda bırakır.
+    captured() True dönerse (API yanıtı yakalandı, bkz. network_capture) render beklenmez.
+    Seçiciler bulunduysa ya da yanıt yakalandıysa True döner.
+    """
+    selectors = selectors or READY_SELECTORS.get((platform, page_type), [])
+    started = time.monotonic()
+    deadline = started + timeout
+    last_resources = -1
+    idle_since = None
+    outcome = "timeout"
+
+    while True:
+        if captured and captured():
+            outcome = "captured"
+            break
+        try:
+            state = driver.execute_script(_READY_SCRIPT, selectors) or {}
+        except Exception as e:
+            logger.debug(f"Hazır olma kontrolü başarısız: {e}")
+            state = {}
+
+        now = time.monotonic()
+        if selectors and state.get("ready"):
+            outcome = "ready"
+            break
+
+        if state.get("complete"):
+            resources = state.get("resources", 0)
+            if resources != last_resources:
+                last_resources = resources
+                idle_since = now
+            elif (now - idle_since) * 1000 >= NETWORK_IDLE_MS:
+                outcome = "network_idle"
+                break
+
+        if now >= deadline:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    elapsed = time.monotonic() - started
+    wait_stats.record(platform, page_type, elapsed, outcome)
+    if outcome == "timeout":
+        logger.warning(f"⏱️ {platform} {page_type} sayfası {timeout:.0f} sn içinde hazır olmadı")
+    return outcome in ("ready", "captured")
+
+
+def throttle(platform):
+    """Platformun minimum istek aralığı dolmadıysa kalan süre kadar bekler"""
+    interval = MIN_REQUEST_INTERVAL.get(platform)
+    if not interval:
+        return
+    with _last_request_lock:
+        now = time.monotonic()
+        wait = _last_request.get(platform, 0) + interval - now
+        _last_request[platform] = now + max(wait, 0)
+    if wait > 0:
+        time.sleep(wait)
@@ -0,0 +1,283 @@
+# bots/write_behind.py
+"""
+Veritabanı yazımlarını kazımadan ayıran arka plan yazıcısı. Botlar sayfanın ürünlerini
+ve terim sayaçlarını kompakt kayıtlar olarak sınırlı bir kuyruğa bırakır; tek bir yazıcı
+thread'i bunları toplayıp büyük işlemlerde yazar (ürünler tek upsert, fiyat logları COPY,
+sayaçlar tek INSERT; bkz. product_writer). Tarayıcı Postgres'i beklemez, kuyruk dolarsa
+bot yazıcı yetişene kadar bekler (geri basınç).
+Geçici hatalar (bağlantı kopması, deadlock) yeni bağlantıyla yeniden denenir; kalıcı
+hatada parti satır satır yazılır, sadece hatalı satır düşülür. Ürün satırlarının sonucu
+(yazıldı / düşüldü) bırakanın on_done geri çağrısıyla bildirilir.
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+
+from db_connection import get_db_connection
+from product_writer import (
+    TRANSIENT_ERRORS, page_transaction, write_products, copy_price_logs, insert_price_logs, add_term_counts,
+    price_log_copy_enabled,
+)
+
+logger = logging.getLogger("write_behind")
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND", "1") not in ("0", "false", "no")
+# Kuyrukta bekleyebilecek en fazla kayıt (sayfa / terim sayacı)
+WRITE_QUEUE_SIZE = int(os.getenv("WRITE_QUEUE_SIZE", "1000"))
+# Bir işlemde yazılan en fazla ürün satırı ve ilk kayıttan sonra en uzun bekleme (sn)
+WRITE_BATCH_ROWS = int(os.getenv("WRITE_BATCH_ROWS", "1000"))
+WRITE_FLUSH_SECONDS = float(os.getenv("WRITE_FLUSH_SECONDS", "1"))
+WRITE_RETRIES = int(os.getenv("WRITE_RETRIES", "3"))
+WRITE_RETRY_DELAY = float(os.getenv("WRITE_RETRY_DELAY", "1"))
+# Bot sonunda / kapanışta kuyruğun boşalması için beklenen en uzun süre (sn)
+WRITE_DRAIN_TIMEOUT = float(os.getenv("WRITE_DRAIN_TIMEOUT", "120"))
+
+# Kuyruk kayıtları: (tür, ...) demetleri
+_PRODUCTS = "products"   # (tür, platform, ürün satırları, on_done, loglar COPY ile mi; bkz. product_writer.save_products)
+_TERMS = "terms"         # (tür, platform, terim, yeni ürün sayısı)
+_BARRIER = "barrier"     # (tür, threading.Event) — önceki kayıtlar yazılınca set edilir
+_STOP = "stop"
+
+
+def _row_count(records):
+    """Ürün kaydı satır sayısı kadar, terim sayacı 1 sayılır"""
+    return sum(len(record[2]) if record[0] == _PRODUCTS else 1 for record in records)
+
+
+def _split(records):
+    """Kalıcı hatada ayrı ayrı yazılacak parçalar: ürün kayıtları tek satıra bölünür"""
+    for record in records:
+        if record[0] == _PRODUCTS:
+            for row in record[2]:
+                yield (_PRODUCTS, record[1], [row], record[3], record[4])
+        else:
+            yield record
+
+
+def _describe(record):
+    if record[0] == _PRODUCTS:
+        return f"{record[1]} ürün {record[2][0][0]}"
+    return f"{record[1]} terim '{record[2]}'"
+
+
+class DBWriter:
+    """Tek thread'li yazıcı; put_* çağrıları thread güvenlidir"""
+
+    def __init__(self, queue_size=WRITE_QUEUE_SIZE, batch_rows=WRITE_BATCH_ROWS,
+                 flush_seconds=WRITE_FLUSH_SECONDS, retries=WRITE_RETRIES):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self.retries = retries
+        self.conn = None
+        self._thread = None
+        self._lock = threading.Lock()
+        # Metrikler
+        self.flushes = 0
+        self.rows = 0
+        self.dropped = 0
+        self.retried = 0
+        self.last_flush_ms = None
+        self.max_flush_ms = 0.0
+        self._flush_ms_total = 0.0
+
+    # === Yaşam döngüsü ===
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+        return self
+
+    def close(self, timeout=WRITE_DRAIN_TIMEOUT):
+        """Kuyruktakileri yazıp thread'i durdurur"""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self.queue.put((_STOP,))
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"⚠️ Yazıcı {timeout:.0f} sn içinde boşalmadı ({self.queue.qsize()} kayıt kaldı)")
+
+    # === Kayıt bırakma ===
+    def put_products(self, platform, products, on_done=None, copy_logs=None):
+        """
+        on_done(satırlar, yazıldı_mı) yazıcı thread'inde, satırlar commit edilince ya da düşülünce çağrılır.
+        copy_logs: fiyat logları COPY ile mi yazılsın (bot options; None → PRICE_LOG_COPY)
+        """
+        if products:
+            self.queue.put((_PRODUCTS, platform, products, on_done, price_log_copy_enabled(copy_logs)))
+
+    def put_term_count(self, platform, term, count):
+        self.queue.put((_TERMS, platform, term, count))
+
+    def flush(self, timeout=WRITE_DRAIN_TIMEOUT):
+        """Bu ana kadar bırakılan kayıtlar yazılana kadar bekler; süre dolarsa False"""
+        done = threading.Event()
+        self.queue.put((_BARRIER, done))
+        return done.wait(timeout)
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_max": self.queue.maxsize,
+            "flushes": self.flushes,
+            "rows": self.rows,
+            "dropped": self.dropped,
+            "retried": self.retried,
+            "last_flush_ms": self.last_flush_ms,
+            "avg_flush_ms": round(self._flush_ms_total / self.flushes, 1) if self.flushes else None,
+            "max_flush_ms": self.max_flush_ms,
+        }
+
+    # === Yazıcı thread'i ===
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, controls = self._collect()
+            if batch:
+                self._flush(batch)
+            for control in controls:
+                if control[0] == _BARRIER:
+                    control[1].set()
+                else:
+                    stopping = True
+        self._release_connection()
+
+    def _collect(self):
+        """İlk kaydı bekler; sonra batch_rows dolana ya da flush_seconds geçene kadar toplar"""
+        batch, controls, rows = [], [], 0
+        record = self.queue.get()
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            if record[0] in (_BARRIER, _STOP):
+                # Kontrol kaydından önceki her şey bu partide yazılır
+                controls.append(record)
+                return batch, controls
+            batch.append(record)
+            rows += _row_count([record])
+            remaining = deadline - time.monotonic()
+            if rows >= self.batch_rows or remaining <= 0:
+                return batch, controls
+            try:
+                record = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, controls
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        dropped = self.dropped
+        self._write(batch)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.rows += _row_count(batch) - (self.dropped - dropped)
+        self.last_flush_ms = round(elapsed, 1)
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+        self._flush_ms_total += elapsed
+        logger.debug(f"🗄️ {len(batch)} kayıt {elapsed:.0f} ms'de yazıldı ({self.queue.qsize()} kuyrukta)")
+
+    def _write(self, batch):
+        """Partiyi tek işlemde yazar; geçici hatada yeniden dener, kalıcı hatada kayıt kayıt yazar"""
+        for attempt in range(self.retries + 1):
+            try:
+                conn = self._connection()
+                with page_transaction(conn), conn.cursor() as cur:
+                    self._write_records(cur, batch)
+                self._notify(batch, True)
+                return True
+            except TRANSIENT_ERRORS as e:
+                self._release_connection()
+                if attempt == self.retries:
+                    logger.error(f"❌ {len(batch)} kayıt {self.retries + 1} denemede yazılamadı: {e}")
+                    break
+                self.retried += 1
+                delay = WRITE_RETRY_DELAY * 2 ** attempt
+                logger.warning(f"⚠️ Geçici yazım hatası, {delay:.0f} sn sonra yeniden denenecek: {e}")
+                time.sleep(delay)
+            except Exception as e:
+                if _row_count(batch) == 1:
+                    logger.error(f"❌ Kayıt yazılamadı, atlandı ({_describe(batch[0])}): {e}")
+                    break
+                logger.warning(f"⚠️ Parti yazılamadı, satırlar tek tek yazılıyor: {e}")
+                return all([self._write([part]) for part in _split(batch)])
+
+        self.dropped += _row_count(batch)
+        self._notify(batch, False)
+        return False
+
+    def _notify(self, batch, written):
+        for record in batch:
+            if record[0] == _PRODUCTS and record[3] is not None:
+                try:
+                    record[3](record[2], written)
+                except Exception as e:
+                    logger.warning(f"⚠️ Yazım sonucu bildirilemedi: {e}")
+
+    def _write_records(self, cur, batch):
+        products, counts = {}, []
+        for record in batch:
+            if record[0] == _PRODUCTS:
+                products.setdefault((record[1], record[4]), []).extend(record[2])
+            else:
+                _, platform, term, count = record
+                counts.append((term, platform, count))
+
+        copied, inserted = [], []
+        for (platform, copy_logs), rows in products.items():
+            (copied if copy_logs else inserted).extend(write_products(cur, platform, rows)[1])
+        copy_price_logs(cur, copied)
+        insert_price_logs(cur, inserted)
+        add_term_counts(cur, counts)
+
+    def _connection(self):
+        if self.conn is None:
+            self.conn = get_db_connection("db-writer")
+        return self.conn
+
+    def _release_connection(self):
+        """Bağlantıyı havuza iade eder (kopmuşsa havuz atar, yerine yenisi açılır)"""
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+# === Süreç geneli yazıcı ===
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_db_writer(override=None):
+    """
+    Çalışan paylaşılan yazıcı ya da None (botlar sayfayı kendi işleminde yazar).
+    Öncelik: bot options → WRITE_BEHIND ortam değişkeni ("0" kapatır) → açık
+    """
+    global _writer
+    enabled = override if override is not None else WRITE_BEHIND_ENABLED
+    if not enabled:
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = DBWriter()
+        return _writer.start()
+
+
+def writer_stats():
+    with _writer_lock:
+        writer = _writer
+    return writer.stats() if writer else None
+
+
+@atexit.register
+def shutdown_db_writer():
+    with _writer_lock:
+        writer = _writer
+    if writer:
+        writer.close()
@@ -0,0 +1,5 @@
+# Botlar bot/bots altında düz modüller olarak birbirini import eder (bkz. Dockerfile: /app/bots)
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bots"))
@@ -0,0 +1,39 @@
+# bots/base_bot.py: kaydırmalı toplama yapılamayan terim hata sayılır
+import logging
+
+import pytest
+
+import base_bot
+from base_bot import ListingBot
+from fetcher import FetchResult
+
+
+class FakeListingBot(ListingBot):
+    name = "test-listing"
+    platform = "test"
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.setattr(base_bot, "setup_logger", logging.getLogger)
+    return FakeListingBot()
+
+
+def test_harvested_result_is_not_an_error(bot):
+    result = FetchResult("https://example.com", "", "browser", True, 0.0)
+    result.batches = [FetchResult("https://example.com", "<div></div>", "browser", True, 0.0)]
+
+    bot.check_harvest({"term": "kalem", "next": 1}, result, None)
+
+    assert bot.errors == 0
+
+
+def test_skipped_harvest_marks_term_error(bot):
+    # Sayfa hazır olmadı: toplama yapılmadı, sadece ilk ekran geldi
+    result = FetchResult("https://example.com", "<div></div>", "browser", False, 0.0)
+
+    bot.check_harvest({"term": "kalem", "next": 1}, result, None)
+    bot.check_harvest({"term": "silgi", "next": 1}, None, RuntimeError("timeout"))
+
+    assert bot.errors == 2
+    assert [info["term"] for info in bot.error_products] == ["kalem", "silgi"]
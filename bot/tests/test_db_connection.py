@@ -0,0 +1,76 @@
+# bots/db_connection.py: Pipeline tek işlemdir; yeniden çalıştırmada hata olursa önceki DELETE de geri alınır
+import psycopg2
+import pytest
+
+from db_connection import Pipeline, pipeline
+
+
+class FakeConnection:
+    def __init__(self):
+        self.autocommit = True
+        self.committed, self.pending = [], []
+
+    def commit(self):
+        self.committed.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+
+class FakeCursor:
+    """'hatalı' içeren ifadede hata verir; savepoint'e dönüşte sonraki ifadeler geri alınır"""
+
+    def __init__(self, conn):
+        self.connection = conn
+        self.savepoints = {}
+
+    def mogrify(self, sql, params):
+        return (sql % tuple(repr(param) for param in params or ())).encode()
+
+    def execute(self, sql, params=None):
+        sql = sql.decode() if isinstance(sql, bytes) else sql
+        conn = self.connection
+        if sql.startswith("SAVEPOINT"):
+            self.savepoints[sql.split()[1]] = len(conn.pending)
+        elif sql.startswith("ROLLBACK TO SAVEPOINT"):
+            del conn.pending[self.savepoints[sql.split()[-1]]:]
+        elif sql.startswith("RELEASE"):
+            pass
+        elif "hatalı" in str(params) or "hatalı" in sql:
+            raise psycopg2.DataError("hatalı değer")
+        else:
+            conn.pending.append(sql % tuple(params) if params else sql)
+            if conn.autocommit:
+                conn.commit()
+
+
+def test_failed_replay_rolls_back_the_delete():
+    conn = FakeConnection()
+    cur = FakeCursor(conn)
+
+    with pytest.raises(psycopg2.DataError):
+        with pipeline(cur) as pipe:
+            pipe.execute("DELETE FROM product_attributes WHERE product_id = %s", (7,))
+            pipe.execute("INSERT INTO product_attributes VALUES (%s, %s)", (7, "hatalı"))
+
+    assert conn.committed == []
+    assert conn.autocommit
+
+
+def test_on_error_skips_only_that_statement():
+    conn = FakeConnection()
+    cur = FakeCursor(conn)
+    errors = []
+
+    pipe = Pipeline(cur)
+    pipe.execute("DELETE FROM product_attributes WHERE product_id = %s", (7,))
+    pipe.execute("INSERT INTO product_attributes VALUES (%s, %s)", (7, "hatalı"), on_error=errors.append)
+    pipe.execute("INSERT INTO product_attributes VALUES (%s, %s)", (7, "renk"))
+
+    assert pipe.sync() == 1
+    assert len(errors) == 1
+    assert conn.committed == [
+        "DELETE FROM product_attributes WHERE product_id = 7",
+        "INSERT INTO product_attributes VALUES (7, renk)",
+    ]
@@ -0,0 +1,23 @@
+# bots/depth_policy.py: fiyat tavanı sorgusu terimi LIKE deseni olarak değil düz metin olarak aramalı
+from depth_policy import DepthPolicy
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchone(self):
+        return (100,)
+
+
+def test_price_ceiling_escapes_like_wildcards():
+    cur = RecordingCursor()
+    policy = DepthPolicy("trendyol", 10, {"price_ceiling_ratio": 1.5})
+
+    assert policy.price_ceiling(cur, "%50_indirim\\") == 150.0
+    sql, params = cur.executed[0]
+    assert "ESCAPE '\\'" in sql
+    assert params == ("%\\%50\\_indirim\\\\%",)
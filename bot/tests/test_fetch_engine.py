@@ -0,0 +1,47 @@
+# bots/fetch_engine.py: tarayıcı havuzunda tek boş yer varken ek işçiler istekleri düşürmemeli
+import threading
+
+import fetch_engine
+from fetch_engine import FetchEngine
+from fetcher import Fetcher, FetchResult
+
+
+class OneBrowserPool:
+    """Tek tarayıcılık havuz: ikinci kiralama beklerse zaman aşımı, beklemezse None"""
+
+    def __init__(self):
+        self.leased = 0
+        self.waited = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, timeout=None):
+        with self.lock:
+            if self.leased:
+                if timeout != 0:
+                    self.waited += 1
+                return None
+            self.leased += 1
+            return object()
+
+
+def fake_browser_fetch(self, url):
+    if self.driver is None:
+        raise RuntimeError("Chrome oturumu alınamadı")
+    return FetchResult(url, "<html></html>", "browser", True, 0.0)
+
+
+def test_extra_worker_leaves_requests_to_browser_worker(monkeypatch):
+    monkeypatch.setattr(Fetcher, "_fetch_browser", fake_browser_fetch)
+    monkeypatch.setattr(fetch_engine, "DRIVER_RETRY_SECONDS", 0.01)
+    monkeypatch.setattr(fetch_engine, "HOST_RATES", {"trendyol": 1000.0})
+    pool = OneBrowserPool()
+    engine = FetchEngine("trendyol", "listing", pool, mode="browser", concurrency=2, parse_workers=0)
+    assert engine.open()
+
+    handled = []
+    engine.run([(f"https://example.com/{page}", page) for page in range(6)],
+               lambda url, context, result, error: handled.append((context, error)))
+
+    assert sorted(handled) == [(page, None) for page in range(6)]
+    assert pool.waited == 0
+    assert not engine.fetchers[1].has_driver
@@ -0,0 +1,56 @@
+# bots/fetcher.py: tarayıcıda çalışan _PAGE_SCRIPT'in geçerli JS olduğu ve kart kapsayıcılarını döndürdüğü
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from fetcher import _PAGE_SCRIPT
+
+NODE = shutil.which("node")
+pytestmark = pytest.mark.skipif(NODE is None, reason="node yok")
+
+# execute_script gövdeyi fonksiyon olarak çalıştırır; aynısını küçük bir sahte DOM ile yapar
+_HARNESS = """
+const order = [];
+const el = (html, inner = []) => {
+    const node = {outerHTML: html, contains: other => other === node || inner.includes(other)};
+    order.push(node);
+    return node;
+};
+const child = el("<div class=card>iç</div>");
+const cards = [el("<div class=card>1</div>", [child]), child, el("<div class=card>2</div>")];
+const state = {text: "window.__STATE__ = {}", outerHTML: "<script>window.__STATE__ = {}</script>"};
+order.push(state);
+global.Node = {DOCUMENT_POSITION_FOLLOWING: 4};
+for (const node of order) {
+    node.compareDocumentPosition = other => order.indexOf(other) > order.indexOf(node) ? 4 : 2;
+}
+global.document = {
+    querySelectorAll: selector => selector === ".card" ? cards : [],
+    scripts: [{text: "var a = 1"}, state],
+};
+const run = new Function(SCRIPT);
+console.log(JSON.stringify(run([".card"], ["__STATE__"], null, "script")));
+"""
+
+
+def run_script():
+    harness = "const SCRIPT = %s;\n%s" % (json.dumps(_PAGE_SCRIPT), _HARNESS)
+    result = subprocess.run([NODE, "-e", harness], capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout)
+
+
+def test_page_script_parses():
+    result = subprocess.run([NODE, "-e", "new Function(%s)" % json.dumps(_PAGE_SCRIPT)],
+                            capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+
+
+def test_containers_joined_in_document_order():
+    assert run_script().split("\n") == [
+        "<div class=card>1</div>",
+        "<div class=card>2</div>",
+        "<script>window.__STATE__ = {}</script>",
+    ]
@@ -0,0 +1,42 @@
+# bots/job_queue.py: kapanışta kuyruktaki işler iptal edilir, çalışan işler beklenir
+import threading
+import time
+
+from job_queue import JobManager
+
+
+def test_shutdown_waits_for_running_job_and_cancels_queued():
+    manager = JobManager(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow(job):
+        started.set()
+        release.wait(5)
+        return {"status": "success"}
+
+    running, _ = manager.submit("trendyol", slow)
+    queued, _ = manager.submit("n11", lambda job: {"status": "success"})
+    assert started.wait(5)
+
+    threading.Timer(0.2, release.set).start()
+    begun = time.monotonic()
+    assert manager.shutdown(timeout=5)
+
+    assert time.monotonic() - begun >= 0.1
+    assert running.status == "success"
+    assert queued.status == "cancelled"
+
+
+def test_shutdown_gives_up_after_timeout():
+    manager = JobManager(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def stuck(job):
+        started.set()
+        release.wait(5)
+
+    manager.submit("trendyol", stuck)
+    assert started.wait(5)
+
+    assert not manager.shutdown(timeout=0.1)
+    release.set()
@@ -0,0 +1,72 @@
+# bots/network_capture.py: sadece istenen sayfanın API yanıtı kabul edilmeli ve trendyol eşlemesiyle okunmalı
+import json
+import os
+
+import network_capture
+from extraction_specs import extract_cards, find_state_cards
+from network_capture import CAPTURE_RULES, NetworkCapture, get_capture_rule
+
+# Trendyol arama ağ geçidinin infinite-scroll yanıt biçiminde örnek (spec'in okuduğu alanlarla)
+SAMPLE = os.path.join(os.path.dirname(__file__), "fixtures", "trendyol_infinite_scroll.json")
+API = "https://public.trendyol.com/discovery-web-searchgw-service/v2/api/infinite-scroll/sr"
+
+
+class FakeDriver:
+    """Network.getResponseBody'yi requestId → gövde eşlemesinden yanıtlar"""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def execute_cdp_cmd(self, command, params):
+        return {"body": self.bodies[params["requestId"]], "base64Encoded": False}
+
+
+def response_events(request_id, url):
+    return [
+        {"method": "Network.responseReceived",
+         "params": {"requestId": request_id, "response": {"url": url, "mimeType": "application/json"}}},
+        {"method": "Network.loadingFinished", "params": {"requestId": request_id}},
+    ]
+
+
+def sample_body():
+    with open(SAMPLE, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_capture_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(network_capture, "CAPTURE_ENABLED", False)
+    assert get_capture_rule("trendyol", "listing") is None
+    assert get_capture_rule("trendyol", "listing", override=True) is CAPTURE_RULES[("trendyol", "listing")]
+
+
+def test_next_page_response_is_ignored():
+    rule = CAPTURE_RULES[("trendyol", "listing")]
+    capture = NetworkCapture(rule, "https://www.trendyol.com/sr?q=kalem&pi=2")
+    next_page = json.dumps({"result": {"products": [{"id": 1, "name": "Sonraki sayfa", "url": "/x-p-1",
+                                                     "price": {"sellingPrice": 1.0}}]}})
+    driver = FakeDriver({"1": next_page, "2": sample_body()})
+
+    capture.feed(driver, response_events("1", f"{API}?q=kalem&pi=3&culture=tr-TR"))
+    assert capture.result() is None
+    assert capture.skipped == 1
+
+    capture.feed(driver, response_events("2", f"{API}?q=kalem&pi=2&culture=tr-TR"))
+    cards = find_state_cards("trendyol", capture.result())
+    assert [card["id"] for card in cards] == [123456789, 987654321]
+
+
+def test_sample_maps_to_listing_fields():
+    cards = find_state_cards("trendyol", json.loads(sample_body()))
+    first, second = extract_cards("trendyol", cards)
+
+    assert first["platform_product_id"] == "123456789"
+    assert first["title"] == "Tükenmez Kalem 10'lu Paket Mavi"
+    assert first["brand"] == "Faber-Castell"
+    assert first["product_link"].startswith("https://www.trendyol.com/faber-castell/")
+    assert (first["price"], first["campaign_price"]) == (149.9, 129.9)
+    assert first["stock_status"] == "Yarın kargoda"
+
+    # İndirimli fiyat satış fiyatından düşük değilse kampanya yok (DOM'daki gibi)
+    assert (second["price"], second["campaign_price"]) == (89.5, 0.0)
+    assert second["stock_status"] == "2 gün içinde kargoda"
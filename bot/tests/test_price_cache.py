@@ -0,0 +1,118 @@
+# bots/price_cache.py: önbellek yalnız log yazılınca güncellenir, yazılamayan log silinir
+import logging
+
+import pytest
+
+import base_bot
+from base_bot import ListingBot
+from price_cache import LastPriceCache
+
+
+def product(product_id, price, log=True):
+    return (product_id, "link", "title", "brand", price, None, "Stokta", log)
+
+
+def bot_with(cache):
+    bot = ListingBot.__new__(ListingBot)
+    bot.last_prices = cache
+    return bot
+
+
+def test_should_log_does_not_touch_cache():
+    cache = LastPriceCache(heartbeat_hours=24)
+    assert cache.should_log("p1", 10.0, None, "Stokta")
+    # Yazım onaylanmadığı sürece aynı gözlem yeniden loglanır
+    assert cache.should_log("p1", 10.0, None, "Stokta")
+    assert cache.prices == {} and cache.logged == 0
+
+    cache.remember("p1", 10.0, None, "Stokta")
+    assert not cache.should_log("p1", 10.0, None, "Stokta")
+    assert cache.should_log("p1", 11.0, None, "Stokta")
+    assert (cache.logged, cache.skipped) == (1, 1)
+
+
+def test_failed_write_forgets_written_remembers():
+    cache = LastPriceCache(heartbeat_hours=24)
+    cache.remember("p1", 10.0, None, "Stokta")
+    cache.remember("p2", 20.0, None, "Stokta")
+    bot = bot_with(cache)
+
+    bot.settle_prices([product("p1", 12.0), product("p3", 30.0)], True)
+    bot.settle_prices([product("p2", 25.0), product("p1", 99.0, log=False)], False)
+
+    assert not cache.should_log("p1", 12.0, None, "Stokta")
+    assert not cache.should_log("p3", 30.0, None, "Stokta")
+    # Yazılamayan log: eski değer dahil her gözlem yeniden loglanır
+    assert "p2" not in cache.prices
+    assert cache.should_log("p2", 20.0, None, "Stokta")
+
+
+class FakePriceLogs:
+    """PriceLogWriter yerine: loglar flush edilene kadar tamponda kalır"""
+
+    def __init__(self):
+        self.rows, self.keys, self.on_done = [], [], None
+
+    def add(self, rows, keys):
+        self.rows.extend(rows)
+        self.keys.extend(keys)
+
+    def flush(self, written=True):
+        keys, self.keys, self.rows = self.keys, [], []
+        self.on_done(keys, written)
+
+
+class FakeListingBot(ListingBot):
+    name = "test-listing"
+    platform = "test"
+
+    def card_prices(self, fields):
+        return fields["price"], None, fields["price"]
+
+
+@pytest.fixture
+def listing_bot(monkeypatch):
+    monkeypatch.setattr(base_bot, "setup_logger", logging.getLogger)
+    logs = FakePriceLogs()
+
+    def save_products(conn, cur, platform, products, price_logs):
+        price_logs.add([(1, *product[4:7]) for product in products if product[7]],
+                       [product for product in products if product[7]])
+        return [(1, False)] * len(products)
+
+    monkeypatch.setattr(base_bot, "save_products", save_products)
+    bot = FakeListingBot()
+    bot.last_prices = LastPriceCache(heartbeat_hours=24)
+    bot.price_logs = logs
+    logs.on_done = bot.settle_prices
+    return bot, logs
+
+
+def save_card(bot, page, price):
+    state = {"term": "kalem", "page": page, "products": 0, "new": 0,
+             "page_saved": 0, "page_new": 0, "page_min_price": None}
+    card = {"platform_product_id": "p1", "product_link": "link", "title": "Kalem", "brand": "X",
+            "stock_status": "Stokta", "price": price}
+    bot.save_cards(None, None, state, [card])
+
+
+def test_same_card_on_two_pages_before_flush_logs_once(listing_bot):
+    bot, logs = listing_bot
+    save_card(bot, 1, 10.0)
+    save_card(bot, 2, 10.0)
+    assert len(logs.rows) == 1
+
+    # Yazımı beklerken fiyat değişirse yeni değer loglanır
+    save_card(bot, 3, 12.0)
+    assert len(logs.rows) == 2
+    logs.flush()
+    save_card(bot, 4, 12.0)
+    assert len(logs.rows) == 0 and bot.last_prices.pending == {}
+
+
+def test_dropped_pending_log_is_logged_again(listing_bot):
+    bot, logs = listing_bot
+    save_card(bot, 1, 10.0)
+    logs.flush(written=False)
+    save_card(bot, 2, 10.0)
+    assert len(logs.rows) == 1
@@ -0,0 +1,38 @@
+# bots/prices.py: Türkçe fiyat metinleri → kuruş
+import pytest
+
+from prices import normalize_prices, parse_kurus
+
+
+@pytest.mark.parametrize("value, kurus", [
+    ("1.234,56 TL", 123456),
+    ("₺12,99", 1299),
+    ("1.299 TL", 129900),
+    ("1,299.90", 129990),
+    ("12.99", 1299),
+    ("1 299", 129900),
+    ("1\xa0299,90 TL", 129990),
+    ("1.299.000 TL", 129900000),
+    ("9,999", 999900),
+    (149.9, 14990),
+])
+def test_parse_kurus(value, kurus):
+    assert parse_kurus(value) == kurus
+
+
+@pytest.mark.parametrize("value", [
+    "3 adet 1.299 TL",
+    "3 1.299 TL",
+    "50 - 300 TL",
+    "1.299,90 TL 1.099,90 TL",
+    "TL",
+    "",
+])
+def test_ambiguous_or_missing_number_is_unreadable(value):
+    assert parse_kurus(value) is None
+
+
+def test_normalize_prices_masks_unreadable_values():
+    kurus, invalid = normalize_prices(["55 TL", None, "3 adet 1.299 TL"])
+    assert kurus == [5500, None, None]
+    assert invalid == [False, False, True]
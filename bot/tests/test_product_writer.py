@@ -0,0 +1,107 @@
+# bots/product_writer.py: PriceLogWriter geçici hatada yeniden dener, COPY olmazsa satır satır yazar
+import psycopg2
+import pytest
+
+import product_writer
+from product_writer import PriceLogWriter
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, sql, params=None):
+        pass
+
+    def copy_expert(self, sql, buffer):
+        error = self.conn.copy_errors.pop(0) if self.conn.copy_errors else None
+        if error:
+            raise error
+        self.conn.copied.extend(buffer.read().splitlines())
+
+    def mogrify(self, template, args):
+        return repr(args).encode()
+
+
+class FakeConnection:
+    def __init__(self, copy_errors=(), bad_rows=()):
+        self.autocommit = True
+        self.copy_errors = list(copy_errors)
+        self.bad_rows = set(bad_rows)
+        self.copied, self.inserted = [], []
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(product_writer, "PRICE_LOG_RETRY_DELAY", 0)
+
+
+def patch_inserts(monkeypatch):
+    def insert(cur, logs):
+        if logs[0][0] in cur.conn.bad_rows:
+            raise psycopg2.DataError("bad row")
+        cur.conn.inserted.extend(logs)
+    monkeypatch.setattr(product_writer, "insert_price_logs", insert)
+
+
+def test_transient_error_retries_on_fresh_connection(monkeypatch):
+    broken = FakeConnection(copy_errors=[psycopg2.OperationalError("server closed the connection")])
+    fresh = FakeConnection()
+    monkeypatch.setattr(product_writer, "get_db_connection", lambda owner: fresh)
+
+    writer = PriceLogWriter(broken, batch_rows=10)
+    writer.add([(1, 10.0, 0.0, "Stokta"), (2, 20.0, None, "Stokta")])
+    assert writer.flush() == 2
+
+    assert fresh.copied == ["1,10.0,0.0,Stokta", "2,20.0,\\N,Stokta"]
+    assert (writer.retried, writer.dropped) == (1, 0)
+    writer.close()
+    assert fresh.closed and not broken.closed
+
+
+def test_permanent_error_falls_back_to_row_inserts(monkeypatch):
+    patch_inserts(monkeypatch)
+    conn = FakeConnection(copy_errors=[psycopg2.DataError("invalid input")], bad_rows={2})
+    before = product_writer.price_log_stats()
+
+    writer = PriceLogWriter(conn, batch_rows=10)
+    writer.add([(1, 10.0, 0.0, "Stokta"), (2, "x", 0.0, "Stokta"), (3, 30.0, 0.0, "Stokta")])
+    assert writer.flush() == 2
+
+    assert [row[0] for row in conn.inserted] == [1, 3]
+    assert (writer.written, writer.dropped, writer.retried) == (2, 1, 0)
+    after = product_writer.price_log_stats()
+    assert after["dropped"] - before["dropped"] == 1
+    assert after["fallback"] - before["fallback"] == 3
+
+
+def test_flush_reports_written_and_dropped_keys(monkeypatch):
+    patch_inserts(monkeypatch)
+    conn = FakeConnection(copy_errors=[psycopg2.DataError("invalid input")], bad_rows={2})
+    outcomes = []
+
+    writer = PriceLogWriter(conn, batch_rows=10, on_done=lambda keys, written: outcomes.append((keys, written)))
+    writer.add([(1, 10.0, 0.0, "Stokta"), (2, "x", 0.0, "Stokta")], keys=["p1", "p2"])
+    writer.add([(3, 30.0, 0.0, "Stokta")], keys=["p3"])
+    writer.flush()
+
+    assert outcomes == [(["p1", "p3"], True), (["p2"], False)]
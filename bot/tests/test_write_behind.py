@@ -0,0 +1,78 @@
+# bots/write_behind.py: kalıcı hatada sadece hatalı satır düşülür, sonuç bırakana bildirilir
+import psycopg2
+import pytest
+
+import write_behind
+from write_behind import DBWriter, _PRODUCTS
+
+
+class FakeConnection:
+    autocommit = True
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def product(product_id):
+    return (product_id, f"https://example.com/{product_id}", "Ürün", "Marka", 10.0, 0.0, "Stokta", True)
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    def write_products(cur, platform, rows):
+        if any(row[0] == "bozuk" for row in rows):
+            raise psycopg2.DataError("value too long")
+        return [(1, False)] * len(rows), [row[0] for row in rows]
+
+    monkeypatch.setattr(write_behind, "write_products", write_products)
+    monkeypatch.setattr(write_behind, "add_term_counts", lambda cur, counts: None)
+    writer = DBWriter()
+    writer.copied, writer.inserted = [], []
+    monkeypatch.setattr(write_behind, "copy_price_logs", lambda cur, logs: writer.copied.extend(logs))
+    monkeypatch.setattr(write_behind, "insert_price_logs", lambda cur, logs: writer.inserted.extend(logs))
+    writer.conn = FakeConnection()
+    return writer
+
+
+def test_bad_row_drops_only_itself(writer):
+    outcomes = []
+    on_done = lambda rows, written: outcomes.extend((row[0], written) for row in rows)
+    page = [product("a"), product("bozuk"), product("c")]
+
+    writer._flush([(_PRODUCTS, "trendyol", page, on_done, True)])
+
+    assert sorted(outcomes) == [("a", True), ("bozuk", False), ("c", True)]
+    assert (writer.rows, writer.dropped) == (2, 1)
+
+
+def test_written_batch_reports_every_row(writer):
+    outcomes = []
+    on_done = lambda rows, written: outcomes.extend((row[0], written) for row in rows)
+
+    writer._flush([(_PRODUCTS, "trendyol", [product("a")], on_done, True),
+                   (_PRODUCTS, "trendyol", [product("b")], on_done, True)])
+
+    assert outcomes == [("a", True), ("b", True)]
+    assert (writer.rows, writer.dropped) == (2, 0)
+
+
+def test_price_log_copy_follows_each_record(writer, monkeypatch):
+    monkeypatch.setattr(write_behind, "price_log_copy_enabled", lambda override: True if override is None else override)
+    writer.put_products("trendyol", [product("a")])
+    writer.put_products("n11", [product("b")], copy_logs=False)
+
+    writer._flush([writer.queue.get_nowait(), writer.queue.get_nowait()])
+
+    assert (writer.copied, writer.inserted) == (["a"], ["b"])